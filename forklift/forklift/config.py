@@ -23,6 +23,13 @@ FLOWS_LABEL = "forklift"
 MAX_FLOW_RUN_MINUTES = 60
 FLOW_STATES_TO_CLEAN = ["Running"]
 
+# On-disk cache of query results, to be mounted from the host so that it persists
+# across flow runs
+QUERY_CACHE_LOCATION = Path(
+    os.getenv("QUERY_CACHE_LOCATION", "/tmp/forklift/query_cache")
+)
+HOST_QUERY_CACHE_LOCATION = os.getenv("HOST_QUERY_CACHE_LOCATION")
+
 # Proxies for pipeline flows requiring Internet access
 PROXIES = {
     "http": os.environ.get("HTTP_PROXY_"),
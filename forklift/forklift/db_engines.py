@@ -1,9 +1,28 @@
 import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator
 
 import clickhouse_connect as ch
 import sqlalchemy as sa
 from clickhouse_connect.driver.httpclient import HttpClient
 
+# Connection pool settings used for all sqlalchemy engines, unless overridden by the
+# `engine_options` of the database in `db_env`
+DEFAULT_ENGINE_OPTIONS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_pre_ping": True,
+    "pool_recycle": 3600,
+}
+
+# Settings used for all data_warehouse clients
+DATA_WAREHOUSE_CLIENT_OPTIONS = {
+    "compress": True,
+    "send_receive_timeout": 900,
+}
+
 db_env = {
     "ocan": {
         "client": "ORACLE_CLIENT",
@@ -28,6 +47,7 @@ db_env = {
         "sid": "MONITORFISH_REMOTE_DB_NAME",
         "usr": "MONITORFISH_REMOTE_DB_USER",
         "pwd": "MONITORFISH_REMOTE_DB_PWD",
+        "engine_options": {"pool_recycle": 1800},
     },
     "monitorenv_remote": {
         "client": "MONITORENV_REMOTE_DB_CLIENT",
@@ -36,6 +56,7 @@ db_env = {
         "sid": "MONITORENV_REMOTE_DB_NAME",
         "usr": "MONITORENV_REMOTE_DB_USER",
         "pwd": "MONITORENV_REMOTE_DB_PWD",
+        "engine_options": {"pool_recycle": 1800},
     },
     "rapportnav_remote": {
         "client": "RAPPORTNAV_REMOTE_DB_CLIENT",
@@ -44,6 +65,7 @@ db_env = {
         "sid": "RAPPORTNAV_REMOTE_DB_NAME",
         "usr": "RAPPORTNAV_REMOTE_DB_USER",
         "pwd": "RAPPORTNAV_REMOTE_DB_PWD",
+        "engine_options": {"pool_recycle": 1800},
     },
     "monitorfish_local": {
         "client": "MONITORFISH_LOCAL_CLIENT",
@@ -106,26 +128,63 @@ def make_connection_string(db: str) -> str:
     return f"{CLIENT}://{USER}:{PWD}@{HOST}:{PORT}/{SID}"
 
 
+_engines = {}
+_engines_lock = threading.Lock()
+
+
 def create_engine(db: str, **kwargs) -> sa.engine.Engine:
     """Returns sqlalchemy engine for designated database.
 
+    Engines are created once per process and database, then reused, so that all the
+    tasks of a flow run (including mapped tasks) share the same warm connection pool.
+    Pool settings are taken from `DEFAULT_ENGINE_OPTIONS`, updated with the
+    `engine_options` of the database in `db_env`, if any.
+
     Args:
         db (str): Database name. Possible values :
             'ocan', 'fmc', 'monitorfish_remote', 'monitorenv_remote', 'rapportnav_remote'
             'monitorfish_local', 'cacem_local'
+        kwargs: passed to `sqlalchemy.create_engine`, overriding the engine options of
+          the database. `execution_options` are applied to the cached engine and do not
+          create a new connection pool.
 
     Returns:
         sa.engine.Engine: sqlalchemy engine for selected database.
     """
+    execution_options = kwargs.pop("execution_options", None)
     connection_string = make_connection_string(db)
-
-    engine = sa.create_engine(connection_string, **kwargs)
+    engine_options = {
+        **DEFAULT_ENGINE_OPTIONS,
+        **db_env[db].get("engine_options", {}),
+        **kwargs,
+    }
+    key = (connection_string, repr(sorted(engine_options.items())))
+
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = sa.create_engine(connection_string, **engine_options)
+            _engines[key] = engine
+
+    if execution_options:
+        engine = engine.execution_options(**execution_options)
 
     return engine
 
 
+def dispose_engines():
+    """Closes the connection pools of all cached engines and empties the cache."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
 def create_datawarehouse_client() -> HttpClient:
-    """Returns clickhouse client for data_warehouse database.
+    """Returns a new clickhouse client for data_warehouse database.
+
+    Creating a client requires a round trip to the server : prefer borrowing a
+    client from `datawarehouse_client_pool`, which reuses clients.
 
     Returns:
         HttpClient: clickhouse client for data_warehouse.
@@ -139,6 +198,55 @@ def create_datawarehouse_client() -> HttpClient:
         port=os.environ[credentials["port"]],
         username=os.environ[credentials["usr"]],
         password=os.environ[credentials["pwd"]],
+        **DATA_WAREHOUSE_CLIENT_OPTIONS,
     )
 
     return client
+
+
+class DataWarehouseClientPool:
+    """Thread-safe pool of reusable data_warehouse clients.
+
+    Clients are borrowed with `get` and returned with `put`, or used with the `client`
+    context manager. A borrowed client is used by only one thread at a time. Returned
+    clients are kept (up to `max_idle_clients`) along with their HTTP connections and
+    handed out again on the next `get`. Clients used in a `client` block which raises
+    an exception are closed instead of being returned, since their connection may be
+    left in an unknown state (e.g. in the middle of an interrupted query).
+    """
+
+    def __init__(self, max_idle_clients: int = 8):
+        self._idle_clients = queue.LifoQueue(maxsize=max_idle_clients)
+
+    def get(self) -> HttpClient:
+        try:
+            return self._idle_clients.get_nowait()
+        except queue.Empty:
+            return create_datawarehouse_client()
+
+    def put(self, client: HttpClient):
+        try:
+            self._idle_clients.put_nowait(client)
+        except queue.Full:
+            client.close()
+
+    @contextmanager
+    def client(self) -> Iterator[HttpClient]:
+        client = self.get()
+        try:
+            yield client
+        except BaseException:
+            client.close()
+            raise
+        self.put(client)
+
+    def clear(self):
+        """Closes and removes all idle clients from the pool."""
+        while True:
+            try:
+                self._idle_clients.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+datawarehouse_client_pool = DataWarehouseClientPool()
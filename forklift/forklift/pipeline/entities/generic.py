@@ -1,8 +1,41 @@
 from dataclasses import dataclass
-from typing import Union
+from datetime import datetime, timedelta
+from typing import Optional, Union
 
 
 @dataclass
 class IdRange:
     id_min: Union[int, str]
     id_max: Union[int, str]
+
+
+@dataclass
+class RangeSplit:
+    """Split of the range between the values of the `min_param` and `max_param`
+    query parameters into `n_splits` contiguous sub-ranges, queried concurrently on
+    at most `max_workers` threads. Other parameters are passed unchanged to each
+    sub-range query."""
+
+    min_param: str
+    max_param: str
+    n_splits: int
+    max_workers: int = 4
+
+
+@dataclass
+class QueryCachePolicy:
+    """Query results are cached on disk and reused for at most `ttl`, and only as
+    long as the result of the `freshness_query_filepath` query (a cheap probe such as
+    a row count, a max timestamp or a checksum of the source tables, run on the same
+    database) does not change."""
+
+    ttl: timedelta
+    freshness_query_filepath: Optional[str] = None
+
+
+@dataclass
+class Watermark:
+    """Most recent source message taken into account by an incremental extraction."""
+
+    operation_datetime_utc: datetime
+    report_id: str
@@ -7,8 +7,15 @@ from dateutil.relativedelta import relativedelta
 from prefect import Flow, Parameter, case, task, unmapped
 from sqlalchemy import text
 
-from forklift.db_engines import create_datawarehouse_client, create_engine
-from forklift.pipeline.helpers.generic import read_saved_query
+from forklift.db_engines import create_engine
+from forklift.pipeline.entities.generic import RangeSplit
+from forklift.pipeline.helpers.generic import (
+    concat_query_results,
+    insert_df_in_blocks,
+    read_saved_query,
+    run_on_sub_ranges,
+    staging_partition,
+)
 from forklift.pipeline.shared_tasks.control_flow import check_flow_not_running
 from forklift.pipeline.shared_tasks.dates import get_months_starts, get_utcnow
 from forklift.pipeline.shared_tasks.generic import (
@@ -17,14 +24,7 @@ from forklift.pipeline.shared_tasks.generic import (
 )
 
 
-@task(checkpoint=False)
-def extract_load_activities(month_start: date) -> pd.DataFrame:
-    logger = prefect.context.get("logger")
-
-    min_date = month_start
-    max_date = month_start + relativedelta(months=1)
-
-    logger.info(f"Extracting activities for from {min_date} to {max_date}.")
+def read_activities(params: dict) -> pd.DataFrame:
     engine = create_engine("monitorfish_remote")
     with engine.begin() as con:
         savepoint = con.begin_nested()
@@ -32,22 +32,52 @@ def extract_load_activities(month_start: date) -> pd.DataFrame:
         activities = read_saved_query(
             sql_filepath="monitorfish_remote/activities.sql",
             con=con,
-            params={
-                "min_date": min_date,
-                "max_date": max_date,
-            },
+            params=params,
         )
         savepoint.rollback()
+    return activities
+
+
+@task(checkpoint=False)
+def extract_load_activities(month_start: date, n_splits: int = 1) -> pd.DataFrame:
+    logger = prefect.context.get("logger")
+
+    min_date = month_start
+    max_date = month_start + relativedelta(months=1)
+    params = {
+        "min_date": min_date,
+        "max_date": max_date,
+        # Not split : corrections are looked up on the whole month
+        "period_min_date": min_date,
+        "period_max_date": max_date,
+    }
+
+    logger.info(f"Extracting activities for from {min_date} to {max_date}.")
+    if n_splits > 1:
+        activities = concat_query_results(
+            run_on_sub_ranges(
+                read_activities,
+                params=params,
+                split=RangeSplit(
+                    min_param="min_date", max_param="max_date", n_splits=n_splits
+                ),
+            )
+        )
+    else:
+        activities = read_activities(params)
 
     partition = f"{month_start.year}{month_start.month:0>2}"
-    client = create_datawarehouse_client()
-    logger.info(f"Droppping activities partition '{partition}'.")
-    client.command(
-        "ALTER TABLE monitorfish.activities DROP PARTITION {partition:String}",
-        parameters={"partition": partition},
-    )
     logger.info(f"Loading {len(activities)} activities of month {month_start}.")
-    client.insert_df(table="activities", df=activities, database="monitorfish")
+    with staging_partition(
+        database="monitorfish", table="activities", partition=partition, logger=logger
+    ) as staging_table:
+        insert_df_in_blocks(
+            activities,
+            table_name=staging_table,
+            database="monitorfish",
+            logger=logger,
+            max_retries=2,
+        )
 
 
 with Flow("Activities") as flow:
@@ -55,6 +85,7 @@ with Flow("Activities") as flow:
     with case(flow_not_running, True):
         start_months_ago = Parameter("start_months_ago", default=2)
         end_months_ago = Parameter("end_months_ago", default=0)
+        n_splits = Parameter("n_splits", default=1)
 
         now = get_utcnow()
         months_starts = get_months_starts(
@@ -65,12 +96,19 @@ with Flow("Activities") as flow:
 
         created_database = create_database_if_not_exists("monitorfish")
         created_table = run_ddl_scripts(
-            "monitorfish/create_activities_if_not_exists.sql",
+            [
+                "monitorfish/create_activities_if_not_exists.sql",
+                "monitorfish/set_deduplication_window.sql",
+            ],
+            database="monitorfish",
+            table="activities",
             upstream_tasks=[created_database],
         )
 
         activities = extract_load_activities.map(
-            months_starts, upstream_tasks=[unmapped(created_table)]
+            months_starts,
+            n_splits=unmapped(n_splits),
+            upstream_tasks=[unmapped(created_table)],
         )
 
 flow.file_name = Path(__file__).name
@@ -6,8 +6,12 @@ import prefect
 from dateutil.relativedelta import relativedelta
 from prefect import Flow, Parameter, case, task, unmapped
 
-from forklift.db_engines import create_datawarehouse_client
-from forklift.pipeline.helpers.generic import extract
+from forklift.pipeline.entities.generic import RangeSplit
+from forklift.pipeline.helpers.generic import (
+    extract,
+    insert_df_in_blocks,
+    staging_partition,
+)
 from forklift.pipeline.shared_tasks.control_flow import check_flow_not_running
 from forklift.pipeline.shared_tasks.dates import get_months_starts, get_utcnow
 from forklift.pipeline.shared_tasks.generic import (
@@ -17,26 +21,48 @@ from forklift.pipeline.shared_tasks.generic import (
 
 
 @task(checkpoint=False)
-def extract_catches(month_start: date) -> pd.DataFrame:
+def extract_catches(month_start: date, n_splits: int = 1) -> pd.DataFrame:
     min_date = month_start
     max_date = month_start + relativedelta(months=1)
 
     return extract(
         db_name="monitorfish_remote",
         query_filepath="monitorfish_remote/catches.sql",
-        params={"min_date": min_date, "max_date": max_date},
+        params={
+            "min_date": min_date,
+            "max_date": max_date,
+            # Not split : corrections are looked up on the whole month
+            "period_min_date": min_date,
+            "period_max_date": max_date,
+        },
+        split=(
+            RangeSplit(min_param="min_date", max_param="max_date", n_splits=n_splits)
+            if n_splits > 1
+            else None
+        ),
     )
 
 
 @task(checkpoint=False)
-def extract_bft_catches(month_start: date) -> pd.DataFrame:
+def extract_bft_catches(month_start: date, n_splits: int = 1) -> pd.DataFrame:
     min_date = month_start
     max_date = month_start + relativedelta(months=1)
 
     return extract(
         db_name="monitorfish_remote",
         query_filepath="monitorfish_remote/bft_catches.sql",
-        params={"min_date": min_date, "max_date": max_date},
+        params={
+            "min_date": min_date,
+            "max_date": max_date,
+            # Not split : corrections are looked up on the whole month
+            "period_min_date": min_date,
+            "period_max_date": max_date,
+        },
+        split=(
+            RangeSplit(min_param="min_date", max_param="max_date", n_splits=n_splits)
+            if n_splits > 1
+            else None
+        ),
     )
 
 
@@ -44,16 +70,19 @@ def extract_bft_catches(month_start: date) -> pd.DataFrame:
 def load_catches(catches: pd.DataFrame, month_start: date):
     logger = prefect.context.get("logger")
     partition = f"{month_start.year}{month_start.month:0>2}"
-    client = create_datawarehouse_client()
-    logger.info(f"Droppping catches partition '{partition}' data warehouse.")
-    client.command(
-        "ALTER TABLE monitorfish.catches DROP PARTITION {partition:String}",
-        parameters={"partition": partition},
-    )
     logger.info(
         f"Loading {len(catches)} catches of month {month_start} data warehouse."
     )
-    client.insert_df(table="catches", df=catches, database="monitorfish")
+    with staging_partition(
+        database="monitorfish", table="catches", partition=partition, logger=logger
+    ) as staging_table:
+        insert_df_in_blocks(
+            catches,
+            table_name=staging_table,
+            database="monitorfish",
+            logger=logger,
+            max_retries=2,
+        )
 
 
 @task(checkpoint=False)
@@ -73,6 +102,7 @@ with Flow("Catches") as flow:
     with case(flow_not_running, True):
         start_months_ago = Parameter("start_months_ago", default=2)
         end_months_ago = Parameter("end_months_ago", default=0)
+        n_splits = Parameter("n_splits", default=1)
 
         now = get_utcnow()
         months_starts = get_months_starts(
@@ -83,12 +113,19 @@ with Flow("Catches") as flow:
 
         create_database = create_database_if_not_exists("monitorfish")
         created_table = run_ddl_scripts(
-            "monitorfish/create_catches_if_not_exists.sql",
+            [
+                "monitorfish/create_catches_if_not_exists.sql",
+                "monitorfish/set_deduplication_window.sql",
+            ],
+            database="monitorfish",
+            table="catches",
             upstream_tasks=[create_database],
         )
 
-        catches = extract_catches.map(months_starts)
-        bft_catches = extract_bft_catches.map(months_starts)
+        catches = extract_catches.map(months_starts, n_splits=unmapped(n_splits))
+        bft_catches = extract_bft_catches.map(
+            months_starts, n_splits=unmapped(n_splits)
+        )
         all_catches = concat.map(catches, bft_catches, months_starts)
         load_catches.map(
             all_catches, months_starts, upstream_tasks=[unmapped(created_table)]
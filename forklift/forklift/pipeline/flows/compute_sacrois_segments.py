@@ -5,7 +5,7 @@ from typing import List
 import prefect
 from prefect import Flow, Parameter, case, task, unmapped
 
-from forklift.db_engines import create_datawarehouse_client
+from forklift.db_engines import datawarehouse_client_pool
 from forklift.pipeline.entities.generic import IdRange
 from forklift.pipeline.entities.sacrois import SacroisPartition
 from forklift.pipeline.helpers.generic import run_sql_script
@@ -28,37 +28,37 @@ def get_partition(processing_year: int, processing_month: int) -> SacroisPartiti
 @task(checkpoint=False)
 def drop_partition(partition: SacroisPartition):
     logger = prefect.context.get("logger")
-    client = create_datawarehouse_client()
     logger.info(
         (
             f"Dropping partition {partition.name} "
             "from table sacrois.segmented_fishing_activity"
         )
     )
-    client.command(
-        (
-            "ALTER TABLE sacrois.segmented_fishing_activity "
-            "DROP PARTITION {partition:String}"
-        ),
-        parameters={
-            "partition": partition.name,
-        },
-    )
+    with datawarehouse_client_pool.client() as client:
+        client.command(
+            (
+                "ALTER TABLE sacrois.segmented_fishing_activity "
+                "DROP PARTITION {partition:String}"
+            ),
+            parameters={
+                "partition": partition.name,
+            },
+        )
 
 
 @task(checkpoint=False)
 def get_trip_id_ranges(partition: SacroisPartition, batch_size: int) -> List[IdRange]:
     logger = prefect.context.get("logger")
-    client = create_datawarehouse_client()
-    trip_ids = client.query_df(
-        (
-            "SELECT DISTINCT TRIP_ID "
-            "FROM sacrois.fishing_activity "
-            "WHERE PROCESSING_DATE = {processing_date:Date}"
-            "ORDER BY 1"
-        ),
-        parameters={"processing_date": partition.processing_date},
-    )
+    with datawarehouse_client_pool.client() as client:
+        trip_ids = client.query_df(
+            (
+                "SELECT DISTINCT TRIP_ID "
+                "FROM sacrois.fishing_activity "
+                "WHERE PROCESSING_DATE = {processing_date:Date}"
+                "ORDER BY 1"
+            ),
+            parameters={"processing_date": partition.processing_date},
+        )
     trip_ids = trip_ids.TRIP_ID.tolist()
     trip_id_ranges = get_id_ranges(ids=trip_ids, batch_size=batch_size)
     logger.info(
@@ -1,47 +1,83 @@
 from datetime import date
 from pathlib import Path
+from typing import List, Optional
 
 import pandas as pd
 import prefect
 from dateutil.relativedelta import relativedelta
 from prefect import Flow, Parameter, case, task, unmapped
 
-from forklift.db_engines import create_datawarehouse_client
-from forklift.pipeline.helpers.generic import extract
+from forklift.pipeline.helpers.generic import (
+    delete_from_data_warehouse,
+    extract,
+    insert_df_in_blocks,
+    staging_partition,
+)
 from forklift.pipeline.shared_tasks.control_flow import check_flow_not_running
 from forklift.pipeline.shared_tasks.dates import get_months_starts, get_utcnow
 from forklift.pipeline.shared_tasks.generic import (
     create_database_if_not_exists,
     run_ddl_scripts,
 )
+from forklift.pipeline.shared_tasks.watermarks import (
+    get_logbook_report_ids_to_update,
+    get_new_logbook_watermark,
+    update_logbook_watermark,
+)
 
 
 @task(checkpoint=False)
-def extract_cox(month_start: date) -> pd.DataFrame:
+def extract_cox(
+    month_start: date, report_ids: Optional[List[str]] = None
+) -> pd.DataFrame:
     min_date = month_start
     max_date = month_start + relativedelta(months=1)
 
     discards = extract(
         db_name="monitorfish_remote",
         query_filepath="monitorfish_remote/cox.sql",
-        params={"min_date": min_date, "max_date": max_date},
+        params={"min_date": min_date, "max_date": max_date, "report_ids": report_ids},
     )
 
     return discards
 
 
 @task(checkpoint=False)
-def load_cox(cox: pd.DataFrame, month_start: date):
+def load_cox(
+    cox: pd.DataFrame, month_start: date, report_ids: Optional[List[str]] = None
+):
     logger = prefect.context.get("logger")
     partition = f"{month_start.year}{month_start.month:0>2}"
-    client = create_datawarehouse_client()
-    logger.info(f"Droppping cox partition '{partition}' data warehouse.")
-    client.command(
-        "ALTER TABLE monitorfish.cox DROP PARTITION {partition:String}",
-        parameters={"partition": partition},
-    )
-    logger.info(f"Loading {len(cox)} cox of month {month_start} data warehouse.")
-    client.insert_df(table="cox", df=cox, database="monitorfish")
+
+    if report_ids is None:
+        logger.info(f"Loading {len(cox)} cox of month {month_start} data warehouse.")
+    else:
+        logger.info(
+            f"Loading {len(cox)} cox of {len(report_ids)} updated reports of "
+            f"month {month_start}."
+        )
+
+    with staging_partition(
+        database="monitorfish",
+        table="cox",
+        partition=partition,
+        copy_partition=report_ids is not None,
+        logger=logger,
+    ) as staging_table:
+        if report_ids is not None:
+            delete_from_data_warehouse(
+                database="monitorfish",
+                table=staging_table,
+                column="report_id",
+                values=report_ids,
+            )
+        insert_df_in_blocks(
+            cox,
+            table_name=staging_table,
+            database="monitorfish",
+            logger=logger,
+            max_retries=2,
+        )
 
 
 with Flow("COX") as flow:
@@ -49,6 +85,8 @@ with Flow("COX") as flow:
     with case(flow_not_running, True):
         start_months_ago = Parameter("start_months_ago", default=2)
         end_months_ago = Parameter("end_months_ago", default=0)
+        incremental = Parameter("incremental", default=False)
+        lookback_hours = Parameter("lookback_hours", default=24)
 
         now = get_utcnow()
         months_starts = get_months_starts(
@@ -59,11 +97,34 @@ with Flow("COX") as flow:
 
         create_database = create_database_if_not_exists("monitorfish")
         created_table = run_ddl_scripts(
-            "monitorfish/create_cox_if_not_exists.sql",
+            [
+                "monitorfish/create_cox_if_not_exists.sql",
+                "monitorfish/set_deduplication_window.sql",
+                "monitorfish/create_watermarks_if_not_exists.sql",
+            ],
+            database="monitorfish",
+            table="cox",
             upstream_tasks=[create_database],
         )
 
-        cox = extract_cox.map(months_starts)
-        load_cox.map(cox, months_starts, upstream_tasks=[unmapped(created_table)])
+        new_watermarks = get_new_logbook_watermark.map(
+            months_starts, upstream_tasks=[unmapped(created_table)]
+        )
+        report_ids = get_logbook_report_ids_to_update.map(
+            months_starts,
+            flow_name=unmapped("cox"),
+            log_types=unmapped(["COX", "NOT-COX"]),
+            incremental=unmapped(incremental),
+            lookback_hours=unmapped(lookback_hours),
+            upstream_tasks=[new_watermarks],
+        )
+        cox = extract_cox.map(months_starts, report_ids=report_ids)
+        loaded_cox = load_cox.map(cox, months_starts, report_ids)
+        update_logbook_watermark.map(
+            new_watermarks,
+            months_starts,
+            flow_name=unmapped("cox"),
+            upstream_tasks=[loaded_cox],
+        )
 
 flow.file_name = Path(__file__).name
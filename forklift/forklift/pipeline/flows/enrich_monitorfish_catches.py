@@ -4,7 +4,7 @@ from typing import List
 import prefect
 from prefect import Flow, Parameter, case, task, unmapped
 
-from forklift.db_engines import create_datawarehouse_client
+from forklift.db_engines import datawarehouse_client_pool
 from forklift.pipeline.entities.generic import IdRange
 from forklift.pipeline.helpers.generic import run_sql_script
 from forklift.pipeline.helpers.processing import get_id_ranges
@@ -29,16 +29,16 @@ def compute_catches_positions(catch_year: int):
 @task(checkpoint=False)
 def extract_cfr_ranges(catch_year: int, batch_size: int) -> List[IdRange]:
     logger = prefect.context.get("logger")
-    client = create_datawarehouse_client()
-    cfrs = client.query_df(
-        (
-            "SELECT DISTINCT cfr "
-            "FROM monitorfish.catches "
-            "WHERE toYear(far_datetime_utc) = {catch_year:Integer} "
-            "ORDER BY 1"
-        ),
-        parameters={"catch_year": catch_year},
-    )
+    with datawarehouse_client_pool.client() as client:
+        cfrs = client.query_df(
+            (
+                "SELECT DISTINCT cfr "
+                "FROM monitorfish.catches "
+                "WHERE toYear(far_datetime_utc) = {catch_year:Integer} "
+                "ORDER BY 1"
+            ),
+            parameters={"catch_year": catch_year},
+        )
 
     if len(cfrs) == 0:
         return []
@@ -4,7 +4,7 @@ from pathlib import Path
 import prefect
 from prefect import Flow, Parameter, case, task
 
-from forklift.db_engines import create_datawarehouse_client
+from forklift.db_engines import datawarehouse_client_pool
 from forklift.pipeline.entities.sacrois import SacroisFileImportSpec, SacroisFileType
 from forklift.pipeline.shared_tasks.control_flow import check_flow_not_running
 from forklift.pipeline.shared_tasks.generic import (
@@ -62,29 +62,29 @@ def get_sacrois_file_import_spec(
 @task(checkpoint=False)
 def load_sacrois_data(import_spec: SacroisFileImportSpec):
     logger = prefect.context.get("logger")
-    client = create_datawarehouse_client()
     logger.info(
         f"Droppping sacrois partition '{import_spec.partition}' data warehouse."
     )
-    client.command(
-        "ALTER TABLE sacrois.{table:Identifier} DROP PARTITION {partition:String}",
-        parameters={
-            "table": import_spec.filetype.to_table_name(),
-            "partition": import_spec.partition,
-        },
-    )
-    logger.info(f"Importing {import_spec.filepath.name}")
-
-    client.command(
-        (
-            "INSERT INTO sacrois.{table:Identifier} "
-            "SELECT * FROM file({filepath:String}, Parquet);"
-        ),
-        parameters={
-            "table": import_spec.filetype.to_table_name(),
-            "filepath": import_spec.filepath.as_posix(),
-        },
-    )
+    with datawarehouse_client_pool.client() as client:
+        client.command(
+            "ALTER TABLE sacrois.{table:Identifier} DROP PARTITION {partition:String}",
+            parameters={
+                "table": import_spec.filetype.to_table_name(),
+                "partition": import_spec.partition,
+            },
+        )
+        logger.info(f"Importing {import_spec.filepath.name}")
+
+        client.command(
+            (
+                "INSERT INTO sacrois.{table:Identifier} "
+                "SELECT * FROM file({filepath:String}, Parquet);"
+            ),
+            parameters={
+                "table": import_spec.filetype.to_table_name(),
+                "filepath": import_spec.filepath.as_posix(),
+            },
+        )
 
 
 with Flow("Import SACROIS data") as flow:
@@ -1,47 +1,89 @@
 from datetime import date
 from pathlib import Path
+from typing import Iterator, List, Optional
 
 import pandas as pd
 import prefect
+import pyarrow as pa
 from dateutil.relativedelta import relativedelta
 from prefect import Flow, Parameter, case, task, unmapped
 
-from forklift.db_engines import create_datawarehouse_client
-from forklift.pipeline.helpers.generic import extract
+from forklift.pipeline.helpers.generic import (
+    delete_from_data_warehouse,
+    extract,
+    load_to_data_warehouse,
+    staging_partition,
+)
 from forklift.pipeline.shared_tasks.control_flow import check_flow_not_running
 from forklift.pipeline.shared_tasks.dates import get_months_starts, get_utcnow
 from forklift.pipeline.shared_tasks.generic import (
     create_database_if_not_exists,
     run_ddl_scripts,
 )
+from forklift.pipeline.shared_tasks.watermarks import (
+    get_logbook_report_ids_to_update,
+    get_new_logbook_watermark,
+    update_logbook_watermark,
+)
 
 
 @task(checkpoint=False)
-def extract_landings(month_start: date) -> pd.DataFrame:
+def extract_landings(
+    month_start: date,
+    chunksize: Optional[int] = None,
+    backend: str = "pandas",
+    report_ids: Optional[List[str]] = None,
+) -> pd.DataFrame | pa.Table | Iterator[pd.DataFrame | pa.Table]:
     min_date = month_start
     max_date = month_start + relativedelta(months=1)
 
     return extract(
         db_name="monitorfish_remote",
         query_filepath="monitorfish_remote/landings.sql",
-        params={"min_date": min_date, "max_date": max_date},
+        params={"min_date": min_date, "max_date": max_date, "report_ids": report_ids},
+        chunksize=chunksize,
+        backend=backend,
+        dtypes_from_table="monitorfish.landings",
     )
 
 
 @task(checkpoint=False)
-def load_landings(landings: pd.DataFrame, month_start: date):
+def load_landings(
+    landings: pd.DataFrame | pa.Table | Iterator[pd.DataFrame | pa.Table],
+    month_start: date,
+    report_ids: Optional[List[str]] = None,
+):
     logger = prefect.context.get("logger")
     partition = f"{month_start.year}{month_start.month:0>2}"
-    client = create_datawarehouse_client()
-    logger.info(f"Droppping landings partition '{partition}' data warehouse.")
-    client.command(
-        "ALTER TABLE monitorfish.landings DROP PARTITION {partition:String}",
-        parameters={"partition": partition},
-    )
-    logger.info(
-        f"Loading {len(landings)} landings of month {month_start} data warehouse."
-    )
-    client.insert_df(table="landings", df=landings, database="monitorfish")
+
+    if report_ids is None:
+        logger.info(f"Loading landings of month {month_start} data warehouse.")
+    else:
+        logger.info(
+            f"Loading landings of {len(report_ids)} updated reports of month "
+            f"{month_start}."
+        )
+
+    with staging_partition(
+        database="monitorfish",
+        table="landings",
+        partition=partition,
+        copy_partition=report_ids is not None,
+        logger=logger,
+    ) as staging_table:
+        if report_ids is not None:
+            delete_from_data_warehouse(
+                database="monitorfish",
+                table=staging_table,
+                column="report_id",
+                values=report_ids,
+            )
+        load_to_data_warehouse(
+            landings,
+            table_name=staging_table,
+            database="monitorfish",
+            logger=logger,
+        )
 
 
 with Flow("Landings") as flow:
@@ -49,6 +91,10 @@ with Flow("Landings") as flow:
     with case(flow_not_running, True):
         start_months_ago = Parameter("start_months_ago", default=2)
         end_months_ago = Parameter("end_months_ago", default=0)
+        chunksize = Parameter("chunksize", default=None)
+        backend = Parameter("backend", default="arrow")
+        incremental = Parameter("incremental", default=False)
+        lookback_hours = Parameter("lookback_hours", default=24)
 
         now = get_utcnow()
         months_starts = get_months_starts(
@@ -59,13 +105,36 @@ with Flow("Landings") as flow:
 
         create_database = create_database_if_not_exists("monitorfish")
         created_table = run_ddl_scripts(
-            "monitorfish/create_landings_if_not_exists.sql",
+            [
+                "monitorfish/create_landings_if_not_exists.sql",
+                "monitorfish/create_watermarks_if_not_exists.sql",
+            ],
             upstream_tasks=[create_database],
         )
 
-        landings = extract_landings.map(months_starts)
-        load_landings.map(
-            landings, months_starts, upstream_tasks=[unmapped(created_table)]
+        new_watermarks = get_new_logbook_watermark.map(
+            months_starts, upstream_tasks=[unmapped(created_table)]
+        )
+        report_ids = get_logbook_report_ids_to_update.map(
+            months_starts,
+            flow_name=unmapped("landings"),
+            log_types=unmapped(["LAN"]),
+            incremental=unmapped(incremental),
+            lookback_hours=unmapped(lookback_hours),
+            upstream_tasks=[new_watermarks],
+        )
+        landings = extract_landings.map(
+            months_starts,
+            chunksize=unmapped(chunksize),
+            backend=unmapped(backend),
+            report_ids=report_ids,
+        )
+        loaded_landings = load_landings.map(landings, months_starts, report_ids)
+        update_logbook_watermark.map(
+            new_watermarks,
+            months_starts,
+            flow_name=unmapped("landings"),
+            upstream_tasks=[loaded_landings],
         )
 
 flow.file_name = Path(__file__).name
@@ -12,7 +12,7 @@ from forklift.config import (
     MONITORFISH_MATOMO_SITE_ID,
     PROXIES,
 )
-from forklift.db_engines import create_datawarehouse_client
+from forklift.db_engines import datawarehouse_client_pool
 from forklift.pipeline.helpers.generic import load_to_data_warehouse
 from forklift.pipeline.shared_tasks.control_flow import check_flow_not_running
 from forklift.pipeline.shared_tasks.generic import (
@@ -98,12 +98,12 @@ def fetch_monthly_users(start_date: str, application: str) -> pd.DataFrame:
 @task(checkpoint=False)
 def load_monthly_users(monthly_users: pd.DataFrame, application: str):
     logger = prefect.context.get("logger")
-    client = create_datawarehouse_client()
     logger.info(f"Droppping monthly_users partition '{application}'.")
-    client.command(
-        "ALTER TABLE matomo.monthly_users DROP PARTITION {application:String}",
-        parameters={"application": application},
-    )
+    with datawarehouse_client_pool.client() as client:
+        client.command(
+            "ALTER TABLE matomo.monthly_users DROP PARTITION {application:String}",
+            parameters={"application": application},
+        )
     logger.info(
         f"Loading {len(monthly_users)} lines to monthly_users of application {application}."
     )
@@ -118,12 +118,12 @@ def load_monthly_users(monthly_users: pd.DataFrame, application: str):
 @task(checkpoint=False)
 def load_daily_unique_visitors(daily_unique_visitors: pd.DataFrame, application: str):
     logger = prefect.context.get("logger")
-    client = create_datawarehouse_client()
     logger.info(f"Droppping daily_unique_visitors partition '{application}'.")
-    client.command(
-        "ALTER TABLE matomo.daily_unique_visitors DROP PARTITION {application:String}",
-        parameters={"application": application},
-    )
+    with datawarehouse_client_pool.client() as client:
+        client.command(
+            "ALTER TABLE matomo.daily_unique_visitors DROP PARTITION {application:String}",
+            parameters={"application": application},
+        )
     logger.info(
         f"Loading {len(daily_unique_visitors)} lines to daily_unique_visitors of application {application}."
     )
@@ -6,8 +6,11 @@ import prefect
 from dateutil.relativedelta import relativedelta
 from prefect import Flow, Parameter, case, task, unmapped
 
-from forklift.db_engines import create_datawarehouse_client
-from forklift.pipeline.helpers.generic import extract, load_to_data_warehouse
+from forklift.pipeline.helpers.generic import (
+    extract,
+    load_to_data_warehouse,
+    staging_partition,
+)
 from forklift.pipeline.shared_tasks.control_flow import check_flow_not_running
 from forklift.pipeline.shared_tasks.dates import get_months_starts, get_utcnow
 from forklift.pipeline.shared_tasks.generic import (
@@ -58,20 +61,17 @@ def concat(
 def load_pnos(pnos: pd.DataFrame, month_start: date):
     logger = prefect.context.get("logger")
     partition = f"{month_start.year}{month_start.month:0>2}"
-    client = create_datawarehouse_client()
-    logger.info(f"Droppping pnos partition '{partition}' data warehouse.")
-    client.command(
-        "ALTER TABLE monitorfish.pnos DROP PARTITION {partition:String}",
-        parameters={"partition": partition},
-    )
     logger.info(f"Loading {len(pnos)} pnos of month {month_start} data warehouse.")
-    load_to_data_warehouse(
-        pnos,
-        table_name="pnos",
-        database="monitorfish",
-        logger=logger,
-        datetime_cols_to_clip=["predicted_arrival_datetime_utc", "trip_start_date"],
-    )
+    with staging_partition(
+        database="monitorfish", table="pnos", partition=partition, logger=logger
+    ) as staging_table:
+        load_to_data_warehouse(
+            pnos,
+            table_name=staging_table,
+            database="monitorfish",
+            logger=logger,
+            datetime_cols_to_clip=["predicted_arrival_datetime_utc", "trip_start_date"],
+        )
 
 
 with Flow("PNOs") as flow:
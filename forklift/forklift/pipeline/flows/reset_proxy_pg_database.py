@@ -3,7 +3,7 @@ from pathlib import Path
 
 from prefect import Flow, Parameter, case, task
 
-from forklift.db_engines import create_datawarehouse_client, db_env
+from forklift.db_engines import datawarehouse_client_pool, db_env
 from forklift.pipeline.shared_tasks.control_flow import check_flow_not_running
 
 
@@ -39,8 +39,6 @@ def reset_proxy_pg_database(database: str, schema: str, database_name_in_dw: str
         ValueError: if database credentials for the database are not found in the
           environment
     """
-    client = create_datawarehouse_client()
-
     try:
         host = os.environ[db_env[database]["host"]]
         port = os.environ[db_env[database]["port"]]
@@ -52,8 +50,6 @@ def reset_proxy_pg_database(database: str, schema: str, database_name_in_dw: str
             "Database connection credentials not found in environment: ", e.args
         )
 
-    client.command(f"DROP DATABASE IF EXISTS {database_name_in_dw}")
-
     sql = f"""
         CREATE DATABASE {database_name_in_dw}
         ENGINE = PostgreSQL(
@@ -65,7 +61,9 @@ def reset_proxy_pg_database(database: str, schema: str, database_name_in_dw: str
         )
     """
 
-    client.command(sql)
+    with datawarehouse_client_pool.client() as client:
+        client.command(f"DROP DATABASE IF EXISTS {database_name_in_dw}")
+        client.command(sql)
 
 
 with Flow("Reset proxy PostgreSQL database") as flow:
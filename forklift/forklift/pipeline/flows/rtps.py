@@ -1,51 +1,81 @@
 from datetime import date
 from pathlib import Path
+from typing import List, Optional
 
 import pandas as pd
 import prefect
 from dateutil.relativedelta import relativedelta
 from prefect import Flow, Parameter, case, task, unmapped
 
-from forklift.db_engines import create_datawarehouse_client
-from forklift.pipeline.helpers.generic import extract, load_to_data_warehouse
+from forklift.pipeline.helpers.generic import (
+    delete_from_data_warehouse,
+    extract,
+    load_to_data_warehouse,
+    staging_partition,
+)
 from forklift.pipeline.shared_tasks.control_flow import check_flow_not_running
 from forklift.pipeline.shared_tasks.dates import get_months_starts, get_utcnow
 from forklift.pipeline.shared_tasks.generic import (
     create_database_if_not_exists,
     run_ddl_scripts,
 )
+from forklift.pipeline.shared_tasks.watermarks import (
+    get_logbook_report_ids_to_update,
+    get_new_logbook_watermark,
+    update_logbook_watermark,
+)
 
 
 @task(checkpoint=False)
-def extract_rtps(month_start: date) -> pd.DataFrame:
+def extract_rtps(
+    month_start: date, report_ids: Optional[List[str]] = None
+) -> pd.DataFrame:
     min_date = month_start
     max_date = month_start + relativedelta(months=1)
 
     return extract(
         db_name="monitorfish_remote",
         query_filepath="monitorfish_remote/rtps.sql",
-        params={"min_date": min_date, "max_date": max_date},
+        params={"min_date": min_date, "max_date": max_date, "report_ids": report_ids},
     )
 
 
 @task(checkpoint=False)
-def load_rtps(rtps: pd.DataFrame, month_start: date):
+def load_rtps(
+    rtps: pd.DataFrame, month_start: date, report_ids: Optional[List[str]] = None
+):
     logger = prefect.context.get("logger")
     partition = f"{month_start.year}{month_start.month:0>2}"
-    client = create_datawarehouse_client()
-    logger.info(f"Droppping rtps partition '{partition}' data warehouse.")
-    client.command(
-        "ALTER TABLE monitorfish.rtps DROP PARTITION {partition:String}",
-        parameters={"partition": partition},
-    )
-    logger.info(f"Loading {len(rtps)} rtps of month {month_start} data warehouse.")
-    load_to_data_warehouse(
-        rtps,
-        table_name="rtps",
+
+    if report_ids is None:
+        logger.info(f"Loading {len(rtps)} rtps of month {month_start} data warehouse.")
+    else:
+        logger.info(
+            f"Loading {len(rtps)} rtps of {len(report_ids)} updated reports of "
+            f"month {month_start}."
+        )
+
+    with staging_partition(
         database="monitorfish",
+        table="rtps",
+        partition=partition,
+        copy_partition=report_ids is not None,
         logger=logger,
-        datetime_cols_to_clip=["return_datetime_utc"],
-    )
+    ) as staging_table:
+        if report_ids is not None:
+            delete_from_data_warehouse(
+                database="monitorfish",
+                table=staging_table,
+                column="report_id",
+                values=report_ids,
+            )
+        load_to_data_warehouse(
+            rtps,
+            table_name=staging_table,
+            database="monitorfish",
+            logger=logger,
+            datetime_cols_to_clip=["return_datetime_utc"],
+        )
 
 
 with Flow("RTPs") as flow:
@@ -53,6 +83,8 @@ with Flow("RTPs") as flow:
     with case(flow_not_running, True):
         start_months_ago = Parameter("start_months_ago", default=2)
         end_months_ago = Parameter("end_months_ago", default=0)
+        incremental = Parameter("incremental", default=False)
+        lookback_hours = Parameter("lookback_hours", default=24)
 
         now = get_utcnow()
         months_starts = get_months_starts(
@@ -63,12 +95,31 @@ with Flow("RTPs") as flow:
 
         create_database = create_database_if_not_exists("monitorfish")
         created_table = run_ddl_scripts(
-            "monitorfish/create_rtps_if_not_exists.sql",
+            [
+                "monitorfish/create_rtps_if_not_exists.sql",
+                "monitorfish/create_watermarks_if_not_exists.sql",
+            ],
             upstream_tasks=[create_database],
         )
 
-        rtps = extract_rtps.map(months_starts)
-
-        load_rtps.map(rtps, months_starts, upstream_tasks=[unmapped(created_table)])
+        new_watermarks = get_new_logbook_watermark.map(
+            months_starts, upstream_tasks=[unmapped(created_table)]
+        )
+        report_ids = get_logbook_report_ids_to_update.map(
+            months_starts,
+            flow_name=unmapped("rtps"),
+            log_types=unmapped(["RTP"]),
+            incremental=unmapped(incremental),
+            lookback_hours=unmapped(lookback_hours),
+            upstream_tasks=[new_watermarks],
+        )
+        rtps = extract_rtps.map(months_starts, report_ids=report_ids)
+        loaded_rtps = load_rtps.map(rtps, months_starts, report_ids)
+        update_logbook_watermark.map(
+            new_watermarks,
+            months_starts,
+            flow_name=unmapped("rtps"),
+            upstream_tasks=[loaded_rtps],
+        )
 
 flow.file_name = Path(__file__).name
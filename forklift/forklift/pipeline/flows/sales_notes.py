@@ -6,8 +6,11 @@ import prefect
 from dateutil.relativedelta import relativedelta
 from prefect import Flow, Parameter, case, task, unmapped
 
-from forklift.db_engines import create_datawarehouse_client
-from forklift.pipeline.helpers.generic import extract
+from forklift.pipeline.helpers.generic import (
+    extract,
+    insert_df_in_blocks,
+    staging_partition,
+)
 from forklift.pipeline.shared_tasks.control_flow import check_flow_not_running
 from forklift.pipeline.shared_tasks.dates import get_months_starts, get_utcnow
 from forklift.pipeline.shared_tasks.generic import (
@@ -32,16 +35,19 @@ def extract_sales_notes(month_start: date) -> pd.DataFrame:
 def load_sales_notes(sales_notes: pd.DataFrame, month_start: date):
     logger = prefect.context.get("logger")
     partition = f"{month_start.year}{month_start.month:0>2}"
-    client = create_datawarehouse_client()
-    logger.info(f"Dropping sales_notes partition '{partition}' from data warehouse.")
-    client.command(
-        "ALTER TABLE monitorfish.sales_notes DROP PARTITION {partition:String}",
-        parameters={"partition": partition},
-    )
     logger.info(
         f"Loading {len(sales_notes)} sales_notes of month {month_start} to data warehouse."
     )
-    client.insert_df(table="sales_notes", df=sales_notes, database="monitorfish")
+    with staging_partition(
+        database="monitorfish", table="sales_notes", partition=partition, logger=logger
+    ) as staging_table:
+        insert_df_in_blocks(
+            sales_notes,
+            table_name=staging_table,
+            database="monitorfish",
+            logger=logger,
+            max_retries=2,
+        )
 
 
 with Flow("SalesNotes") as flow:
@@ -59,7 +65,12 @@ with Flow("SalesNotes") as flow:
 
         create_database = create_database_if_not_exists("monitorfish")
         created_table = run_ddl_scripts(
-            "monitorfish/create_sales_notes_if_not_exists.sql",
+            [
+                "monitorfish/create_sales_notes_if_not_exists.sql",
+                "monitorfish/set_deduplication_window.sql",
+            ],
+            database="monitorfish",
+            table="sales_notes",
             upstream_tasks=[create_database],
         )
 
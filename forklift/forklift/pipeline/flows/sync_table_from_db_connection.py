@@ -5,7 +5,7 @@ import prefect
 from prefect import Flow, Parameter, case, task
 
 from forklift.config import QUERIES_LOCATION
-from forklift.db_engines import create_datawarehouse_client
+from forklift.db_engines import datawarehouse_client_pool
 from forklift.pipeline.helpers.generic import run_sql_script
 from forklift.pipeline.shared_tasks.control_flow import (
     check_flow_not_running,
@@ -29,10 +29,9 @@ def insert_data_from_source_to_destination(
     query_filepath: Optional[Path] = None,
 ):
     logger = prefect.context.get("logger")
-    client = create_datawarehouse_client()
-
     # Check for the existence of source and destination databases
-    databases = client.query_df("SHOW DATABASES")
+    with datawarehouse_client_pool.client() as client:
+        databases = client.query_df("SHOW DATABASES")
     try:
         assert source_database in set(databases.name)
     except AssertionError:
@@ -56,10 +55,11 @@ def insert_data_from_source_to_destination(
     if not create_table:
         # Check for the existence of destination tables. Source table cannot be check in
         # this way, because it can be a view, and `SHOW TABLES` does not include views.
-        destination_tables = client.query_df(
-            "SHOW TABLES FROM {destination_database:Identifier}",
-            parameters={"destination_database": destination_database},
-        )
+        with datawarehouse_client_pool.client() as client:
+            destination_tables = client.query_df(
+                "SHOW TABLES FROM {destination_database:Identifier}",
+                parameters={"destination_database": destination_database},
+            )
         try:
             assert destination_table in set(destination_tables.name)
         except AssertionError:
@@ -1,3 +1,4 @@
+from datetime import timedelta
 from pathlib import Path
 from typing import Optional
 
@@ -5,7 +6,17 @@ import pandas as pd
 import prefect
 from prefect import Flow, Parameter, case, task
 
-from forklift.pipeline.helpers.generic import extract, read_table
+from forklift.db_engines import datawarehouse_client_pool
+from forklift.pipeline.entities.generic import QueryCachePolicy
+from forklift.pipeline.helpers.generic import (
+    extract,
+    get_query_cache_freshness,
+    get_saved_query_cache_key,
+    mark_query_cache_entry_loaded,
+    query_cache_entry_is_fresh,
+    query_cache_entry_is_loaded,
+    read_table,
+)
 from forklift.pipeline.shared_tasks.control_flow import (
     check_flow_not_running,
     parameter_is_given,
@@ -14,11 +25,146 @@ from forklift.pipeline.shared_tasks.generic import (
     create_database_if_not_exists,
     drop_table_if_exists,
     load_df_to_data_warehouse,
+    replace_table_with_staging_table,
     run_data_flow_script,
     run_ddl_scripts,
 )
 
 
+def get_cache_key(
+    query_filepath: str, backend: str, geom_col: str, crs: Optional[int]
+) -> str:
+    # Must match the key computed by `read_saved_query` when called by `extract_df`
+    return get_saved_query_cache_key(
+        query_filepath,
+        params=None,
+        backend=backend,
+        geom_col=geom_col,
+        crs=crs,
+        parse_dates=None,
+    )
+
+
+def get_loaded_destination(
+    destination_database: str,
+    destination_table: str,
+    final_table: Optional[str],
+    geometry_format: str,
+) -> str:
+    # The cached query results do not depend on `geometry_format`, but the data
+    # loaded into the destination table does : results loaded with another
+    # `geometry_format` must be loaded again.
+    table = final_table or destination_table
+    return f"{destination_database}.{table} (geometry_format={geometry_format})"
+
+
+@task(checkpoint=False)
+def get_cache_policy(
+    cache_ttl_hours: Optional[float] = None,
+    freshness_query_filepath: Optional[str] = None,
+) -> Optional[QueryCachePolicy]:
+    if cache_ttl_hours is None:
+        return None
+
+    return QueryCachePolicy(
+        ttl=timedelta(hours=cache_ttl_hours),
+        freshness_query_filepath=freshness_query_filepath,
+    )
+
+
+@task(checkpoint=False)
+def check_destination_is_up_to_date(
+    source_database: str,
+    query_filepath: Optional[str],
+    backend: str,
+    geom_col: str,
+    crs: Optional[int],
+    cache_policy: Optional[QueryCachePolicy],
+    destination_database: str,
+    destination_table: str,
+    final_table: Optional[str],
+    geometry_format: str,
+) -> bool:
+    """
+    Returns `True` if the cached results of the query are fresh and were already
+    loaded into the destination table, which still exists in the data warehouse, in
+    which case neither extraction nor loading are needed. Results loaded with
+    another `geometry_format` are not considered loaded.
+    """
+    logger = prefect.context.get("logger")
+
+    if cache_policy is None or query_filepath is None:
+        return False
+
+    cache_key = get_cache_key(query_filepath, backend, geom_col, crs)
+    freshness = get_query_cache_freshness(db=source_database, cache_policy=cache_policy)
+    table = final_table or destination_table
+    loaded_destination = get_loaded_destination(
+        destination_database, destination_table, final_table, geometry_format
+    )
+
+    if not (
+        query_cache_entry_is_fresh(
+            cache_key, cache_policy=cache_policy, freshness=freshness
+        )
+        and query_cache_entry_is_loaded(cache_key, loaded_destination)
+    ):
+        return False
+
+    with datawarehouse_client_pool.client() as client:
+        table_exists = client.command(
+            "EXISTS TABLE {database:Identifier}.{table:Identifier}",
+            parameters={"database": destination_database, "table": table},
+        )
+
+    if int(table_exists) == 1:
+        logger.info(
+            f"{destination_database}.{table} is up to date with {query_filepath}, "
+            "skipping extraction and loading."
+        )
+        return True
+    else:
+        return False
+
+
+@task(checkpoint=False)
+def mark_cached_results_loaded(
+    query_filepath: Optional[str],
+    backend: str,
+    geom_col: str,
+    crs: Optional[int],
+    cache_policy: Optional[QueryCachePolicy],
+    destination_database: str,
+    destination_table: str,
+    final_table: Optional[str],
+    geometry_format: str,
+):
+    if cache_policy is None or query_filepath is None:
+        return
+
+    cache_key = get_cache_key(query_filepath, backend, geom_col, crs)
+    mark_query_cache_entry_loaded(
+        cache_key,
+        get_loaded_destination(
+            destination_database, destination_table, final_table, geometry_format
+        ),
+    )
+
+
+@task(checkpoint=False)
+def get_loading_table(destination_table: str, post_processing_needed: bool) -> str:
+    """
+    Returns the name of the table to load the data into. With post-processing, the
+    destination table is itself a temporary table. Otherwise, data is loaded into a
+    staging table which then replaces the destination table, so that the destination
+    table is left untouched if the extraction or the loading fail.
+    """
+    if post_processing_needed:
+        return destination_table
+    else:
+        return f"{destination_table}_staging"
+
+
 @task(checkpoint=False)
 def extract_df(
     source_database: str,
@@ -28,6 +174,7 @@ def extract_df(
     backend: str = "pandas",
     geom_col: str = "geom",
     crs: Optional[int] = None,
+    cache_policy: Optional[QueryCachePolicy] = None,
 ) -> pd.DataFrame:
     logger = prefect.context.get("logger")
 
@@ -50,6 +197,7 @@ def extract_df(
             backend=backend,
             geom_col=geom_col,
             crs=crs,
+            cache_policy=cache_policy,
         )
 
     else:
@@ -92,53 +240,108 @@ with Flow("Sync table with pandas") as flow:
             "post_processing_script_path", default=None
         )
         final_table = Parameter("final_table", default=None)
+        cache_ttl_hours = Parameter("cache_ttl_hours", default=None)
+        freshness_query_filepath = Parameter("freshness_query_filepath", default=None)
+        geometry_format = Parameter("geometry_format", default="wkt")
 
-        df = extract_df(
+        cache_policy = get_cache_policy(cache_ttl_hours, freshness_query_filepath)
+        destination_is_up_to_date = check_destination_is_up_to_date(
             source_database=source_database,
             query_filepath=query_filepath,
-            schema=schema,
-            table_name=table_name,
             backend=backend,
             geom_col=geom_col,
             crs=crs,
-        )
-
-        create_database = create_database_if_not_exists(destination_database)
-
-        drop_table = drop_table_if_exists(
-            destination_database,
-            destination_table,
-            upstream_tasks=[create_database],
-        )
-        created_table = run_ddl_scripts(
-            ddl_script_path,
-            database=destination_database,
-            table=destination_table,
-            upstream_tasks=[drop_table],
-        )
-        loaded_df = load_df_to_data_warehouse(
-            df,
+            cache_policy=cache_policy,
             destination_database=destination_database,
             destination_table=destination_table,
-            upstream_tasks=[created_table],
+            final_table=final_table,
+            geometry_format=geometry_format,
         )
 
-        post_processing_needed = parameter_is_given(post_processing_script_path, str)
+        with case(destination_is_up_to_date, False):
+            df = extract_df(
+                source_database=source_database,
+                query_filepath=query_filepath,
+                schema=schema,
+                table_name=table_name,
+                backend=backend,
+                geom_col=geom_col,
+                crs=crs,
+                cache_policy=cache_policy,
+            )
 
-        with case(post_processing_needed, True):
-            drop_final_table = drop_table_if_exists(
-                database=destination_database,
-                table=final_table,
-                upstream_tasks=[loaded_df],
+            create_database = create_database_if_not_exists(destination_database)
+
+            post_processing_needed = parameter_is_given(
+                post_processing_script_path, str
             )
-            post_processing = run_data_flow_script(
-                post_processing_script_path, upstream_tasks=[drop_final_table]
+            loading_table = get_loading_table(destination_table, post_processing_needed)
+
+            drop_table = drop_table_if_exists(
+                destination_database,
+                loading_table,
+                upstream_tasks=[create_database],
             )
-            final_drop_table = drop_table_if_exists(
+            created_table = run_ddl_scripts(
+                ddl_script_path,
                 database=destination_database,
-                table=destination_table,
-                upstream_tasks=[post_processing],
+                table=loading_table,
+                upstream_tasks=[drop_table],
             )
+            loaded_df = load_df_to_data_warehouse(
+                df,
+                destination_database=destination_database,
+                destination_table=loading_table,
+                geometry_format=geometry_format,
+                upstream_tasks=[created_table],
+            )
+
+            with case(post_processing_needed, True):
+                drop_final_table = drop_table_if_exists(
+                    database=destination_database,
+                    table=final_table,
+                    upstream_tasks=[loaded_df],
+                )
+                post_processing = run_data_flow_script(
+                    post_processing_script_path, upstream_tasks=[drop_final_table]
+                )
+                final_drop_table = drop_table_if_exists(
+                    database=destination_database,
+                    table=destination_table,
+                    upstream_tasks=[post_processing],
+                )
+                mark_cached_results_loaded(
+                    query_filepath=query_filepath,
+                    backend=backend,
+                    geom_col=geom_col,
+                    crs=crs,
+                    cache_policy=cache_policy,
+                    destination_database=destination_database,
+                    destination_table=destination_table,
+                    final_table=final_table,
+                    geometry_format=geometry_format,
+                    upstream_tasks=[final_drop_table],
+                )
+
+            with case(post_processing_needed, False):
+                replaced_table = replace_table_with_staging_table(
+                    database=destination_database,
+                    table=destination_table,
+                    staging_table=loading_table,
+                    upstream_tasks=[loaded_df],
+                )
+                mark_cached_results_loaded(
+                    query_filepath=query_filepath,
+                    backend=backend,
+                    geom_col=geom_col,
+                    crs=crs,
+                    cache_policy=cache_policy,
+                    destination_database=destination_database,
+                    destination_table=destination_table,
+                    final_table=final_table,
+                    geometry_format=geometry_format,
+                    upstream_tasks=[replaced_table],
+                )
 
-flow.set_reference_tasks([loaded_df, final_drop_table])
+flow.set_reference_tasks([loaded_df, replaced_table, final_drop_table])
 flow.file_name = Path(__file__).name
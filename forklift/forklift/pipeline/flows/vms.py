@@ -6,8 +6,7 @@ import prefect
 from dateutil.relativedelta import relativedelta
 from prefect import Flow, Parameter, case, task, unmapped
 
-from forklift.db_engines import create_datawarehouse_client
-from forklift.pipeline.helpers.generic import run_sql_script
+from forklift.pipeline.helpers.generic import run_sql_script, staging_partition
 from forklift.pipeline.shared_tasks.control_flow import check_flow_not_running
 from forklift.pipeline.shared_tasks.dates import get_months_starts, get_utcnow
 from forklift.pipeline.shared_tasks.generic import (
@@ -23,28 +22,32 @@ def extract_load_vms(month_start: date) -> pd.DataFrame:
     max_date = month_start + relativedelta(months=1)
 
     partition = f"{month_start.year}{month_start.month:0>2}"
-    client = create_datawarehouse_client()
-    logger.info(f"Droppping vms partition '{partition}' from vms table.")
-    client.command(
-        "ALTER TABLE monitorfish.vms DROP PARTITION {partition:String}",
-        parameters={"partition": partition},
-    )
-    logger.info(f"Droppping vms partition '{partition}' from vms_h3 table.")
-    client.command(
-        "ALTER TABLE monitorfish.vms_h3 DROP PARTITION {partition:String}",
-        parameters={"partition": partition},
-    )
 
     logger.info(f"Loading vms positions of month {month_start} into vms table.")
-    run_sql_script(
-        sql_script_filepath=Path("data_flows/monitorfish/vms.sql"),
-        parameters={"min_date": min_date, "max_date": max_date},
-    )
+    with staging_partition(
+        database="monitorfish", table="vms", partition=partition, logger=logger
+    ) as staging_table:
+        run_sql_script(
+            sql_script_filepath=Path("data_flows/monitorfish/vms.sql"),
+            parameters={
+                "min_date": min_date,
+                "max_date": max_date,
+                "table": staging_table,
+            },
+        )
+
     logger.info(f"Loading vms positions of month {month_start} into vms_h3 table.")
-    run_sql_script(
-        sql_script_filepath=Path("data_flows/monitorfish/vms_h3.sql"),
-        parameters={"min_date": min_date, "max_date": max_date},
-    )
+    with staging_partition(
+        database="monitorfish", table="vms_h3", partition=partition, logger=logger
+    ) as staging_table:
+        run_sql_script(
+            sql_script_filepath=Path("data_flows/monitorfish/vms_h3.sql"),
+            parameters={
+                "min_date": min_date,
+                "max_date": max_date,
+                "table": staging_table,
+            },
+        )
 
 
 with Flow("VMS") as flow:
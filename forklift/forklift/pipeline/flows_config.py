@@ -11,7 +11,9 @@ from forklift.config import (
     FLOWS_LOCATION,
     FORKLIFT_DOCKER_IMAGE,
     FORKLIFT_VERSION,
+    HOST_QUERY_CACHE_LOCATION,
     LIBRARY_LOCATION,
+    QUERY_CACHE_LOCATION,
     ROOT_DIRECTORY,
 )
 from forklift.pipeline.flows import (
@@ -79,15 +81,47 @@ def get_flows_to_register():
     activities_flow.schedule = CronSchedule("26 4 * * *")
     catches_flow.schedule = CronSchedule("44 4 * * *")
     clean_flow_runs_flow.schedule = CronSchedule("8,18,28,38,48,58 * * * *")
-    coe_flow.schedule = CronSchedule("16 4 * * *")
-    cox_flow.schedule = CronSchedule("12 4 * * *")
-    cps_flow.schedule = CronSchedule("41 4 * * *")
-    deps_flow.schedule = CronSchedule("52 4 * * *")
+    coe_flow.schedule = Schedule(
+        clocks=[
+            clocks.CronClock("16 4 * * 1-6", parameter_defaults={"incremental": True}),
+            clocks.CronClock("16 4 * * 0", parameter_defaults={"incremental": False}),
+        ]
+    )
+    cox_flow.schedule = Schedule(
+        clocks=[
+            clocks.CronClock("12 4 * * 1-6", parameter_defaults={"incremental": True}),
+            clocks.CronClock("12 4 * * 0", parameter_defaults={"incremental": False}),
+        ]
+    )
+    cps_flow.schedule = Schedule(
+        clocks=[
+            clocks.CronClock("41 4 * * 1-6", parameter_defaults={"incremental": True}),
+            clocks.CronClock("41 4 * * 0", parameter_defaults={"incremental": False}),
+        ]
+    )
+    deps_flow.schedule = Schedule(
+        clocks=[
+            clocks.CronClock("52 4 * * 1-6", parameter_defaults={"incremental": True}),
+            clocks.CronClock("52 4 * * 0", parameter_defaults={"incremental": False}),
+        ]
+    )
     discards_flow.schedule = CronSchedule("35 4 * * *")
     enrich_monitorfish_catches_flow.schedule = CronSchedule("14 5 * * *")
-    eofs_flow.schedule = CronSchedule("7 4 * * *")
+    eofs_flow.schedule = Schedule(
+        clocks=[
+            clocks.CronClock("7 4 * * 1-6", parameter_defaults={"incremental": True}),
+            clocks.CronClock("7 4 * * 0", parameter_defaults={"incremental": False}),
+        ]
+    )
     extract_rapportnav_analytics_flow.schedule = CronSchedule("56 4 * * *")
-    landings_flow.schedule = CronSchedule("54 4 * * *")
+    landings_flow.schedule = Schedule(
+        clocks=[
+            # Only update new and modified reports from Monday to Saturday...
+            clocks.CronClock("54 4 * * 1-6", parameter_defaults={"incremental": True}),
+            # ...and reload the last months entirely once a week
+            clocks.CronClock("54 4 * * 0", parameter_defaults={"incremental": False}),
+        ]
+    )
     matomo_stats_flow.schedule = CronSchedule("50 4 1 * *")
     pnos_flow.schedule = CronSchedule("55 4 * * *")
     reset_dictionary_flow.schedule = Schedule(
@@ -126,7 +160,12 @@ def get_flows_to_register():
             ),
         ]
     )
-    rtps_flow.schedule = CronSchedule("58 4 * * *")
+    rtps_flow.schedule = Schedule(
+        clocks=[
+            clocks.CronClock("58 4 * * 1-6", parameter_defaults={"incremental": True}),
+            clocks.CronClock("58 4 * * 0", parameter_defaults={"incremental": False}),
+        ]
+    )
     sales_notes_flow.schedule = CronSchedule("46 4 * * *")
     sync_geo_table_to_h3_table_flow.schedule = Schedule(
         clocks=[
@@ -250,6 +289,17 @@ def get_flows_to_register():
     for flow in flows_to_register:
         host_config = None
 
+        if flow.name == sync_table_with_pandas_flow.name and HOST_QUERY_CACHE_LOCATION:
+            # Persist the query results cache across flow runs
+            host_config = {
+                "binds": {
+                    HOST_QUERY_CACHE_LOCATION: {
+                        "bind": QUERY_CACHE_LOCATION.as_posix(),
+                        "mode": "rw",
+                    }
+                }
+            }
+
         flow.run_config = DockerRun(
             image=f"{FORKLIFT_DOCKER_IMAGE}:{FORKLIFT_VERSION}",
             host_config=host_config,
@@ -1,18 +1,43 @@
+import hashlib
+import json
 import logging
-from datetime import datetime
+import os
+import re
+import tempfile
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import psycopg2
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
+import shapely
+from clickhouse_connect.driver.exceptions import OperationalError
 from clickhouse_connect.driver.httpclient import HttpClient
-from sqlalchemy import DDL, text
+from sqlalchemy import DDL, Table, TextClause, text
 from sqlalchemy.engine import Connection, Engine
 
-from forklift.config import QUERIES_LOCATION, SQL_SCRIPTS_LOCATION
-from forklift.db_engines import create_datawarehouse_client, create_engine
+from forklift.config import (
+    QUERIES_LOCATION,
+    QUERY_CACHE_LOCATION,
+    SQL_SCRIPTS_LOCATION,
+)
+from forklift.db_engines import create_engine, datawarehouse_client_pool
 from forklift.pipeline import utils
-from forklift.pipeline.helpers.processing import prepare_df_for_loading
+from forklift.pipeline.entities.generic import QueryCachePolicy, RangeSplit, Watermark
+from forklift.pipeline.helpers.processing import (
+    clickhouse_type_to_arrow_type,
+    get_sub_ranges,
+    prepare_df_for_loading,
+)
 from forklift.pipeline.utils import get_table, psql_insert_copy
 
 
@@ -25,7 +50,16 @@ def extract(
     backend: str = "pandas",
     geom_col: str = "geom",
     crs: Optional[int] = None,
-) -> pd.DataFrame | gpd.GeoDataFrame:
+    chunksize: Optional[int] = None,
+    split: Optional[RangeSplit] = None,
+    cache_policy: Optional[QueryCachePolicy] = None,
+    dtypes_from_table: Optional[str] = None,
+) -> (
+    pd.DataFrame
+    | gpd.GeoDataFrame
+    | pa.Table
+    | Iterator[pd.DataFrame | gpd.GeoDataFrame | pa.Table]
+):
     """Run SQL query against the indicated database and return the result as a
     `pandas.DataFrame`.
 
@@ -52,8 +86,9 @@ def extract(
         params (Optional[dict], optional): Parameters to pass to execute method.
           Defaults to None. Ignored for `data_warehouse` database.
         backend (str, optional) : 'pandas' to run a SQL query and return a
-          `pandas.DataFrame` or 'geopandas' to run a PostGIS query and return a
-          `geopandas.GeoDataFrame`. Defaults to 'pandas'. Ignored for `data_warehouse`
+          `pandas.DataFrame`, 'geopandas' to run a PostGIS query and return a
+          `geopandas.GeoDataFrame` or 'arrow' to run a SQL query and return a
+          `pyarrow.Table`. Defaults to 'pandas'. Ignored for `data_warehouse`
           database.
         geom_col (str, optional): column name to convert to shapely geometries when
           `backend` is 'geopandas'. Ignored when `backend` is 'pandas'. Defaults to
@@ -63,56 +98,828 @@ def extract(
           geometry in the database, and assigns that to all geometries. Ignored when
           `backend` is 'pandas'. Defaults to None. Ignored for `data_warehouse`
           database.
+        chunksize (Optional[int], optional): If specified, results are streamed from
+          the database with a server-side cursor and an iterator of DataFrames of
+          `chunksize` rows is returned instead of a single DataFrame, so that memory
+          usage stays bounded by the chunk size. `dtypes` are applied to each chunk.
+          Defaults to None. Ignored for `data_warehouse` database.
+        split (Optional[RangeSplit], optional): If specified, the range between the
+          values of the `split.min_param` and `split.max_param` entries of `params`
+          is split into `split.n_splits` sub-ranges, the query is run concurrently on
+          each sub-range and the results are concatenated. Only these two
+          parameters change between sub-ranges : filters which must apply to the
+          whole range, such as the lookup of corrections of the extracted messages,
+          must use other parameters so that the results do not depend on the split.
+          Cannot be used with `chunksize`. Defaults to None.
+        cache_policy (Optional[QueryCachePolicy], optional): If specified, query
+          results are cached on disk and reused as long as they are fresh according
+          to the policy, see `read_saved_query`. Defaults to None.
+        dtypes_from_table (Optional[str], optional): If specified, name of a data
+          warehouse table in the form `database.table`, typically the table into
+          which the results are to be loaded. Query results are then read as
+          `pyarrow.Table`, whatever the `backend`, and the columns which are also
+          columns of that table are cast to the Arrow types matching their
+          Clickhouse types (see `get_table_arrow_types`) as they are read. With the
+          'pandas' backend, the results are then converted to DataFrames in which
+          dictionary columns become `category` columns and integer and boolean
+          columns become pandas nullable columns, so that null values are kept ;
+          `parse_dates` is ignored and `dtypes`, if given, are applied last.
+          Ignored if the table does not exist. Cannot be used with the
+          'geopandas' backend. Defaults to None.
 
     Returns:
-        pd.DataFrame | gpd.GeoDataFrame: Query results
+        pd.DataFrame | gpd.GeoDataFrame | pa.Table | Iterator: Query results, or an
+        iterator of chunks of query results if `chunksize` is given.
     """
 
-    res = read_saved_query(
-        query_filepath,
-        db=db_name,
-        parse_dates=parse_dates,
-        params=params,
-        backend=backend,
-        geom_col=geom_col,
-        crs=crs,
-    )
+    if dtypes and backend == "arrow":
+        raise ValueError("`dtypes` cannot be used with the 'arrow' backend.")
+
+    if dtypes_from_table:
+        if backend == "geopandas":
+            raise ValueError(
+                "`dtypes_from_table` cannot be used with the 'geopandas' backend."
+            )
+        database, table = dtypes_from_table.split(".")
+        table_types = get_table_arrow_types(database=database, table=table)
+    else:
+        table_types = None
+
+    if table_types:
+        read_backend = "arrow"
+
+        def convert(res: pa.Table) -> pd.DataFrame | pa.Table:
+            res = cast_arrow_columns(res, table_types)
+            if backend == "pandas":
+                res = arrow_table_to_pandas(res)
+                if dtypes:
+                    res = res.astype(dtypes)
+            return res
+
+    elif dtypes:
+        read_backend = backend
+
+        def convert(res: pd.DataFrame) -> pd.DataFrame:
+            return res.astype(dtypes)
+
+    else:
+        read_backend = backend
+        convert = None
+
+    if split:
+        if chunksize:
+            raise ValueError("`split` cannot be used with a `chunksize`.")
+
+        def read_sub_range(sub_range_params: dict):
+            return read_saved_query(
+                query_filepath,
+                db=db_name,
+                parse_dates=parse_dates,
+                params=sub_range_params,
+                backend=read_backend,
+                geom_col=geom_col,
+                crs=crs,
+                cache_policy=cache_policy,
+            )
+
+        res = concat_query_results(
+            run_on_sub_ranges(read_sub_range, params=params, split=split)
+        )
+
+    else:
+        res = read_saved_query(
+            query_filepath,
+            db=db_name,
+            parse_dates=parse_dates,
+            params=params,
+            backend=read_backend,
+            geom_col=geom_col,
+            crs=crs,
+            chunksize=chunksize,
+            cache_policy=cache_policy,
+        )
 
-    if dtypes:
-        res = res.astype(dtypes)
+    if convert:
+        if isinstance(res, (pd.DataFrame, pa.Table)):
+            res = convert(res)
+        else:
+            res = (convert(chunk) for chunk in res)
 
     return res
 
 
+def get_table_arrow_types(*, database: str, table: str) -> dict:
+    """
+    Returns the Arrow types matching the Clickhouse types of the columns of a data
+    warehouse table, read from `system.columns` (see
+    `clickhouse_type_to_arrow_type`). Columns whose types have no specific Arrow
+    type (strings, dates, arrays...) are not included. If the table does not exist,
+    the mapping is empty.
+
+    Args:
+        database (str): database name in the data warehouse
+        table (str): table name
+
+    Returns:
+        dict: mapping of column names to Arrow types
+    """
+    with datawarehouse_client_pool.client() as client:
+        columns = client.query(
+            (
+                "SELECT name, type FROM system.columns "
+                "WHERE database = {database:String} AND table = {table:String} "
+                "ORDER BY position"
+            ),
+            parameters={"database": database, "table": table},
+        ).result_rows
+
+    if len(columns) == 0:
+        logging.warning(
+            f"Table {database}.{table} not found in data warehouse, no types applied."
+        )
+
+    types = {name: clickhouse_type_to_arrow_type(ch_type) for name, ch_type in columns}
+    return {name: t for name, t in types.items() if t is not None}
+
+
+def cast_arrow_columns(table: pa.Table, types: dict) -> pa.Table:
+    """Casts the columns of a `pyarrow.Table` which are keys of `types` to the
+    corresponding Arrow types. Other columns are left untouched."""
+    for i, field in enumerate(table.schema):
+        if field.name in types and field.type != types[field.name]:
+            table = table.set_column(
+                i, field.name, table.column(i).cast(types[field.name])
+            )
+    return table
+
+
+def arrow_table_to_pandas(table: pa.Table) -> pd.DataFrame:
+    """Converts a `pyarrow.Table` to a DataFrame, with pandas nullable dtypes for
+    integer and boolean columns (see `ARROW_PANDAS_NULLABLE_DTYPES`) and
+    nanosecond-precision datetimes, like those of `pd.read_sql`."""
+    return table.to_pandas(
+        types_mapper=ARROW_PANDAS_NULLABLE_DTYPES.get,
+        coerce_temporal_nanoseconds=True,
+    )
+
+
+def run_on_sub_ranges(
+    func: Callable[[dict], Any], *, params: dict, split: RangeSplit
+) -> List[Any]:
+    """
+    Splits the range between `params[split.min_param]` and `params[split.max_param]`
+    into `split.n_splits` sub-ranges (see `get_sub_ranges`), and calls `func` with a
+    copy of `params` for each sub-range on a pool of at most `split.max_workers`
+    threads.
+
+    Args:
+        func (Callable[[dict], Any]): function to call with the parameters of each
+          sub-range
+        params (dict): parameters, including the `split.min_param` and
+          `split.max_param` entries
+        split (RangeSplit): split specification
+
+    Returns:
+        List[Any]: the results of `func`, in the order of the sub-ranges
+    """
+    sub_ranges = get_sub_ranges(
+        params[split.min_param], params[split.max_param], split.n_splits
+    )
+    sub_ranges_params = [
+        {**params, split.min_param: lower, split.max_param: upper}
+        for lower, upper in sub_ranges
+    ]
+
+    with ThreadPoolExecutor(max_workers=split.max_workers) as executor:
+        return list(executor.map(func, sub_ranges_params))
+
+
+def concat_query_results(
+    results: List[pd.DataFrame | gpd.GeoDataFrame | pa.Table],
+) -> pd.DataFrame | gpd.GeoDataFrame | pa.Table:
+    """Concatenates query results of the same type into one result."""
+    if len(results) == 0:
+        raise ValueError("No query results to concatenate.")
+    elif isinstance(results[0], pa.Table):
+        return pa.concat_tables(results, promote_options="permissive")
+    else:
+        return pd.concat(results, ignore_index=True)
+
+
 def load_to_data_warehouse(
-    df: pd.DataFrame | gpd.GeoDataFrame,
+    df: (
+        pd.DataFrame
+        | gpd.GeoDataFrame
+        | pa.Table
+        | Iterable[pd.DataFrame | gpd.GeoDataFrame | pa.Table]
+    ),
     *,
     table_name: str,
     database: str,
     logger: logging.Logger,
     datetime_cols_to_clip: List = None,
+    geometry_format: str = "wkt",
 ):
-    df = df.copy(deep=True)
-    if isinstance(df, gpd.GeoDataFrame):
+    """
+    Load a DataFrame, GeoDataFrame or `pyarrow.Table` into a data_warehouse table. The
+    table must already exist in the data warehouse. `pyarrow.Table` are inserted
+    using Clickhouse's Arrow format, without conversion to pandas : tables returned
+    by `extract` with the 'arrow' backend and a `dtypes_from_table` already have the
+    Arrow types of the destination table and are loaded as they are. DataFrames with
+    `category` columns are converted to `pyarrow.Table` and loaded in the same way.
+
+    If an iterable of DataFrames is given instead of a single DataFrame (typically
+    the output of `extract` with a `chunksize`), each chunk is inserted as soon as it
+    is yielded, so that the whole dataset never needs to be held in memory.
+
+    Args:
+        df (pd.DataFrame | gpd.GeoDataFrame | pa.Table | Iterable): data to load, or
+          iterable of chunks of data to load
+        table_name (str): name of the table
+        database (str): name of the database of the table
+        logger (logging.Logger): logger instance
+        datetime_cols_to_clip (List, optional): datetime columns whose values must be
+          clipped to the range supported by Clickhouse's `DateTime` type. Defaults to
+          None.
+        geometry_format (str, optional): how to load the geometry columns of
+          GeoDataFrames : 'wkt' to load them as text, into `String` columns, or
+          'native' to convert them to Clickhouse's `Point` or `MultiPolygon` geo
+          types (see `geodataframe_to_arrow`) and load them directly into columns of
+          these types. Defaults to 'wkt'.
+    """
+    try:
+        assert geometry_format in ("wkt", "native")
+    except AssertionError:
+        raise ValueError(
+            f"geometry_format must be 'wkt' or 'native', got {geometry_format}."
+        )
+
+    is_single_chunk = isinstance(df, (pd.DataFrame, pa.Table))
+    if is_single_chunk:
+        chunks = [df]
+    else:
+        chunks = df
+
+    n_loaded_rows = 0
+
+    for chunk in chunks:
+        if isinstance(chunk, gpd.GeoDataFrame) and geometry_format == "native":
+            logger.info(
+                "GeoDataFrame detected. Converting geometry to Clickhouse geo types."
+            )
+            chunk = geodataframe_to_arrow(chunk)
+
+        elif not isinstance(chunk, (gpd.GeoDataFrame, pa.Table)) and any(
+            isinstance(dtype, pd.CategoricalDtype) for dtype in chunk.dtypes
+        ):
+            # `insert_df` does not handle missing values in categorical columns,
+            # which Arrow's dictionary arrays load directly into `LowCardinality`
+            # columns.
+            chunk = pa.Table.from_pandas(chunk, preserve_index=False)
+
+        if isinstance(chunk, pa.Table):
+            with datawarehouse_client_pool.client() as client:
+                load_arrow_table_to_data_warehouse(
+                    chunk,
+                    client=client,
+                    table_name=table_name,
+                    database=database,
+                    logger=logger,
+                    datetime_cols_to_clip=datetime_cols_to_clip,
+                )
+            n_loaded_rows += chunk.num_rows
+            continue
+
+        if isinstance(chunk, gpd.GeoDataFrame):
+            logger.info(
+                "GeoDataFrame detected. Converting geometry to text representation."
+            )
+
+        logger.info(
+            f"Loading {len(chunk)} rows into data warehouse {database}.{table_name} "
+            "table."
+        )
+        n_copy_bytes = chunk.memory_usage().sum()
+        chunk, n_allocated_bytes = prepare_df_for_data_warehouse(
+            chunk, datetime_cols_to_clip=datetime_cols_to_clip
+        )
+        logger.info(
+            f"Allocated {n_allocated_bytes} bytes for transformed columns (a full "
+            f"copy would have allocated {n_copy_bytes} bytes)."
+        )
+
+        insert_df_in_blocks(chunk, table_name=table_name, database=database)
+        n_loaded_rows += len(chunk)
+
+    if not is_single_chunk:
+        logger.info(
+            f"Loaded {n_loaded_rows} rows in total into {database}.{table_name} table."
+        )
+
+
+def prepare_df_for_data_warehouse(
+    df: pd.DataFrame | gpd.GeoDataFrame, datetime_cols_to_clip: List = None
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Prepares a DataFrame or GeoDataFrame for insertion with `insert_df`, converting
+    geometry columns to WKT and clipping datetime columns to the range supported by
+    Clickhouse's `DateTime` type.
+
+    The input is not modified and not copied : with copy-on-write, the returned
+    DataFrame shares the memory of all the columns of the input except those that
+    actually needed to be transformed. Datetime columns whose values are all in
+    range are left untouched.
+
+    Args:
+        df (pd.DataFrame | gpd.GeoDataFrame): data to prepare
+        datetime_cols_to_clip (List, optional): datetime columns whose values must be
+          clipped. Defaults to None.
+
+    Returns:
+        Tuple[pd.DataFrame, int]: the prepared DataFrame and the number of bytes
+          allocated for the columns that were transformed
+    """
+    min_datetime = datetime(1970, 1, 1, 0, 0, 0)
+    max_datetime = datetime(2106, 2, 7, 6, 28, 15)
+    n_allocated_bytes = 0
+
+    with pd.option_context("mode.copy_on_write", True):
+        res = pd.DataFrame(df, copy=False)
+
+        if isinstance(df, gpd.GeoDataFrame):
+            geometry_cols = [
+                col
+                for col, dtype in df.dtypes.items()
+                if isinstance(dtype, gpd.array.GeometryDtype)
+            ]
+            for col in geometry_cols:
+                res[col] = gpd.GeoSeries(df[col]).to_wkt()
+                n_allocated_bytes += res[col].memory_usage(index=False, deep=True)
+
+        for col in datetime_cols_to_clip or []:
+            values = res[col]
+            if ((values < min_datetime) | (values > max_datetime)).any():
+                res[col] = pd.to_datetime(values.clip(min_datetime, max_datetime))
+                n_allocated_bytes += res[col].memory_usage(index=False)
+
+    return res, n_allocated_bytes
+
+
+def get_insert_deduplication_window(*, database: str, table: str) -> int:
+    """
+    Returns the number of most recently inserted blocks that Clickhouse remembers in
+    order to deduplicate inserts into a table: the table's
+    `replicated_deduplication_window` for replicated tables, and its
+    `non_replicated_deduplication_window` for other `MergeTree` tables, as set on the
+    table or, if not set on the table, on the server.
+
+    Args:
+        database (str): name of the database of the table
+        table (str): name of the table
+
+    Returns:
+        int: size of the deduplication window. 0 if inserts into the table are not
+        deduplicated, or if the table does not exist.
+    """
+    with datawarehouse_client_pool.client() as client:
+        tables = client.query(
+            (
+                "SELECT engine, engine_full FROM system.tables "
+                "WHERE database = {database:String} AND name = {table:String}"
+            ),
+            parameters={"database": database, "table": table},
+        ).result_rows
+
+        if not tables or "MergeTree" not in tables[0][0]:
+            return 0
+
+        engine, engine_full = tables[0]
+        setting = (
+            "replicated_deduplication_window"
+            if engine.startswith("Replicated")
+            else "non_replicated_deduplication_window"
+        )
+        table_setting = re.search(rf"\b{setting} = (\d+)", engine_full)
+        if table_setting:
+            return int(table_setting.group(1))
+
+        default = client.query(
+            "SELECT value FROM system.merge_tree_settings WHERE name = {name:String}",
+            parameters={"name": setting},
+        ).result_rows
+        return int(default[0][0]) if default else 0
+
+
+def insert_df_in_blocks(
+    df: pd.DataFrame,
+    *,
+    table_name: str,
+    database: str,
+    logger: Optional[logging.Logger] = None,
+    block_size: int = 200000,
+    max_workers: int = 4,
+    max_retries: int = 0,
+):
+    """
+    Inserts a DataFrame into a data_warehouse table in blocks of `block_size` rows,
+    sent concurrently on a pool of at most `max_workers` threads, each with its own
+    client from `datawarehouse_client_pool`.
+
+    Each block is sent with its own `insert_deduplication_token`, and, if
+    `max_retries` is positive, is retried with the same token up to `max_retries`
+    times if the request fails. Tokens are unique to each call, so reloading the same
+    data later (after dropping a partition for instance) is never deduplicated.
+
+    Clickhouse only deduplicates inserts into non-replicated `MergeTree` tables that
+    have a `non_replicated_deduplication_window`. On other tables, a retried block
+    whose first attempt actually reached the server (a timeout for instance) would
+    be inserted twice, so blocks are not retried if the table has no deduplication
+    window (see `get_insert_deduplication_window`), whatever `max_retries`.
+
+    Args:
+        df (pd.DataFrame): data to insert
+        table_name (str): name of the table
+        database (str): name of the database of the table
+        logger (logging.Logger, optional): logger instance. Defaults to None.
+        block_size (int, optional): number of rows per block. Defaults to 200000.
+        max_workers (int, optional): maximum number of blocks sent concurrently.
+          Defaults to 4.
+        max_retries (int, optional): number of times a failed block is retried.
+          Ignored if the table has no deduplication window. Defaults to 0.
+    """
+    try:
+        assert block_size > 0
+    except AssertionError:
+        raise ValueError(f"block_size must be strictly positive, got {block_size}.")
+
+    if (
+        max_retries > 0
+        and get_insert_deduplication_window(database=database, table=table_name) == 0
+    ):
+        if logger:
+            logger.warning(
+                f"{database}.{table_name} has no deduplication window, failed blocks "
+                "will not be retried."
+            )
+        max_retries = 0
+
+    load_id = uuid.uuid4().hex
+    blocks_starts = range(0, len(df), block_size)
+
+    def insert_block(block_index: int):
+        start = blocks_starts[block_index]
+        block = df.iloc[start : start + block_size]
+        token = f"{database}.{table_name}-{load_id}-{block_index}"
+        for attempt in range(max_retries + 1):
+            try:
+                with datawarehouse_client_pool.client() as client:
+                    client.insert_df(
+                        table=table_name,
+                        df=block,
+                        database=database,
+                        settings={
+                            "insert_deduplicate": 1,
+                            "insert_deduplication_token": token,
+                        },
+                    )
+                return
+            except OperationalError:
+                if attempt == max_retries:
+                    raise
+                if logger:
+                    logger.warning(
+                        f"Insert of block {block_index} into {database}.{table_name} "
+                        f"failed, retrying ({attempt + 1}/{max_retries})."
+                    )
+
+    if logger:
         logger.info(
-            "GeoDataFrame detected. Converting geometry to text representation."
+            f"Inserting {len(df)} rows into {database}.{table_name} in "
+            f"{len(blocks_starts)} blocks."
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(insert_block, range(len(blocks_starts))))
+
+
+def geometries_to_arrow(geometries: gpd.GeoSeries) -> pa.Array:
+    """
+    Converts geometries to the Arrow representation of Clickhouse's `Point` (a
+    `Tuple(Float64, Float64)`) or `MultiPolygon` (an
+    `Array(Array(Array(Point)))`) geo types, without text serialization : the
+    coordinates and offsets of the geometries are extracted from the underlying
+    GEOS geometries in a single vectorized pass and wrapped as nested Arrow arrays.
+
+    Polygons are converted to multipolygons with one polygon, and missing polygons
+    to empty multipolygons.
+
+    Args:
+        geometries (gpd.GeoSeries): point geometries, or polygon and multipolygon
+          geometries
+
+    Returns:
+        pa.Array: array of `struct<x, y>` for points, or
+          `list<list<list<struct<x, y>>>>` for (multi)polygons
+    """
+    geoms = np.asarray(geometries.array, dtype=object)
+
+    if len(geoms) and (shapely.get_type_id(geoms) == shapely.GeometryType.POINT).all():
+        coords = shapely.get_coordinates(geoms)
+        try:
+            assert len(coords) == len(geoms)
+        except AssertionError:
+            raise ValueError("Point geometries cannot be missing or empty.")
+        return pa.StructArray.from_arrays(
+            [pa.array(coords[:, 0]), pa.array(coords[:, 1])], names=["x", "y"]
+        )
+
+    if len(geoms) == 0:
+        # Empty inputs are typed as multipolygons, using a dummy geometry sliced out
+        # of the result.
+        geoms = np.array([shapely.MultiPolygon()], dtype=object)
+
+    geoms = np.where(shapely.is_missing(geoms), shapely.MultiPolygon(), geoms)
+    geom_type, coords, offsets = shapely.to_ragged_array(geoms, include_z=False)
+
+    if geom_type == shapely.GeometryType.POLYGON:
+        ring_offsets, polygon_offsets = offsets
+        multipolygon_offsets = np.arange(len(geoms) + 1, dtype=np.int32)
+    elif geom_type == shapely.GeometryType.MULTIPOLYGON:
+        ring_offsets, polygon_offsets, multipolygon_offsets = offsets
+    else:
+        raise ValueError(
+            "Only points or (multi)polygons can be converted to Clickhouse geo types, "
+            f"got {geom_type.name}."
         )
-        df = df.to_wkt()
 
-    client = create_datawarehouse_client()
+    points = pa.StructArray.from_arrays(
+        [pa.array(coords[:, 0]), pa.array(coords[:, 1])], names=["x", "y"]
+    )
+    rings = pa.ListArray.from_arrays(pa.array(ring_offsets), points)
+    polygons = pa.ListArray.from_arrays(pa.array(polygon_offsets), rings)
+    multipolygons = pa.ListArray.from_arrays(pa.array(multipolygon_offsets), polygons)
+    return multipolygons.slice(0, len(geometries))
+
+
+def geodataframe_to_arrow(gdf: gpd.GeoDataFrame) -> pa.Table:
+    """
+    Converts a GeoDataFrame to a `pyarrow.Table`, with geometry columns converted
+    to Clickhouse's `Point` or `MultiPolygon` geo types (see `geometries_to_arrow`)
+    and columns in the same order as in the GeoDataFrame.
+
+    Args:
+        gdf (gpd.GeoDataFrame): GeoDataFrame to convert
+
+    Returns:
+        pa.Table: Arrow table
+    """
+    geometry_columns = [
+        col
+        for col in gdf.columns
+        if isinstance(gdf[col].dtype, gpd.array.GeometryDtype)
+    ]
+    table = pa.Table.from_pandas(
+        pd.DataFrame(gdf.drop(columns=geometry_columns)), preserve_index=False
+    )
+
+    for col in geometry_columns:
+        table = table.add_column(
+            gdf.columns.get_loc(col), col, geometries_to_arrow(gdf[col])
+        )
+
+    return table
+
+
+def load_arrow_table_to_data_warehouse(
+    table: pa.Table,
+    *,
+    client: HttpClient,
+    table_name: str,
+    database: str,
+    logger: logging.Logger,
+    datetime_cols_to_clip: List = None,
+):
+    """
+    Insert a `pyarrow.Table` into a data_warehouse table using Clickhouse's Arrow
+    input format.
+
+    Args:
+        table (pa.Table): data to load
+        client (HttpClient): data_warehouse client
+        table_name (str): name of the table
+        database (str): name of the database of the table
+        logger (logging.Logger): logger instance
+        datetime_cols_to_clip (List, optional): timestamp columns whose values must be
+          clipped to the range supported by Clickhouse's `DateTime` type. Defaults to
+          None.
+    """
     logger.info(
-        f"Loading {len(df)} rows into data warehouse {database}.{table_name} table."
+        f"Loading {table.num_rows} rows into data warehouse {database}.{table_name} "
+        "table."
     )
 
+    if table.num_rows == 0:
+        return
+
     if datetime_cols_to_clip:
         for col in datetime_cols_to_clip:
-            df[col] = pd.to_datetime(
-                df[col].clip(
-                    datetime(1970, 1, 1, 0, 0, 0), datetime(2106, 2, 7, 6, 28, 15)
-                )
+            i = table.schema.get_field_index(col)
+            values = table.column(i)
+            if pa.types.is_null(values.type):
+                continue
+            lower = pa.scalar(datetime(1970, 1, 1, 0, 0, 0), type=values.type)
+            upper = pa.scalar(datetime(2106, 2, 7, 6, 28, 15), type=values.type)
+            clipped = pc.min_element_wise(
+                pc.max_element_wise(values, lower, skip_nulls=False),
+                upper,
+                skip_nulls=False,
             )
+            table = table.set_column(i, col, clipped)
 
-    client.insert_df(table=table_name, df=df, database=database)
+    client.insert_arrow(table=table_name, arrow_table=table, database=database)
+
+
+def get_watermark(*, database: str, flow: str, partition: str) -> Optional[Watermark]:
+    """
+    Reads the watermark of a flow's partition from the `watermarks` table of a data
+    warehouse database.
+
+    Args:
+        database (str): database of the `watermarks` table
+        flow (str): name of the flow
+        partition (str): partition of the flow's data, for instance '202405'
+
+    Returns:
+        Optional[Watermark]: the partition's watermark, or None if the partition has
+          not been loaded yet
+    """
+    with datawarehouse_client_pool.client() as client:
+        rows = client.query(
+            (
+                "SELECT operation_datetime_utc, report_id "
+                "FROM {database:Identifier}.watermarks FINAL "
+                "WHERE flow = {flow:String} AND partition = {partition:String}"
+            ),
+            parameters={"database": database, "flow": flow, "partition": partition},
+        ).result_rows
+
+    if len(rows) == 0:
+        return None
+
+    operation_datetime_utc, report_id = rows[0]
+    return Watermark(operation_datetime_utc=operation_datetime_utc, report_id=report_id)
+
+
+def set_watermark(watermark: Watermark, *, database: str, flow: str, partition: str):
+    """
+    Stores the watermark of a flow's partition in the `watermarks` table of a data
+    warehouse database, replacing the previous one.
+
+    Args:
+        watermark (Watermark): watermark to store
+        database (str): database of the `watermarks` table
+        flow (str): name of the flow
+        partition (str): partition of the flow's data, for instance '202405'
+    """
+    with datawarehouse_client_pool.client() as client:
+        client.insert(
+            table="watermarks",
+            data=[
+                [
+                    flow,
+                    partition,
+                    watermark.operation_datetime_utc,
+                    watermark.report_id,
+                    datetime.now(timezone.utc),
+                ]
+            ],
+            column_names=[
+                "flow",
+                "partition",
+                "operation_datetime_utc",
+                "report_id",
+                "updated_at_utc",
+            ],
+            database=database,
+        )
+
+
+def delete_from_data_warehouse(
+    *,
+    database: str,
+    table: str,
+    column: str,
+    values: List[str],
+    batch_size: int = 1000,
+):
+    """
+    Deletes the rows of a data warehouse table whose `column` value is in `values`,
+    using Clickhouse's lightweight deletes, in batches of `batch_size` values.
+
+    Args:
+        database (str): database of the table
+        table (str): name of the table
+        column (str): name of the column to filter on
+        values (List[str]): values of the rows to delete
+        batch_size (int, optional): maximum number of values per `DELETE` query.
+          Defaults to 1000.
+    """
+    with datawarehouse_client_pool.client() as client:
+        for i in range(0, len(values), batch_size):
+            client.command(
+                (
+                    "DELETE FROM {database:Identifier}.{table:Identifier} "
+                    "WHERE has({values:Array(String)}, {column:Identifier})"
+                ),
+                parameters={
+                    "database": database,
+                    "table": table,
+                    "column": column,
+                    "values": values[i : i + batch_size],
+                },
+            )
+
+
+@contextmanager
+def staging_partition(
+    *,
+    database: str,
+    table: str,
+    partition: str,
+    copy_partition: bool = False,
+    logger: Optional[logging.Logger] = None,
+) -> Iterator[str]:
+    """
+    Context manager to rebuild a partition of a data warehouse table off to the
+    side, without leaving the partition empty or missing while it is being rebuilt.
+
+    On entering, creates a staging table with the same structure, engine and
+    partitioning as `table` and yields its name. The staging table is empty, or
+    holds a copy of the partition's current data if `copy_partition` is `True`, so
+    that only part of the partition can be updated by deleting and inserting rows
+    in the staging table. Data must be loaded into this staging table. On
+    successful exit, the partition of `table` is replaced
+    atomically with the staging table's partition using
+    `ALTER TABLE ... REPLACE PARTITION ... FROM ...`. The staging table is dropped
+    in all cases, so that if the loading fails, `table` is left untouched.
+
+    Args:
+        database (str): database of the table
+        table (str): name of the table
+        partition (str): partition to rebuild
+        copy_partition (bool, optional): whether to copy the partition's current
+          data into the staging table. Defaults to False.
+        logger (logging.Logger, optional): logger instance. Defaults to None.
+
+    Yields:
+        str: name of the staging table, in the same `database`
+    """
+    with datawarehouse_client_pool.client() as client:
+        staging_table = f"{table}_staging_{partition}"
+        parameters = {
+            "database": database,
+            "table": table,
+            "staging_table": staging_table,
+            "partition": partition,
+        }
+        drop_staging_table = (
+            "DROP TABLE IF EXISTS {database:Identifier}.{staging_table:Identifier}"
+        )
+
+        client.command(drop_staging_table, parameters=parameters)
+        client.command(
+            (
+                "CREATE TABLE {database:Identifier}.{staging_table:Identifier} "
+                "AS {database:Identifier}.{table:Identifier}"
+            ),
+            parameters=parameters,
+        )
+        try:
+            if copy_partition:
+                client.command(
+                    (
+                        "ALTER TABLE {database:Identifier}.{staging_table:Identifier} "
+                        "ATTACH PARTITION {partition:String} "
+                        "FROM {database:Identifier}.{table:Identifier}"
+                    ),
+                    parameters=parameters,
+                )
+            yield staging_table
+            if logger:
+                logger.info(
+                    f"Replacing partition '{partition}' of {database}.{table} with "
+                    f"staging table {staging_table}."
+                )
+            client.command(
+                (
+                    "ALTER TABLE {database:Identifier}.{table:Identifier} "
+                    "REPLACE PARTITION {partition:String} "
+                    "FROM {database:Identifier}.{staging_table:Identifier}"
+                ),
+                parameters=parameters,
+            )
+        finally:
+            client.command(drop_staging_table, parameters=parameters)
 
 
 def load(
@@ -127,6 +934,7 @@ def load(
     handle_array_conversion_errors: bool = True,
     value_on_array_conversion_error: str = "{}",
     jsonb_columns: list = None,
+    json_backend: str = "simplejson",
     table_id_column: str = None,
     df_id_column: str = None,
     nullable_integer_columns: list = None,
@@ -135,7 +943,10 @@ def load(
     connection: Connection = None,
     init_ddls: List[DDL] = None,
     end_ddls: List[DDL] = None,
-):
+    copy_format: str = "csv",
+    upsert_strategy: str = "in_list",
+    replace_strategy: str = "delete",
+) -> Optional[Future]:
     """
     Load a DataFrame or GeoDataFrame to a database table using sqlalchemy. The table
     must already exist in the database.
@@ -165,6 +976,15 @@ def load(
           handled. Defaults to '{}'.
         jsonb_columns (list, optional): columns containing values that must be
           serialized before loading into columns with Postgresql `JSONB` type
+        json_backend (str, optional): json library used to serialize
+          `jsonb_columns`:
+
+          - 'simplejson' to serialize values with `simplejson`
+          - 'orjson' to serialize values with `orjson`, which is much faster on
+            nested dicts and lists. Values `orjson` cannot serialize, or all values
+            if `orjson` is not installed, are serialized with `simplejson`.
+
+          Defaults to 'simplejson'.
         table_id_column (str, optional): name of the table column to use an id.
           Required if `how` is "upsert".
         df_id_column (str, optional): name of the DataFrame column to use an id.
@@ -189,6 +1009,49 @@ def load(
           the loading operation. Defaults to None.
         end_ddls: (List[DDL], optional): If given, these DDLs will be executed after
           the loading operation. Defaults to None.
+        copy_format (str, optional): format of the `COPY` used to insert DataFrames
+          (GeoDataFrames are always inserted with `to_postgis`):
+
+          - 'csv' to serialize rows as CSV text
+          - 'binary' to encode rows column-wise in PostgreSQL's binary format and
+            stream them to the server in blocks, which is much faster for large
+            loads. All columns must have a type supported by
+            `utils.get_pgcopy_encoder`.
+
+          Defaults to 'csv'.
+        upsert_strategy (str, optional): if `how` is 'upsert', how to replace the
+          rows already in the table:
+
+          - 'in_list' to delete the rows whose id is in the DataFrame with a
+            `DELETE ... WHERE id IN (...)` query listing all the ids, then insert the
+            DataFrame into the table
+          - 'temp_table' to `COPY` the DataFrame into a temporary table, then
+            delete and insert rows with a single set-based `DELETE ... USING` and a
+            single `INSERT ... SELECT` on the server. Much faster for large numbers
+            of ids.
+
+          Defaults to 'in_list'.
+        replace_strategy (str, optional): if `how` is 'replace', how to replace the
+          rows already in the table:
+
+          - 'delete' to delete all rows from the table, then insert the DataFrame
+            into the table
+          - 'swap' to insert the DataFrame into a new shadow table with the same
+            structure, then swap it with the table by renaming both tables at the
+            end of the transaction (see `utils.create_shadow_table` and
+            `utils.swap_tables`). This avoids bloating the table and blocking
+            readers during the load. The replaced table is dropped in a separate
+            transaction on a background thread (or at the end of the transaction
+            if a `connection` is given). Tables that other objects depend on (see
+            `utils.get_dependent_objects`) cannot be swapped and fall back to
+            'delete'.
+
+          Defaults to 'delete'.
+
+    Returns:
+        Optional[Future]: if a `connection` is not given and the table was swapped
+          with a shadow table, the future of the drop of the replaced table (see
+          `utils.drop_table_in_background`), else None
     """
 
     df = prepare_df_for_loading(
@@ -198,6 +1061,7 @@ def load(
         handle_array_conversion_errors=handle_array_conversion_errors,
         value_on_array_conversion_error=value_on_array_conversion_error,
         jsonb_columns=jsonb_columns,
+        json_backend=json_backend,
         nullable_integer_columns=nullable_integer_columns,
         timedelta_columns=timedelta_columns,
         enum_columns=enum_columns,
@@ -206,7 +1070,7 @@ def load(
     if connection is None:
         e = create_engine(db_name)
         with e.begin() as connection:
-            load_with_connection(
+            replaced_table = load_with_connection(
                 df=df,
                 connection=connection,
                 table_name=table_name,
@@ -217,7 +1081,13 @@ def load(
                 df_id_column=df_id_column,
                 init_ddls=init_ddls,
                 end_ddls=end_ddls,
+                copy_format=copy_format,
+                upsert_strategy=upsert_strategy,
+                replace_strategy=replace_strategy,
+                drop_replaced_table=False,
             )
+        if replaced_table:
+            return utils.drop_table_in_background(schema, replaced_table, e, logger)
     else:
         load_with_connection(
             df=df,
@@ -230,6 +1100,9 @@ def load(
             df_id_column=df_id_column,
             init_ddls=init_ddls,
             end_ddls=end_ddls,
+            copy_format=copy_format,
+            upsert_strategy=upsert_strategy,
+            replace_strategy=replace_strategy,
         )
 
 
@@ -245,63 +1118,249 @@ def load_with_connection(
     df_id_column: Optional[str] = None,
     init_ddls: List[DDL] = None,
     end_ddls: List[DDL] = None,
-):
+    copy_format: str = "csv",
+    upsert_strategy: str = "in_list",
+    replace_strategy: str = "delete",
+    drop_replaced_table: bool = True,
+) -> Optional[str]:
+    """
+    Load a DataFrame or GeoDataFrame to a database table using an existing
+    connection. See `load` for a description of the arguments.
+
+    Args:
+        drop_replaced_table (bool, optional): if `how` is 'replace' and the table is
+          swapped with a shadow table, whether to drop the replaced table before
+          returning. If False, the replaced table is kept and its name is returned
+          so that it can be dropped after the transaction is committed. Defaults to
+          True.
+
+    Returns:
+        Optional[str]: the name of the replaced table, if it was swapped with a
+          shadow table and not dropped, else None
+    """
+    try:
+        assert copy_format in ("csv", "binary")
+    except AssertionError:
+        raise ValueError(f"copy_format must be 'csv' or 'binary', got {copy_format}")
+
     if init_ddls:
         for ddl in init_ddls:
             connection.execute(ddl)
 
     table = get_table(table_name, schema, connection, logger)
+    replaced_table = None
     if how == "replace":
-        # Delete all rows from table
-        utils.delete(table, connection, logger)
+        replaced_table = replace_rows(
+            df,
+            table=table,
+            connection=connection,
+            logger=logger,
+            copy_format=copy_format,
+            replace_strategy=replace_strategy,
+        )
 
     elif how == "upsert":
-        # Delete rows that are in the DataFrame from the table
+        upsert_rows(
+            df,
+            table=table,
+            connection=connection,
+            logger=logger,
+            table_id_column=table_id_column,
+            df_id_column=df_id_column,
+            copy_format=copy_format,
+            upsert_strategy=upsert_strategy,
+        )
 
-        try:
-            assert df_id_column is not None
-        except AssertionError:
-            raise ValueError("df_id_column cannot be null if how='upsert'")
-        try:
-            assert table_id_column is not None
-        except AssertionError:
-            raise ValueError("table_id_column cannot be null if how='upsert'")
+    elif how == "append":
+        logger.info(f"Loading into {schema}.{table_name}")
+        copy_df_to_table(
+            df,
+            table=table,
+            connection=connection,
+            logger=logger,
+            copy_format=copy_format,
+        )
 
-        ids_to_delete = set(df[df_id_column].unique())
+    else:
+        raise ValueError(f"how must be 'replace', 'upsert' or 'append', got {how}")
 
+    if end_ddls:
+        for ddl in end_ddls:
+            connection.execute(ddl)
+
+    if replaced_table and drop_replaced_table:
+        utils.drop_table(schema, replaced_table, connection, logger)
+        replaced_table = None
+
+    return replaced_table
+
+
+def replace_rows(
+    df: pd.DataFrame | gpd.GeoDataFrame,
+    *,
+    table: Table,
+    connection: Connection,
+    logger: logging.Logger,
+    copy_format: str = "csv",
+    replace_strategy: str = "delete",
+) -> Optional[str]:
+    """
+    Replaces all rows of a table with the rows of a DataFrame or GeoDataFrame. See
+    `load` for a description of the arguments.
+
+    Returns:
+        Optional[str]: the name of the replaced table, if it was swapped with a
+          shadow table, else None
+    """
+    try:
+        assert replace_strategy in ("delete", "swap")
+    except AssertionError:
+        raise ValueError(
+            f"replace_strategy must be 'delete' or 'swap', got {replace_strategy}"
+        )
+
+    if replace_strategy == "swap":
+        dependent_objects = utils.get_dependent_objects(table, connection)
+        if dependent_objects:
+            logger.warning(
+                f"Table {table.schema}.{table.name} cannot be swapped, objects "
+                f"{dependent_objects} depend on it. Deleting rows instead."
+            )
+            replace_strategy = "delete"
+
+    if replace_strategy == "delete":
+        utils.delete(table, connection, logger)
+        logger.info(f"Loading into {table.schema}.{table.name}")
+        copy_df_to_table(
+            df,
+            table=table,
+            connection=connection,
+            logger=logger,
+            copy_format=copy_format,
+        )
+        return None
+
+    shadow_table = utils.create_shadow_table(table, connection)
+    logger.info(f"Loading into shadow table {table.schema}.{shadow_table.name}")
+    copy_df_to_table(
+        df,
+        table=shadow_table,
+        connection=connection,
+        logger=logger,
+        copy_format=copy_format,
+    )
+    return utils.swap_tables(table, shadow_table, connection, logger)
+
+
+def upsert_rows(
+    df: pd.DataFrame | gpd.GeoDataFrame,
+    *,
+    table: Table,
+    connection: Connection,
+    logger: logging.Logger,
+    table_id_column: str,
+    df_id_column: str,
+    copy_format: str = "csv",
+    upsert_strategy: str = "in_list",
+):
+    """
+    Inserts the rows of a DataFrame or GeoDataFrame into a table, replacing the rows
+    of the table whose id is in the DataFrame. See `load` for a description of the
+    arguments.
+    """
+    try:
+        assert upsert_strategy in ("in_list", "temp_table")
+    except AssertionError:
+        raise ValueError(
+            f"upsert_strategy must be 'in_list' or 'temp_table', got {upsert_strategy}"
+        )
+
+    try:
+        assert df_id_column is not None
+    except AssertionError:
+        raise ValueError("df_id_column cannot be null if how='upsert'")
+    try:
+        assert table_id_column is not None
+    except AssertionError:
+        raise ValueError("table_id_column cannot be null if how='upsert'")
+
+    if upsert_strategy == "in_list":
+        # Delete rows that are in the DataFrame from the table
         utils.delete_rows(
             table=table,
             id_column=table_id_column,
-            ids_to_delete=ids_to_delete,
+            ids_to_delete=set(df[df_id_column].unique()),
             connection=connection,
             logger=logger,
         )
-
-    elif how == "append":
-        # Nothing to do
-        pass
+        logger.info(f"Loading into {table.schema}.{table.name}")
+        copy_df_to_table(
+            df,
+            table=table,
+            connection=connection,
+            logger=logger,
+            copy_format=copy_format,
+        )
 
     else:
-        raise ValueError(f"how must be 'replace', 'upsert' or 'append', got {how}")
+        temp_table = utils.create_temporary_table_like(table, connection)
+        logger.info(f"Loading into temporary table {temp_table.name}")
+        copy_df_to_table(
+            df,
+            table=temp_table,
+            connection=connection,
+            logger=logger,
+            copy_format=copy_format,
+        )
+        utils.upsert_from_table(
+            table=table,
+            source=temp_table,
+            table_id_column=table_id_column,
+            source_id_column=df_id_column,
+            columns=list(df.columns),
+            connection=connection,
+            logger=logger,
+        )
 
-    # Insert data into table
-    logger.info(f"Loading into {schema}.{table_name}")
 
+def copy_df_to_table(
+    df: pd.DataFrame | gpd.GeoDataFrame,
+    *,
+    table: Table,
+    connection: Connection,
+    logger: logging.Logger,
+    copy_format: str = "csv",
+):
+    """
+    Inserts a DataFrame or GeoDataFrame into an existing table using `COPY`, or
+    `to_postgis` for GeoDataFrames.
+
+    Args:
+        df (pd.DataFrame | gpd.GeoDataFrame): data to insert
+        table (Table): destination table
+        connection (Connection): database connection
+        logger (logging.Logger): logger instance
+        copy_format (str, optional): 'csv' or 'binary'. See `load`. Defaults to
+          'csv'.
+    """
     if isinstance(df, gpd.GeoDataFrame):
         logger.info("GeodateFrame detected, using to_postgis")
         df.to_postgis(
-            name=table_name,
+            name=table.name,
             con=connection,
-            schema=schema,
+            schema=table.schema,
             index=False,
             if_exists="append",
         )
 
+    elif isinstance(df, pd.DataFrame) and copy_format == "binary":
+        utils.psql_insert_copy_binary(df, table, connection)
+
     elif isinstance(df, pd.DataFrame):
         df.to_sql(
-            name=table_name,
+            name=table.name,
             con=connection,
-            schema=schema,
+            schema=table.schema,
             index=False,
             method=psql_insert_copy,
             if_exists="append",
@@ -310,10 +1369,6 @@ def load_with_connection(
     else:
         raise ValueError("df must be DataFrame or GeoDataFrame.")
 
-    if end_ddls:
-        for ddl in end_ddls:
-            connection.execute(ddl)
-
 
 def delete_rows(
     *,
@@ -410,8 +1465,8 @@ def run_sql_script(
         if python_bind_parameters:
             sql = sql.format(**python_bind_parameters)
 
-    client = create_datawarehouse_client()
-    client.command(sql, parameters=parameters)
+    with datawarehouse_client_pool.client() as client:
+        client.command(sql, parameters=parameters)
 
 
 def read_saved_query(
@@ -419,14 +1474,15 @@ def read_saved_query(
     *,
     db: str = None,
     con: Optional[Connection | Engine | HttpClient] = None,
-    chunksize: Optional[str] = None,
+    chunksize: Optional[int] = None,
     params: Optional[dict] = None,
     backend: str = "pandas",
     geom_col: str = "geom",
     crs: Optional[int] = None,
     parse_dates: Optional[list | dict] = None,
+    cache_policy: Optional[QueryCachePolicy] = None,
     **kwargs,
-) -> pd.DataFrame | gpd.GeoDataFrame:
+) -> pd.DataFrame | gpd.GeoDataFrame | pa.Table:
     """Run saved SQLquery on a database. Supported databases :
 
       - 'ocan' : OCAN database
@@ -449,14 +1505,15 @@ def read_saved_query(
           `sqlalchemy.engine.Connection` or `sqlalchemy.engine.Engine` or
           `clickhouse_connect.driver.httpclient.HttpClient` object. Mandatory if no
           `db` is given. Ignored if `db` is given.
-        chunksize (Optional[str], optional): If specified, return an iterator where
+        chunksize (Optional[int], optional): If specified, return an iterator where
           `chunksize` is the number of rows to include in each chunk. Defaults to
           None.
         params (Optional[dict], optional): Parameters to pass to execute method.
           Defaults to None. Ignored for `data_warehouse` database.
         backend (str, optional) : 'pandas' to run a SQL query and return a
-          `pandas.DataFrame` or 'geopandas' to run a PostGIS query and return a
-          `geopandas.GeoDataFrame`. Defaults to 'pandas'. Ignored for `data_warehouse`
+          `pandas.DataFrame`, 'geopandas' to run a PostGIS query and return a
+          `geopandas.GeoDataFrame` or 'arrow' to run a SQL query and return a
+          `pyarrow.Table`. Defaults to 'pandas'. Ignored for `data_warehouse`
           database.
         geom_col (str, optional): column name to convert to shapely geometries when
           `backend` is 'geopandas'. Ignored when `backend` is 'pandas'. Defaults to
@@ -475,9 +1532,16 @@ def read_saved_query(
           - Dict of ``{column_name: arg dict}``, where the arg dict corresponds
             to the keyword arguments of :func:`pandas.to_datetime`
 
-          Ignored for `data_warehouse` database.
+          Ignored for `data_warehouse` database and when `backend` is 'arrow'.
+        cache_policy (Optional[QueryCachePolicy], optional): If specified, query
+          results are stored as Parquet files in the `QUERY_CACHE_LOCATION` folder,
+          keyed by the content of the query and its parameters, and are read from
+          there instead of running the query as long as they are younger than
+          `cache_policy.ttl` and the result of the
+          `cache_policy.freshness_query_filepath` probe query, if any, is unchanged.
+          Requires `db` and cannot be used with `chunksize`. Defaults to None.
         kwargs : passed to pd.read_sql or gpd.read_postgis. Ignored for `data_warehouse`
-          database.
+          database and when `backend` is 'arrow'.
 
     Returns:
         pd.DataFrame | gpd.GeoDataFrame: Query results
@@ -486,6 +1550,45 @@ def read_saved_query(
     with open(sql_filepath, "r") as sql_file:
         query = sql_file.read()
 
+    if cache_policy:
+        try:
+            assert db is not None
+            assert chunksize is None
+        except AssertionError:
+            raise ValueError(
+                "Cached queries require a `db` and cannot be read in chunks."
+            )
+
+        cache_key = get_query_cache_key(
+            query,
+            params=params,
+            backend=backend,
+            geom_col=geom_col,
+            crs=crs,
+            parse_dates=parse_dates,
+            **kwargs,
+        )
+        freshness = get_query_cache_freshness(db=db, cache_policy=cache_policy)
+
+        if query_cache_entry_is_fresh(
+            cache_key, cache_policy=cache_policy, freshness=freshness
+        ):
+            logging.info(f"Reading query results from cache entry {cache_key}.")
+            return read_query_cache_entry(cache_key, backend=backend)
+
+        res = read_query(
+            query,
+            db=db,
+            params=params,
+            backend=backend,
+            geom_col=geom_col,
+            crs=crs,
+            parse_dates=parse_dates,
+            **kwargs,
+        )
+        write_query_cache_entry(cache_key, res, freshness=freshness)
+        return res
+
     return read_query(
         query,
         db=db,
@@ -500,19 +1603,185 @@ def read_saved_query(
     )
 
 
+def get_query_cache_key(query: str, params: Optional[dict] = None, **options) -> str:
+    """
+    Returns the key of the cache entry of a query's results : a hash of the query,
+    its parameters and of the options used to read the results.
+
+    Args:
+        query (str): SQL query
+        params (Optional[dict], optional): query parameters. Defaults to None.
+        options : options used to read the query results (backend, geom_col...)
+
+    Returns:
+        str: cache key
+    """
+    key_data = json.dumps(
+        {"query": query, "params": params, "options": options},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+
+def get_saved_query_cache_key(
+    sql_filepath: str | Path, params: Optional[dict] = None, **options
+) -> str:
+    """Same as `get_query_cache_key`, for a saved query."""
+    with open(QUERIES_LOCATION / sql_filepath, "r") as sql_file:
+        query = sql_file.read()
+    return get_query_cache_key(query, params=params, **options)
+
+
+def get_query_cache_freshness(
+    *, db: str, cache_policy: QueryCachePolicy
+) -> Optional[list]:
+    """
+    Runs the freshness probe query of a `QueryCachePolicy` and returns its result as
+    a json-serializable list of rows, or None if the policy has no probe query.
+    """
+    if cache_policy.freshness_query_filepath is None:
+        return None
+
+    probe = read_saved_query(cache_policy.freshness_query_filepath, db=db)
+    return probe.astype(str).values.tolist()
+
+
+def query_cache_entry_is_fresh(
+    cache_key: str,
+    *,
+    cache_policy: QueryCachePolicy,
+    freshness: Optional[list],
+) -> bool:
+    """
+    Returns `True` if the cache entry `cache_key` exists, is younger than
+    `cache_policy.ttl` and was created with the same freshness probe result.
+    """
+    metadata = read_query_cache_metadata(cache_key)
+
+    if metadata is None:
+        return False
+
+    created_at = datetime.fromisoformat(metadata["created_at"])
+    return (
+        datetime.now(timezone.utc) - created_at < cache_policy.ttl
+        and metadata["freshness"] == freshness
+    )
+
+
+def read_query_cache_metadata(cache_key: str) -> Optional[dict]:
+    """Returns the metadata of the cache entry `cache_key`, or None if there is no
+    such entry."""
+    metadata_path = QUERY_CACHE_LOCATION / f"{cache_key}.json"
+    data_path = QUERY_CACHE_LOCATION / f"{cache_key}.parquet"
+
+    if not (metadata_path.exists() and data_path.exists()):
+        return None
+
+    with open(metadata_path, "r") as f:
+        return json.load(f)
+
+
+def write_query_cache_metadata(cache_key: str, metadata: dict):
+    """Atomically writes the metadata of the cache entry `cache_key`."""
+    QUERY_CACHE_LOCATION.mkdir(parents=True, exist_ok=True)
+    metadata_path = QUERY_CACHE_LOCATION / f"{cache_key}.json"
+    tmp_path = metadata_path.with_suffix(f".json.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(metadata, f)
+    os.replace(tmp_path, metadata_path)
+
+
+def write_query_cache_entry(
+    cache_key: str,
+    res: pd.DataFrame | gpd.GeoDataFrame | pa.Table,
+    *,
+    freshness: Optional[list],
+):
+    """
+    Stores query results as Parquet in the cache entry `cache_key`, along with the
+    entry's metadata. Data and metadata files are written to temporary files and
+    then moved into place, so that concurrent readers never see partial files.
+    """
+    QUERY_CACHE_LOCATION.mkdir(parents=True, exist_ok=True)
+    data_path = QUERY_CACHE_LOCATION / f"{cache_key}.parquet"
+    tmp_path = data_path.with_suffix(f".parquet.{os.getpid()}.tmp")
+
+    if isinstance(res, gpd.GeoDataFrame):
+        res.to_parquet(tmp_path, index=False)
+    elif isinstance(res, pd.DataFrame):
+        pq.write_table(pa.Table.from_pandas(res, preserve_index=False), tmp_path)
+    else:
+        pq.write_table(res, tmp_path)
+
+    os.replace(tmp_path, data_path)
+    write_query_cache_metadata(
+        cache_key,
+        {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "freshness": freshness,
+            "loaded_into": [],
+        },
+    )
+
+
+def read_query_cache_entry(
+    cache_key: str, *, backend: str = "pandas"
+) -> pd.DataFrame | gpd.GeoDataFrame | pa.Table:
+    """
+    Reads the query results stored in the cache entry `cache_key`. List columns are
+    returned as lists, as when reading query results with `pandas`, rather than
+    `numpy` arrays.
+    """
+    data_path = QUERY_CACHE_LOCATION / f"{cache_key}.parquet"
+
+    if backend == "arrow":
+        return pq.read_table(data_path)
+    elif backend == "geopandas":
+        res = gpd.read_parquet(data_path)
+    else:
+        res = pq.read_table(data_path).to_pandas()
+
+    list_columns = [
+        field.name
+        for field in pq.read_schema(data_path)
+        if pa.types.is_list(field.type) or pa.types.is_large_list(field.type)
+    ]
+    for col in list_columns:
+        res[col] = res[col].map(lambda x: x.tolist() if hasattr(x, "tolist") else x)
+
+    return res
+
+
+def query_cache_entry_is_loaded(cache_key: str, destination: str) -> bool:
+    """Returns `True` if the results of the cache entry `cache_key` were marked as
+    loaded into `destination` with `mark_query_cache_entry_loaded`."""
+    metadata = read_query_cache_metadata(cache_key)
+    return metadata is not None and destination in metadata["loaded_into"]
+
+
+def mark_query_cache_entry_loaded(cache_key: str, destination: str):
+    """Records that the results of the cache entry `cache_key` were loaded into
+    `destination`. The record is reset when the entry is refreshed."""
+    metadata = read_query_cache_metadata(cache_key)
+    if metadata is not None and destination not in metadata["loaded_into"]:
+        metadata["loaded_into"].append(destination)
+        write_query_cache_metadata(cache_key, metadata)
+
+
 def read_query(
     query: str,
     *,
     db: str = None,
     con: Optional[Connection | Engine | HttpClient] = None,
-    chunksize: Optional[str] = None,
+    chunksize: Optional[int] = None,
     params: Optional[dict] = None,
     backend: str = "pandas",
     geom_col: str = "geom",
     crs: Optional[int] = None,
     parse_dates: Optional[list | dict] = None,
     **kwargs,
-) -> pd.DataFrame | gpd.GeoDataFrame:
+) -> pd.DataFrame | gpd.GeoDataFrame | pa.Table:
     """Run SQLquery on a database. Supported databases :
 
       - 'ocan' : OCAN database
@@ -535,14 +1804,15 @@ def read_query(
           `sqlalchemy.engine.Connection` or `sqlalchemy.engine.Engine` or
           `clickhouse_connect.driver.httpclient.HttpClient` object. Mandatory if no
           `db` is given. Ignored if `db` is given.
-        chunksize (Optional[str], optional): If specified, return an iterator where
+        chunksize (Optional[int], optional): If specified, return an iterator where
           `chunksize` is the number of rows to include in each chunk. Defaults to
           None.
         params (Optional[dict], optional): Parameters to pass to execute method.
           Defaults to None. Ignored for `data_warehouse` database.
         backend (str, optional) : 'pandas' to run a SQL query and return a
-          `pandas.DataFrame` or 'geopandas' to run a PostGIS query and return a
-          `geopandas.GeoDataFrame`. Defaults to 'pandas'. Ignored for `data_warehouse`
+          `pandas.DataFrame`, 'geopandas' to run a PostGIS query and return a
+          `geopandas.GeoDataFrame` or 'arrow' to run a SQL query and return a
+          `pyarrow.Table`. Defaults to 'pandas'. Ignored for `data_warehouse`
           database.
         geom_col (str, optional): column name to convert to shapely geometries when
           `backend` is 'geopandas'. Ignored when `backend` is 'pandas'. Defaults to
@@ -561,16 +1831,16 @@ def read_query(
           - Dict of ``{column_name: arg dict}``, where the arg dict corresponds
             to the keyword arguments of :func:`pandas.to_datetime`
 
-          Ignored for `data_warehouse` database.
+          Ignored for `data_warehouse` database and when `backend` is 'arrow'.
         kwargs : passed to pd.read_sql or gpd.read_postgis. Ignored for `data_warehouse`
-          database.
+          database and when `backend` is 'arrow'.
 
     Returns:
         pd.DataFrame | gpd.GeoDataFrame: Query results
     """
     if db == "data_warehouse":
-        client = create_datawarehouse_client()
-        return client.query_df(query, parameters=params)
+        with datawarehouse_client_pool.client() as client:
+            return client.query_df(query, parameters=params)
     else:
         query = text(query)
 
@@ -601,8 +1871,292 @@ def read_query(
             params=params,
             **kwargs,
         )
+    elif backend == "arrow":
+        return read_arrow(query, con, chunksize=chunksize, params=params)
+    else:
+        raise ValueError(
+            f"backend must be 'pandas', 'geopandas' or 'arrow', got {backend}"
+        )
+
+
+# Arrow types of the results of PostgreSQL queries, by PostgreSQL type oid (the
+# `type_code` of the cursor description). `numeric` columns (oid 1700) are mapped
+# by `get_postgresql_arrow_type`. Columns of other types have their Arrow type
+# inferred from their values.
+POSTGRESQL_ARROW_TYPES = {
+    16: pa.bool_(),  # bool
+    17: pa.binary(),  # bytea
+    18: pa.string(),  # char
+    19: pa.string(),  # name
+    20: pa.int64(),  # int8
+    21: pa.int16(),  # int2
+    23: pa.int32(),  # int4
+    25: pa.string(),  # text
+    26: pa.int64(),  # oid
+    700: pa.float32(),  # float4
+    701: pa.float64(),  # float8
+    1042: pa.string(),  # bpchar
+    1043: pa.string(),  # varchar
+    1082: pa.date32(),  # date
+    1083: pa.time64("us"),  # time
+    1114: pa.timestamp("us"),  # timestamp
+    1184: pa.timestamp("us", tz="UTC"),  # timestamptz
+    1186: pa.duration("us"),  # interval
+}
+
+POSTGRESQL_NUMERIC_OID = 1700
+
+# PostgreSQL types whose text representation in the output of `COPY ... TO STDOUT
+# WITH (FORMAT CSV)` is parsed by `pyarrow.csv` to their Arrow type. Queries whose
+# columns all have one of these types are read with `COPY` by `read_arrow`.
+POSTGRESQL_CSV_TYPE_OIDS = (
+    set(POSTGRESQL_ARROW_TYPES) - {17, 1186}  # bytea, interval
+) | {POSTGRESQL_NUMERIC_OID}
+
+# pandas nullable dtypes of integer and boolean Arrow columns converted to pandas,
+# which hold null values without casting integers to floats or booleans to objects
+ARROW_PANDAS_NULLABLE_DTYPES = {
+    pa.int8(): pd.Int8Dtype(),
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+    pa.uint8(): pd.UInt8Dtype(),
+    pa.uint16(): pd.UInt16Dtype(),
+    pa.uint32(): pd.UInt32Dtype(),
+    pa.uint64(): pd.UInt64Dtype(),
+    pa.bool_(): pd.BooleanDtype(),
+}
+
+# Number of rows fetched and converted to Arrow at a time by `read_arrow`
+ARROW_BATCH_SIZE = 100_000
+
+
+def read_arrow(
+    query: TextClause,
+    con: Connection | Engine,
+    chunksize: Optional[int] = None,
+    params: Optional[dict] = None,
+) -> pa.Table | Iterator[pa.Table]:
+    """Run SQL query on a database and return the result as a `pyarrow.Table`.
+
+    The Arrow types of the columns are given by their PostgreSQL types (see
+    `get_postgresql_arrow_type`), so that they do not depend on the values of each
+    batch.
+
+    On PostgreSQL databases accessed with `psycopg2`, when all columns have a type
+    in `POSTGRESQL_CSV_TYPE_OIDS`, the results are fetched with
+    `COPY (query) TO STDOUT WITH (FORMAT CSV)` into a temporary file, which is
+    parsed column by column by `pyarrow.csv` with the columns' Arrow types, without
+    building Python objects for each value. The session's `TimeZone` and
+    `DateStyle` are set to 'UTC' and 'ISO' for the rest of the current
+    transaction.
+
+    Otherwise, rows are fetched from the database cursor in batches, and each
+    batch is converted column by column to Arrow arrays before the next one is
+    fetched, without building an intermediate `pandas.DataFrame`.
+
+    Args:
+        query (TextClause): query to run
+        con (Connection | Engine): database connection or engine
+        chunksize (Optional[int], optional): If specified, return an iterator of
+          `pyarrow.Table` with `chunksize` rows each. Defaults to None.
+        params (Optional[dict], optional): Parameters to pass to execute method.
+          Defaults to None.
+
+    Returns:
+        pa.Table | Iterator[pa.Table]: Query results
+    """
+    if chunksize:
+        return read_arrow_chunks(query, con, chunksize=chunksize, params=params)
+
+    return pa.concat_tables(
+        read_arrow_chunks(query, con, chunksize=ARROW_BATCH_SIZE, params=params),
+        promote_options="permissive",
+    )
+
+
+def read_arrow_chunks(
+    query: TextClause,
+    con: Connection | Engine,
+    chunksize: int,
+    params: Optional[dict] = None,
+) -> Iterator[pa.Table]:
+    """Generator version of `read_arrow`, yielding `pyarrow.Table` of `chunksize`
+    rows.
+
+    The type of columns whose PostgreSQL type has no Arrow equivalent (see
+    `get_postgresql_arrow_type`) is inferred from the values of each chunk. In
+    chunks where they are all null, these columns take the type inferred in the
+    previous chunks, if any. At least one chunk is yielded, even if the query
+    returns no rows."""
+    connection_context = con.connect() if isinstance(con, Engine) else nullcontext(con)
+    with connection_context as connection:
+        if (connection.dialect.name, connection.dialect.driver) == (
+            "postgresql",
+            "psycopg2",
+        ):
+            sql = postgresql_query_to_sql(query, connection, params)
+            with connection.connection.cursor() as cursor:
+                cursor.execute(f"SELECT * FROM (\n{sql}\n) AS q LIMIT 0")
+                description = cursor.description
+
+            columns = [column.name for column in description]
+            if len(set(columns)) == len(columns) and all(
+                column.type_code in POSTGRESQL_CSV_TYPE_OIDS for column in description
+            ):
+                yield from read_postgresql_csv_chunks(
+                    sql,
+                    connection,
+                    columns=columns,
+                    types=[get_postgresql_arrow_type(column) for column in description],
+                    chunksize=chunksize,
+                )
+                return
+
+        result = connection.execute(query, params or {})
+        columns = list(result.keys())
+        types = [
+            get_postgresql_arrow_type(column) for column in result.cursor.description
+        ]
+        inferred_types = [None] * len(columns)
+        n_chunks = 0
+        for rows in result.partitions(chunksize):
+            chunk = rows_to_arrow_table(rows, columns, types)
+            for i, field in enumerate(chunk.schema):
+                if field.type != pa.null():
+                    inferred_types[i] = inferred_types[i] or field.type
+                elif inferred_types[i]:
+                    chunk = chunk.set_column(
+                        i, field.name, chunk.column(i).cast(inferred_types[i])
+                    )
+            n_chunks += 1
+            yield chunk
+
+        if n_chunks == 0:
+            yield rows_to_arrow_table([], columns, types)
+
+
+def get_postgresql_arrow_type(column) -> Optional[pa.DataType]:
+    """Returns the Arrow type of a column of the results of a PostgreSQL query,
+    given its cursor description, or None if it has no Arrow equivalent.
+
+    `numeric(p, s)` columns with a precision of at most 38 are mapped to
+    `decimal128(p, s)`. Other `numeric` columns, whose precision is not declared or
+    too large, are mapped to `float64`, like `pandas.read_sql` does."""
+    if column.type_code == POSTGRESQL_NUMERIC_OID:
+        if column.precision is not None and 0 < column.precision <= 38:
+            return pa.decimal128(column.precision, column.scale)
+        return pa.float64()
+    return POSTGRESQL_ARROW_TYPES.get(column.type_code)
+
+
+def postgresql_query_to_sql(
+    query: TextClause, connection: Connection, params: Optional[dict] = None
+) -> str:
+    """Returns the SQL of a query to run on a PostgreSQL database through
+    `psycopg2`, with its parameters bound as literals and without trailing
+    semicolon, so that it can be used as a subquery."""
+    compiled = query.compile(dialect=connection.dialect)
+    with connection.connection.cursor() as cursor:
+        sql = cursor.mogrify(str(compiled), compiled.construct_params(params or {}))
+        encoding = psycopg2.extensions.encodings[cursor.connection.encoding]
+    return sql.decode(encoding).strip().rstrip(";")
+
+
+def read_postgresql_csv_chunks(
+    sql: str,
+    connection: Connection,
+    columns: List[str],
+    types: List[pa.DataType],
+    chunksize: int,
+) -> Iterator[pa.Table]:
+    """Runs `sql` on a PostgreSQL database through `psycopg2` with
+    `COPY (sql) TO STDOUT WITH (FORMAT CSV)`, and yields the results as
+    `pyarrow.Table` of `chunksize` rows with the given column names and types,
+    parsed from CSV by `pyarrow.csv`. At least one chunk is yielded, even if the
+    query returns no rows."""
+    schema = pa.schema(zip(columns, types))
+    with tempfile.TemporaryFile() as f:
+        with connection.connection.cursor() as cursor:
+            cursor.execute("SET LOCAL TimeZone TO 'UTC'")
+            cursor.execute("SET LOCAL DateStyle TO 'ISO'")
+            cursor.copy_expert(f"COPY (\n{sql}\n) TO STDOUT WITH (FORMAT CSV)", f)
+
+        if f.tell() == 0:
+            yield schema.empty_table()
+            return
+
+        f.seek(0)
+
+        reader = pcsv.open_csv(
+            f,
+            read_options=pcsv.ReadOptions(column_names=columns),
+            parse_options=pcsv.ParseOptions(newlines_in_values=True),
+            convert_options=pcsv.ConvertOptions(
+                column_types=schema,
+                true_values=["t"],
+                false_values=["f"],
+                # NULL is written as an unquoted empty value, empty strings as ""
+                null_values=[""],
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+
+        batches = []
+        n_rows = 0
+        n_chunks = 0
+        for batch in reader:
+            while batch.num_rows > 0:
+                batch_rows = min(chunksize - n_rows, batch.num_rows)
+                batches.append(batch.slice(0, batch_rows))
+                batch = batch.slice(batch_rows)
+                n_rows += batch_rows
+                if n_rows == chunksize:
+                    n_chunks += 1
+                    yield pa.Table.from_batches(batches, schema=schema)
+                    batches = []
+                    n_rows = 0
+
+        if n_rows > 0 or n_chunks == 0:
+            yield pa.Table.from_batches(batches, schema=schema)
+
+
+def rows_to_arrow_table(
+    rows: Sequence[Sequence],
+    columns: List[str],
+    types: Optional[List[Optional[pa.DataType]]] = None,
+) -> pa.Table:
+    """Builds a `pyarrow.Table` from a sequence of rows, as returned by a database
+    cursor, the corresponding column names and, optionally, their Arrow types.
+    The types of columns whose type is not given are inferred from their
+    values. `decimal.Decimal` values of float columns are converted to floats."""
+    types = types or [None] * len(columns)
+    if rows:
+        arrays = [
+            values_to_arrow_array(values, arrow_type)
+            for values, arrow_type in zip(zip(*rows), types)
+        ]
     else:
-        raise ValueError(f"backend must be 'pandas' or 'geopandas', got {backend}")
+        arrays = [pa.array([], type=arrow_type or pa.null()) for arrow_type in types]
+    return pa.Table.from_arrays(arrays, names=columns)
+
+
+def values_to_arrow_array(
+    values: Sequence, arrow_type: Optional[pa.DataType] = None
+) -> pa.Array:
+    """Builds a `pyarrow.Array` of type `arrow_type` from a sequence of values, or
+    infers its type from the values if `arrow_type` is None."""
+    try:
+        return pa.array(values, type=arrow_type)
+    except pa.ArrowInvalid:
+        if arrow_type is None or not pa.types.is_floating(arrow_type):
+            raise
+        # PostgreSQL `numeric` values are fetched as `decimal.Decimal`
+        return pa.array(
+            [None if value is None else float(value) for value in values],
+            type=arrow_type,
+        )
 
 
 def read_table(
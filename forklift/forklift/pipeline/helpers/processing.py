@@ -1,18 +1,27 @@
 import datetime
 import logging
 import re
+from enum import Enum
 from functools import partial
-from io import StringIO
+from itertools import chain, islice
 from typing import Any, Hashable, List, Optional
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import pytz
 import simplejson
 import sqlalchemy
 from sqlalchemy import select
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 from forklift.pipeline.entities.generic import IdRange
+from forklift.pipeline.utils import select_ids_not_in_table
 
 
 def get_unused_col_name(col_name: str, df: pd.DataFrame) -> str:
@@ -102,11 +111,32 @@ def concatenate_columns(df: pd.DataFrame, input_col_names: List) -> pd.Series:
     Returns:
         pd.Series: resulting Series
     """
-    non_null_rows = df[input_col_names].dropna(how="all")
-    res_non_null_rows = non_null_rows.apply(concatenate_values, axis=1)
-    res = pd.Series(index=df.index, data=[[]] * len(df))
-    res[res_non_null_rows.index] = res_non_null_rows.values
-    return res
+    values = df[input_col_names].to_numpy()
+    n_rows, n_columns = values.shape
+
+    # Give equal values the same code, -1 for null values, and keep the first
+    # occurrence of each non null code in each row (row-major order)
+    codes = pd.factorize(values.ravel())[0]
+    (non_null_positions,) = np.nonzero(codes >= 0)
+    row_numbers = non_null_positions // n_columns
+    _, first_positions = np.unique(
+        row_numbers * (codes.max(initial=0) + 1) + codes[non_null_positions],
+        return_index=True,
+    )
+    positions_to_keep = non_null_positions[np.sort(first_positions)]
+
+    values_to_keep = iter(
+        pd.Series(values.ravel()[positions_to_keep]).astype(object).tolist()
+    )
+    values_per_row = np.bincount(
+        positions_to_keep // n_columns, minlength=n_rows
+    ).tolist()
+
+    return pd.Series(
+        index=df.index,
+        data=[list(islice(values_to_keep, n)) for n in values_per_row],
+        dtype=object,
+    )
 
 
 def coalesce(df: pd.DataFrame) -> pd.Series:
@@ -114,7 +144,8 @@ def coalesce(df: pd.DataFrame) -> pd.Series:
     Combines the input DataFrame's columns into one by taking the non null value in
     each row, in the order of the DataFrame's columns from left to right.
 
-    Returns a pandas Series with the combined results.
+    Returns a pandas Series of dtype `object` with the combined results, and `None`
+    in rows with all null values, whatever the dtypes of the input columns.
 
     Args:
         df (pd.DataFrame): input pandas DataFrame
@@ -123,13 +154,19 @@ def coalesce(df: pd.DataFrame) -> pd.Series:
         pd.Series: Series containing the first non null value in each row of the
         DataFrame, taken in order of the DataFrame's columns from left to right.
     """
-    non_null_rows = df.dropna(how="all")
-    first_non_null_values_idx = np.argmax(non_null_rows.notnull().values, axis=1)
-
-    res_values = np.choose(first_non_null_values_idx, non_null_rows.values.T)
-
-    res = pd.Series(index=df.index, data=[None] * len(df), dtype=object)
-    res[non_null_rows.index] = res_values
+    not_null = df.notna().to_numpy()
+    has_value = not_null.any(axis=1)
+
+    # Values are taken from rows with a non null value only, so that nullable
+    # integer columns give integers rather than floats
+    values = df[has_value].to_numpy()
+    first_non_null_values_idx = np.argmax(not_null[has_value], axis=1)
+    res_values = values[np.arange(len(values)), first_non_null_values_idx]
+
+    # Setting the values in an object Series keeps their type (`astype(object)` would
+    # turn datetime64[ns] values into integers)
+    res = pd.Series(index=df.index, data=np.full(len(df), None), dtype=object)
+    res.iloc[has_value] = res_values
     return res
 
 
@@ -222,26 +259,76 @@ def df_to_dict_series(
           "column_2": value,
      }
 
+    Null values (`None`, `np.nan`, `pd.NaT`...), including those nested in lists and
+    dictionaries, are converted to `None`. Other values are kept as they are (numpy
+    arrays, `Timestamp` objects...), numeric values being converted to python
+    `int` and `float`.
 
     Args:
         df (pd.DataFrame): input DataFrame
         result_colname (str): name of result Series
-        remove_nulls (bool): if set to ``True``, ``null`` values are recursively
-          removed from the dictionaries
+        remove_nulls (bool): if set to ``True``, ``null`` values are removed from
+          the dictionaries
 
     Returns:
         pd.Series: pandas Series
     """
-    res = df.copy(deep=True)
-    json_string = res.to_json(orient="index")
-
-    res = pd.read_json(StringIO(json_string), orient="index", typ="Series")
-    res.name = result_colname
+    columns_values = []
+    for _, column in df.items():
+        values = column.astype(object).where(column.notna(), None).tolist()
+        if column.dtype == object:
+            values = [
+                nested_nulls_to_nones(x) if isinstance(x, (dict, list, tuple)) else x
+                for x in values
+            ]
+        columns_values.append(values)
+
+    columns = list(df.columns)
+    rows = zip(*columns_values) if columns else [()] * len(df)
 
     if remove_nulls:
-        res = res.map(remove_nones_from_dict)
+        records = [
+            {k: v for k, v in zip(columns, row) if v is not None} for row in rows
+        ]
+    else:
+        records = [dict(zip(columns, row)) for row in rows]
+
+    return pd.Series(records, index=df.index, name=result_colname, dtype=object)
+
+
+def nested_nulls_to_nones(x: Any) -> Any:
+    """
+    Recursively replaces null values nested in lists, tuples and dictionaries with
+    `None`. Tuples are converted to lists. Other values are returned as they are.
+
+    Args:
+        x (Any): value
+
+    Returns:
+        Any: value with nested nulls replaced by `None`
+
+    Examples:
+        >>> nested_nulls_to_nones({"a": [1, np.nan, (pd.NaT, 2)], "b": np.nan})
+        {"a": [1, None, [None, 2]], "b": None}
+    """
+    if isinstance(x, dict):
+        return {
+            k: v if type(v) in NON_NULL_SCALAR_TYPES else nested_nulls_to_nones(v)
+            for k, v in x.items()
+        }
+    elif isinstance(x, (list, tuple)):
+        return [
+            v if type(v) in NON_NULL_SCALAR_TYPES else nested_nulls_to_nones(v)
+            for v in x
+        ]
+    elif x is pd.NaT or x is pd.NA or (isinstance(x, float) and x != x):
+        return None
+    else:
+        return x
 
-    return res
+
+# Types of values that can be returned as is by `nested_nulls_to_nones`
+NON_NULL_SCALAR_TYPES = {str, int, bool, type(None)}
 
 
 def zeros_ones_to_bools(x: pd.Series | pd.DataFrame) -> pd.Series | pd.DataFrame:
@@ -348,16 +435,101 @@ def df_values_to_psql_arrays(
     """
 
     serialize = partial(
-        to_pgarr, handle_errors=handle_errors, value_on_error=value_on_error
+        series_values_to_psql_arrays,
+        handle_errors=handle_errors,
+        value_on_error=value_on_error,
+    )
+
+    return df.apply(serialize).fillna("{}")
+
+
+def series_values_to_psql_arrays(
+    s: pd.Series,
+    handle_errors: bool = False,
+    value_on_error: Optional[str] = None,
+) -> pd.Series:
+    """
+    Column-wise equivalent of applying `to_pgarr` to all non null values of a
+    `pandas.Series`. Null values are left as is.
+
+    Instead of serializing values one by one, the list-like values are converted to
+    an Arrow list array in one pass, whose flattened elements are stripped, filtered
+    and joined into one string per value with Arrow's kernels. Only when elements
+    cannot be converted to Arrow strings with the same representation as `str` (sets,
+    floats, mixed types...) are they converted to strings one by one in Python.
+
+    Args:
+        s (pd.Series): Series of list, set or numpy array values
+        handle_errors (bool): if ``True``, uses ``value_on_error`` instead of raising
+          ``ValueError`` for values of an unexpected type
+        value_on_error (Optional[str]): value to use on errors, if ``handle_errors``
+          is ``True``
+
+    Returns:
+        pd.Series: Series of strings with Postgresql array syntax
+    """
+    values = s.to_numpy(dtype=object)
+    is_null = s.isna().to_numpy()
+    is_list = np.fromiter(
+        (isinstance(x, (list, set, np.ndarray)) for x in values),
+        dtype=bool,
+        count=len(values),
+    )
+    is_error = ~(is_list | is_null)
+
+    if is_error.any() and not handle_errors:
+        raise ValueError(f"Unexpected type for x: {type(values[is_error][0])}.")
+
+    lists = values[is_list]
+
+    try:
+        arrow_lists = pa.array(lists)
+        assert pa.types.is_list(arrow_lists.type)
+        value_type = arrow_lists.type.value_type
+        # `str` and Arrow give the same representation of strings and integers only
+        assert (
+            pa.types.is_string(value_type)
+            or pa.types.is_integer(value_type)
+            or pa.types.is_null(value_type)
+        )
+        elements = arrow_lists.values.cast(pa.string())
+        offsets = arrow_lists.offsets.to_numpy()
+    except (pa.ArrowException, OverflowError, AssertionError):
+        elements = pa.array(
+            list(map(str, chain.from_iterable(lists))), type=pa.string()
+        )
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum(
+            np.fromiter(map(len, lists), dtype=np.int64, count=len(lists)),
+            out=offsets[1:],
+        )
+
+    if elements.null_count > 0:
+        # Like `str`, which `to_pgarr` applies to elements, nulls become 'None'
+        elements = pc.fill_null(elements, "None")
+    elements = pc.utf8_trim_whitespace(elements)
+    is_kept = pc.greater(pc.binary_length(elements), 0)
+
+    # Offsets of the lists once empty elements are removed
+    n_kept = np.zeros(len(elements) + 1, dtype=np.int32)
+    np.cumsum(is_kept.to_numpy(zero_copy_only=False), out=n_kept[1:])
+    joined = pc.binary_join(
+        pa.ListArray.from_arrays(n_kept[offsets], elements.filter(is_kept)), ","
     )
+    serialized = pc.binary_join_element_wise("{", joined, "}", "")
 
-    return df.map(serialize, na_action="ignore").fillna("{}")
+    res = s.astype(object).copy()
+    res[is_list] = serialized.to_numpy(zero_copy_only=False)
+    res[is_error] = value_on_error
+    return res
 
 
 def json_converter(x):
     """Converter for types not natively handled by json.dumps"""
     if isinstance(x, np.ndarray):
         return x.tolist()
+    if isinstance(x, (np.number, np.bool_)):
+        return x.item()
     if isinstance(x, pd._libs.tslibs.nattype.NaTType):
         return None
     if isinstance(x, datetime.datetime):
@@ -370,8 +542,34 @@ def json_converter(x):
         return x.isoformat()
 
 
-def to_json(x: Any) -> str:
-    """Converts python object to json string."""
+def to_json(x: Any, backend: str = "simplejson") -> str:
+    """
+    Converts python object to json string.
+
+    Args:
+        x (Any): object to serialize
+        backend (str, optional): json library to use. See `JSON_BACKENDS`.
+          Defaults to "simplejson".
+
+    Returns:
+        str: json string
+    """
+    try:
+        assert backend in JSON_BACKENDS
+    except AssertionError:
+        raise ValueError(f"backend must be one of {list(JSON_BACKENDS)}, got {backend}")
+
+    return JSON_BACKENDS[backend](x)
+
+
+def to_json_simplejson(x: Any) -> str:
+    """
+    Converts python object to json string with `simplejson`.
+
+    numpy integer, float and boolean scalars are serialized as their values, like
+    python `int`, `float` and `bool` (`np.int64(3)` is serialized as `3`, not as
+    `null`).
+    """
 
     res = simplejson.dumps(
         x, ensure_ascii=False, default=json_converter, ignore_nan=True
@@ -380,7 +578,45 @@ def to_json(x: Any) -> str:
     return res
 
 
-def df_values_to_json(df: pd.DataFrame) -> pd.DataFrame:
+def to_json_orjson(x: Any) -> str:
+    """
+    Converts python object to json string with `orjson`, which natively serializes
+    numpy arrays and scalars, NaN (as null) and non-string dict keys much faster than
+    `simplejson`. Dates and datetimes are passed through `json_converter` in order
+    to be serialized exactly like with `simplejson`. Output is compact (no spaces
+    after separators).
+
+    numpy `datetime64` values are the only values serialized differently: `orjson`
+    writes them as ISO strings without timezone, while `simplejson` does not handle
+    them: it writes `null` for `datetime64` scalars and integers for `datetime64[ns]`
+    arrays.
+
+    Objects `orjson` cannot serialize (integers over 64 bits for instance), or all
+    objects if `orjson` is not installed, are serialized with `to_json_simplejson`.
+    """
+    if orjson is None:
+        return to_json_simplejson(x)
+
+    try:
+        return orjson.dumps(x, default=json_converter, option=ORJSON_OPTIONS).decode()
+    except orjson.JSONEncodeError:
+        return to_json_simplejson(x)
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = (
+        orjson.OPT_SERIALIZE_NUMPY
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+
+JSON_BACKENDS = {
+    "simplejson": to_json_simplejson,
+    "orjson": to_json_orjson,
+}
+
+
+def df_values_to_json(df: pd.DataFrame, backend: str = "simplejson") -> pd.DataFrame:
     """
     Returns a `pandas.DataFrame` with all values serialized to json string.
 
@@ -391,12 +627,48 @@ def df_values_to_json(df: pd.DataFrame) -> pd.DataFrame:
 
     Args:
         df (pd.DataFrame): pandas DataFrame
+        backend (str, optional): json library to use. See `JSON_BACKENDS`.
+          Defaults to "simplejson".
 
     Returns:
         pd.DataFrame: pandas DataFrame with the same shape and index, all values
         serialized as json strings.
     """
-    return df.map(to_json, na_action="ignore").fillna("null")
+    return df.apply(series_values_to_json, backend=backend).astype(object)
+
+
+def series_values_to_json(s: pd.Series, backend: str = "simplejson") -> pd.Series:
+    """
+    Column-wise equivalent of serializing all values of a `pandas.Series` with
+    `to_json`, null values being serialized as "null". Numeric and boolean columns
+    are serialized in a single vectorized operation, other columns value by value.
+
+    Args:
+        s (pd.Series): Series
+        backend (str, optional): json library to use. See `JSON_BACKENDS`.
+          Defaults to "simplejson".
+
+    Returns:
+        pd.Series: Series of json strings
+    """
+    try:
+        assert backend in JSON_BACKENDS
+    except AssertionError:
+        raise ValueError(f"backend must be one of {list(JSON_BACKENDS)}, got {backend}")
+
+    values = s.to_numpy()
+
+    if s.dtype == np.bool_:
+        res = np.where(values, "true", "false").astype(object)
+    elif s.dtype.kind in ("i", "u") and isinstance(s.dtype, np.dtype):
+        res = np.array(list(map(str, values.tolist())), dtype=object)
+    elif s.dtype == np.float64:
+        res = np.array(list(map(float.__repr__, values.tolist())), dtype=object)
+        res[~np.isfinite(values)] = "null"
+    else:
+        return s.map(JSON_BACKENDS[backend], na_action="ignore").fillna("null")
+
+    return pd.Series(res, index=s.index, name=s.name)
 
 
 def serialize_nullable_integer_df(df: pd.DataFrame) -> pd.DataFrame:
@@ -411,7 +683,31 @@ def serialize_nullable_integer_df(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: same DataFrame converted to string dtype
     """
-    return df.map(lambda x: str(int(x)), na_action="ignore").where(df.notnull(), None)
+    return df.apply(serialize_nullable_integer_series)
+
+
+def serialize_nullable_integer_series(s: pd.Series) -> pd.Series:
+    """Column-wise version of `serialize_nullable_integer_df` for a single Series.
+    Integer and float columns are serialized in a single vectorized operation.
+
+    Args:
+        s (pd.Series): Series of integers, possibly with None and np.nan values
+
+    Returns:
+        pd.Series: Series of strings, with None for null values
+    """
+    is_null = s.isna().to_numpy()
+    values = s[~is_null].to_numpy()
+    res = np.full(len(s), None, dtype=object)
+
+    if values.dtype.kind in ("i", "u"):
+        res[~is_null] = list(map(str, values.tolist()))
+    elif values.dtype.kind == "f" and (np.abs(values) < 2**63).all():
+        res[~is_null] = list(map(str, values.astype(np.int64).tolist()))
+    else:
+        res[~is_null] = [str(int(x)) for x in values]
+
+    return pd.Series(res, index=s.index, name=s.name)
 
 
 def serialize_timedelta_df(df: pd.DataFrame) -> pd.DataFrame:
@@ -425,7 +721,87 @@ def serialize_timedelta_df(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: same DataFrame converted to string dtype
     """
-    return df.astype("timedelta64[ns]").astype(str).replace(["NaT"], [None])
+    return df.apply(serialize_timedelta_series)
+
+
+# "HH:MM:SS" string of each second of the day, indexed by the number of seconds
+TIMES_OF_DAY = np.array(
+    [
+        f"{h:02d}:{m:02d}:{s:02d}"
+        for h in range(24)
+        for m in range(60)
+        for s in range(60)
+    ],
+    dtype=object,
+)
+
+
+def serialize_timedelta_series(s: pd.Series) -> pd.Series:
+    """Column-wise version of `serialize_timedelta_df` for a single Series. Values
+    are formatted exactly as pandas formats timedeltas as strings
+    ("1 days 02:03:04", "-1 days +23:59:59.500000", or "2 days" if all values are
+    whole days), with None for null values.
+
+    Instead of formatting values one by one, the days and the time of day parts are
+    formatted once for each distinct value and assembled with array operations.
+
+    Args:
+        s (pd.Series): Series of timedeltas
+
+    Returns:
+        pd.Series: Series of strings, with None for null values
+    """
+    td = s.astype("timedelta64[ns]")
+    is_null = td.isna().to_numpy()
+    ns = td.to_numpy()[~is_null].view(np.int64)
+    res = np.full(len(s), None, dtype=object)
+
+    days, day_ns = np.divmod(ns, 86400 * 10**9)
+    unique_days, days_index = np.unique(days, return_inverse=True)
+
+    if not day_ns.any():
+        days_strings = np.array([f"{d} days" for d in unique_days], dtype=object)
+        res[~is_null] = days_strings[days_index]
+        return pd.Series(res, index=s.index, name=s.name)
+
+    days_strings = np.array(
+        [f"{d} days +" if d < 0 else f"{d} days " for d in unique_days], dtype=object
+    )
+    seconds, sub_seconds = np.divmod(day_ns, 10**9)
+    formatted = days_strings[days_index] + TIMES_OF_DAY[seconds]
+
+    has_nanoseconds = sub_seconds % 1000 != 0
+    has_microseconds = (sub_seconds != 0) & ~has_nanoseconds
+    formatted[has_nanoseconds] += [f".{x:09d}" for x in sub_seconds[has_nanoseconds]]
+    formatted[has_microseconds] += [
+        f".{x // 1000:06d}" for x in sub_seconds[has_microseconds]
+    ]
+
+    res[~is_null] = formatted
+    return pd.Series(res, index=s.index, name=s.name)
+
+
+def serialize_enum_series(s: pd.Series) -> pd.Series:
+    """Replaces the Enum members of a Series by their `.value`. Null values are
+    replaced by None.
+
+    Enum members are singletons, so distinct members are found by identity instead
+    of by hashing each value, and each one is converted only once.
+
+    Args:
+        s (pd.Series): Series of Enum members
+
+    Returns:
+        pd.Series: Series of the members' values
+    """
+    values = s.to_numpy(dtype=object)
+    ids = np.fromiter(map(id, values), dtype=np.uint64, count=len(values))
+    _, first_indices, inverse = np.unique(ids, return_index=True, return_inverse=True)
+    converted = np.array(
+        [x.value if isinstance(x, Enum) else None for x in values[first_indices]],
+        dtype=object,
+    )
+    return pd.Series(converted[inverse], index=s.index, name=s.name)
 
 
 def drop_rows_already_in_table(
@@ -435,25 +811,52 @@ def drop_rows_already_in_table(
     table_column_name: str,
     connection: sqlalchemy.engine.base.Connection,
     logger: logging.Logger,
+    strategy: str = "in_list",
 ) -> pd.DataFrame:
     """Removes rows from the input DataFrame `df` in which the column `df_column_name`
     contains values that are already present in the column `table_column_name` of the
-    table `table`, and returns the filtered DataFrame."""
+    table `table`, and returns the filtered DataFrame.
+
+    With `strategy` 'in_list', the ids already present in the table are queried with
+    a `WHERE ... IN (...)` clause listing all the ids of `df` and filtered out
+    client-side. With `strategy` 'temp_table', the ids of `df` are copied into a
+    temporary table and only the new ids are returned by an anti-join on the server,
+    which keeps the query size and the volume of data sent back constant regardless of
+    the number of ids already in the table. The 'temp_table' strategy requires a
+    transaction in progress on `connection`."""
+
+    try:
+        assert strategy in ("in_list", "temp_table")
+    except AssertionError:
+        raise ValueError(f"strategy must be 'in_list' or 'temp_table', got {strategy}")
 
     df_n_rows = len(df)
-    df_ids = tuple(df[df_column_name].unique())
+    df_ids = df[df_column_name].unique()
     df_n_ids = len(df_ids)
 
-    statement = select(getattr(table.c, table_column_name)).where(
-        getattr(table.c, table_column_name).in_(df_ids)
-    )
+    if strategy == "in_list":
+        statement = select(getattr(table.c, table_column_name)).where(
+            getattr(table.c, table_column_name).in_(tuple(df_ids))
+        )
 
-    df_ids_already_in_table = tuple(
-        pd.read_sql(statement, connection)[table_column_name]
-    )
+        df_ids_already_in_table = tuple(
+            pd.read_sql(statement, connection)[table_column_name]
+        )
+
+        # Remove keys already present in the database table from df
+        res = df[~df[df_column_name].isin(df_ids_already_in_table)]
+
+    else:
+        df_ids = df_ids[pd.notna(df_ids)]
+        if len(df_ids) > 0:
+            new_ids = select_ids_not_in_table(
+                df_ids, table, table_column_name, connection
+            )
+        else:
+            new_ids = []
 
-    # Remove keys already present in the database table from df
-    res = df[~df[df_column_name].isin(df_ids_already_in_table)]
+        # Keep rows with new keys, and rows with null keys as with 'in_list'
+        res = df[df[df_column_name].isin(new_ids) | df[df_column_name].isna()]
 
     # Remove possible duplicate ids in df
     res = res[~res[df_column_name].duplicated()]
@@ -481,13 +884,14 @@ def prepare_df_for_loading(
     nullable_integer_columns: list = None,
     timedelta_columns: list = None,
     enum_columns: list = None,
+    json_backend: str = "simplejson",
 ):
     df_ = df.copy(deep=True)
 
     # Serialize columns to be loaded into JSONB columns
     if jsonb_columns:
         logger.info("Serializing json columns")
-        df_[jsonb_columns] = df_values_to_json(df_[jsonb_columns])
+        df_[jsonb_columns] = df_values_to_json(df_[jsonb_columns], backend=json_backend)
 
     # Serialize columns to be loaded into Postgres ARRAY columns
     if pg_array_columns:
@@ -512,7 +916,7 @@ def prepare_df_for_loading(
     if enum_columns:
         logger.info("Serializing enum columns")
         for enum_column in enum_columns:
-            df_[enum_column] = df_[enum_column].map(lambda x: x.value if x else None)
+            df_[enum_column] = serialize_enum_series(df_[enum_column])
 
     return df_
 
@@ -582,66 +986,72 @@ def join_on_multiple_keys(
     """
 
     joins = []
-    left = left.copy(deep=True)
-    right = right.copy(deep=True)
     common_columns = set.intersection(set(left.columns), set(right.columns))
-    keys_already_joined = set()
+    keys_already_joined = []
     and_join_keys = [] if and_join_keys is None else and_join_keys
     left_cols = list(left)
     right_cols = list(right)
+    left_row_number = get_unused_col_name("left_row_number", left)
+    right_row_number = get_unused_col_name("right_row_number", right)
+    left_matched = np.zeros(len(left), dtype=bool)
+    right_matched = np.zeros(len(right), dtype=bool)
 
-    # Number rows for future use
-    if how in ("left", "outer"):
-        left_id = get_unused_col_name("left_row_number", left)
-        left[left_id] = range(len(left))
-
-    if how in ("right", "outer"):
-        right_id = get_unused_col_name("right_row_number", right)
-        right[right_id] = range(len(right))
-
-    # Attempt to perform the join successively on each key
+    # Attempt to perform the join successively on each key. Only the key columns and
+    # row numbers are joined, the other columns are gathered once rows are matched.
     for or_join_key in or_join_keys:
         join_keys = and_join_keys + [or_join_key]
 
-        right_with_keys = right.dropna(subset=join_keys)
-        left_with_keys = left.dropna(subset=join_keys)
-
-        join = pd.merge(
-            left_with_keys,
-            right_with_keys,
+        matches = pd.merge(
+            left[join_keys].assign(**{left_row_number: range(len(left))}).dropna(),
+            right[join_keys].assign(**{right_row_number: range(len(right))}).dropna(),
             on=join_keys,
             how="inner",
-            suffixes=("_left", "_right"),
         )
-
-        columns_to_merge = common_columns - set(join_keys)
-
-        for column_to_merge in columns_to_merge:
-            [l, r] = [f"{column_to_merge}_left", f"{column_to_merge}_right"]
-
-            if column_to_merge in keys_already_joined:
-                join = join[(join[r].isna()) | (join[l].isna())]
-
-            if coalesce_common_columns:
-                join[column_to_merge] = coalesce(join[[l, r]])
-            else:
-                join[column_to_merge] = join[l]
-
-            join = join.drop(columns=[l, r])
-
-        keys_already_joined.add(or_join_key)
-
-        joins.append(join)
+        left_rows = matches[left_row_number].to_numpy()
+        right_rows = matches[right_row_number].to_numpy()
+
+        # Rows must not match on higher priority keys that are non null on both sides
+        keep = np.ones(len(matches), dtype=bool)
+        for key in keys_already_joined:
+            if key in common_columns and key not in join_keys:
+                keep &= (
+                    left[key].isna().to_numpy()[left_rows]
+                    | right[key].isna().to_numpy()[right_rows]
+                )
+        left_rows = left_rows[keep]
+        right_rows = right_rows[keep]
+
+        left_matched[left_rows] = True
+        right_matched[right_rows] = True
+
+        join = {}
+        for col in left_cols:
+            left_values = left[col].iloc[left_rows].reset_index(drop=True)
+            if col in common_columns and col not in join_keys:
+                right_values = right[col].iloc[right_rows].reset_index(drop=True)
+                if coalesce_common_columns:
+                    left_values = coalesce(
+                        pd.DataFrame({"left": left_values, "right": right_values})
+                    )
+            join[col] = left_values
+
+        for col in right_cols:
+            if col not in common_columns:
+                join[col] = right[col].iloc[right_rows].reset_index(drop=True)
+
+        keys_already_joined.append(or_join_key)
+
+        joins.append(pd.DataFrame(join))
 
     # Concatenate all join results
     res = pd.concat(joins, axis=0)
 
     # Add unmatched rows if performing left, right or outer joins
     if how in ("left", "outer"):
-        res = pd.concat([res, left.loc[~left[left_id].isin(res[left_id])]], axis=0)
+        res = pd.concat([res, left.loc[~left_matched]], axis=0)
 
     if how in ("right", "outer"):
-        res = pd.concat([res, right.loc[~right[right_id].isin(res[right_id])]], axis=0)
+        res = pd.concat([res, right.loc[~right_matched]], axis=0)
 
     res.index = np.arange(0, len(res))
 
@@ -689,23 +1099,65 @@ def left_isin_right_by_decreasing_priority(
 
     assert list(left) == list(right)
 
-    left = left.copy(deep=True)
-    right = right.copy(deep=True)
-    cols = list(left)
-
-    id_col = get_unused_col_name("id", left)
-    left[id_col] = np.arange(len(left))
+    # Factorize left and right values together so that equal values get equal codes
+    codes = np.stack(
+        [
+            pd.factorize(pd.concat([left[col], right[col]], ignore_index=True))[0]
+            for col in left
+        ],
+        axis=1,
+    )
 
-    isin_right_col = get_unused_col_name("isin_right", right)
-    right[isin_right_col] = True
+    res = codes_isin_by_decreasing_priority(codes[: len(left)], codes[len(left) :])
 
-    res = join_on_multiple_keys(left, right, or_join_keys=cols, how="left")
-    res = (
-        res.drop_duplicates(subset=[id_col])
-        .sort_values(id_col)[isin_right_col]
-        .fillna(False)
+    return pd.Series(
+        res, index=left.index, name=get_unused_col_name("isin_right", right)
     )
-    res.index = left.index
+
+
+def codes_isin_by_decreasing_priority(
+    left_codes: np.ndarray, right_codes: np.ndarray
+) -> np.ndarray:
+    """
+    Equivalent of `left_isin_right_by_decreasing_priority` on 2D arrays of integer
+    codes (as returned by `pandas.factorize`, with -1 for null values), with one row
+    per row and one column per key by decreasing priority.
+
+    For each key, right rows are split into sets of codes according to which keys of
+    higher priority they have values on, and left rows are tested for membership in
+    the set of right rows that have no value on the higher priority keys on which
+    the left rows have a value.
+
+    Args:
+        left_codes (np.ndarray): 2D array of codes of shape (n_left, n_keys)
+        right_codes (np.ndarray): 2D array of codes of shape (n_right, n_keys)
+
+    Returns:
+        np.ndarray: 1D boolean array of length n_left
+    """
+    n_keys = left_codes.shape[1]
+    left_not_null = left_codes >= 0
+    right_not_null = right_codes >= 0
+
+    # Bit k of a row's mask is set if the row has a non null value on key k
+    weights = 1 << np.arange(n_keys, dtype=np.int64)
+    left_masks = left_not_null.astype(np.int64) @ weights
+    right_masks = right_not_null.astype(np.int64) @ weights
+
+    res = np.zeros(len(left_codes), dtype=bool)
+
+    for key in range(n_keys):
+        higher_priority_keys = (1 << key) - 1
+        left_key_masks = left_masks & higher_priority_keys
+        left_rows_with_key = left_not_null[:, key] & ~res
+        right_rows_with_key = right_not_null[:, key]
+
+        for mask in np.unique(left_key_masks[left_rows_with_key]):
+            left_rows = left_rows_with_key & (left_key_masks == mask)
+            right_rows = right_rows_with_key & ((right_masks & mask) == 0)
+            res[left_rows] = np.isin(
+                left_codes[left_rows, key], right_codes[right_rows, key]
+            )
 
     return res
 
@@ -757,27 +1209,32 @@ def drop_duplicates_by_decreasing_priority(
     except AssertionError:
         raise TypeError("`subset` must not be empty.")
 
-    if len(subset) == 1:
-        res = df.dropna(subset=subset).drop_duplicates(subset=subset)
+    n_keys = len(subset)
+    codes = np.stack([pd.factorize(df[key])[0] for key in subset], axis=1)
+    not_null = codes >= 0
 
-    else:
-        first_key_not_null = df.dropna(subset=[subset[0]]).drop_duplicates(
-            subset=[subset[0]]
-        )
+    # Each row belongs to the level of its highest priority non null key. Rows with
+    # all null keys have level `n_keys` and are dropped.
+    levels = np.where(not_null.any(axis=1), not_null.argmax(axis=1), n_keys)
 
-        first_key_null = drop_duplicates_by_decreasing_priority(
-            df[df[subset[0]].isna()], subset=subset[1:]
-        )
+    # First rows of each distinct key value in higher priority levels
+    representatives = np.array([], dtype=np.int64)
+    rows_to_keep = []
 
-        first_key_null = first_key_null[
-            ~left_isin_right_by_decreasing_priority(
-                first_key_null[subset], first_key_not_null[subset]
-            )
-        ]
+    for level in range(n_keys):
+        level_rows = np.flatnonzero(levels == level)
+        _, first_rows = np.unique(codes[level_rows, level], return_index=True)
+        level_rows = level_rows[np.sort(first_rows)]
 
-        res = pd.concat([first_key_not_null, first_key_null])
+        # Rows which match the first row of a higher priority level are duplicates
+        is_duplicate = codes_isin_by_decreasing_priority(
+            codes[level_rows], codes[representatives]
+        )
 
-    return res
+        rows_to_keep.append(level_rows[~is_duplicate])
+        representatives = np.concatenate([representatives, level_rows])
+
+    return df.iloc[np.concatenate(rows_to_keep)]
 
 
 def try_get_factory(key: Hashable, error_value: Any = None):
@@ -838,26 +1295,18 @@ def array_equals_row_on_window(
         array([nan,  1.,  0.,  0.,  1.])
     """
 
-    n_rows, n_columns = arr.shape
-
-    # When the sliding window has more rows that the input array, return all nulls
-    if n_rows < window_length:
-        res = np.array([np.nan] * n_rows)
-
-    else:
-        strides = np.lib.stride_tricks.sliding_window_view(
-            arr, (window_length, n_columns)
-        )
-
-        res = (strides == row).all(axis=(1, 2, 3))
-
-        number_na_rows_to_add = window_length - 1
+    n_rows = len(arr)
+    row_numbers = np.arange(n_rows)
+    rows_equal = (arr == row).all(axis=1)
 
-        na_rows_to_add = np.array([np.nan] * number_na_rows_to_add)
+    # Number of consecutive rows equal to `row` up to and including each row
+    last_different_row = np.maximum.accumulate(np.where(rows_equal, -1, row_numbers))
+    run_lengths = row_numbers - last_different_row
 
-        res = np.concatenate((na_rows_to_add, res))
+    res = (run_lengths >= window_length).astype(float)
+    res[: window_length - 1] = np.nan
 
-    return res.astype(float)
+    return res
 
 
 def back_propagate_ones(arr: np.array, steps: int) -> np.array:
@@ -880,14 +1329,22 @@ def back_propagate_ones(arr: np.array, steps: int) -> np.array:
     """
     if steps == 0:
         return arr
-    else:
-        previous_step = back_propagate_ones(np.append(arr[1:], np.nan), steps - 1)
-        tmp = np.concatenate((arr[:, None], previous_step[:, None]), axis=1)
 
-        ones = np.equal(tmp, 1).any(axis=1)
-        nans = np.isnan(tmp).any(axis=1)
-        res = np.where((nans & (~ones)), np.nan, ones)
-        return res
+    # The result on each element depends on the `steps` + 1 elements starting at this
+    # element, elements beyond the end of the array being unknown (`np.nan`).
+    n = len(arr)
+    indices = np.arange(n)
+    window_ends = indices + steps
+    no_index = n + steps
+    next_one = np.minimum.accumulate(np.where(arr == 1, indices, no_index)[::-1])[::-1]
+    next_nan = np.minimum.accumulate(np.where(np.isnan(arr), indices, no_index)[::-1])[
+        ::-1
+    ]
+
+    ones = next_one <= window_ends
+    nans = (next_nan <= window_ends) | (window_ends >= n)
+    res = np.where((nans & (~ones)), np.nan, ones)
+    return res
 
 
 def rows_belong_to_sequence(
@@ -940,38 +1397,54 @@ def rows_belong_to_sequence(
         >>> rows_belong_to_sequence(arr, row, 2)
         array([nan,  0.,  0.,  1.,  1., 0.])
     """
-    ends_of_sequences = array_equals_row_on_window(
-        arr,
-        row,
-        window_length=window_length,
+    n_rows = len(arr)
+    row_numbers = np.arange(n_rows)
+    rows_equal = (arr == row).all(axis=1)
+
+    # Rows before the beginning and after the end of the array might be equal to `row`
+    padding = np.full(window_length - 1, (row == row).all())
+    extended_rows_equal = np.concatenate((padding, rows_equal, padding))
+
+    rows_known = rows_equal & (get_run_lengths(rows_equal) >= window_length)
+    rows_maybe = (
+        extended_rows_equal & (get_run_lengths(extended_rows_equal) >= window_length)
+    )[window_length - 1 : window_length - 1 + n_rows]
+
+    # Rows that would belong to a sequence only if the rows outside the array are
+    # equal to `row` are unknown
+    rows_unknown = (
+        rows_maybe
+        & ~rows_known
+        & ((row_numbers < window_length - 1) | (row_numbers > n_rows - window_length))
     )
 
-    rows_known = back_propagate_ones(ends_of_sequences, steps=window_length - 1)
+    res = np.where(rows_unknown, np.nan, rows_maybe.astype(float))
 
-    # To test if rows at the beginning and at the end of the array could possibly
-    # belong to a sequence `row` exceeding the boundaries of the array, we add rows to
-    # the array and test again
-    extended_arr = np.concatenate(
-        (
-            row * np.ones((window_length - 1, len(row))),
-            arr,
-            row * np.ones((window_length - 1, len(row))),
-        )
-    )
+    return res
 
-    ends_of_sequences_extended = array_equals_row_on_window(
-        extended_arr,
-        row,
-        window_length=window_length,
-    )
 
-    rows_maybe = back_propagate_ones(
-        ends_of_sequences_extended, steps=window_length - 1
-    )[window_length - 1 : -(window_length - 1)]
+def get_run_lengths(arr: np.array) -> np.array:
+    """
+    Returns, for each element of a 1D array, the length of the run of consecutive
+    equal values it belongs to.
 
-    res = np.where(np.isnan(rows_known) & rows_maybe.astype(bool), np.nan, rows_maybe)
+    Args:
+        arr (np.array): 1D numpy array
 
-    return res
+    Returns:
+        np.array: 1D integer array of the same length as the input array
+
+    Examples:
+        >>> get_run_lengths(np.array([True, True, False, True, True, True]))
+        array([2, 2, 1, 3, 3, 3])
+    """
+    n = len(arr)
+    if n == 0:
+        return np.array([], dtype=np.int64)
+
+    run_starts = np.flatnonzero(np.concatenate(([True], arr[1:] != arr[:-1])))
+    run_lengths = np.diff(np.append(run_starts, n))
+    return np.repeat(run_lengths, run_lengths)
 
 
 def get_matched_groups(string: str, regex: re.Pattern) -> pd.Series:
@@ -1008,17 +1481,30 @@ def get_matched_groups(string: str, regex: re.Pattern) -> pd.Series:
     return result
 
 
-def get_id_ranges(ids: List[int | str], batch_size: int) -> List[IdRange]:
+def get_id_ranges(
+    ids: List[int | str], batch_size: int, weights: Optional[List[float]] = None
+) -> List[IdRange]:
     """
     Takes a list of integer ids and returns a list of `IdRange` object representing
     groups of `batch_size` ids (except the last one which may contain less that
     `batch_size` idw).
 
+    If `weights` are given, ids are grouped by total weight instead of number of ids,
+    so that batches represent an equal amount of work : each id is put in the group
+    in which its cumulated weight (the sum of the weights of the ids that come before
+    it) falls, groups having a total weight of `batch_size` each. A group's total
+    weight may therefore exceed `batch_size` by less than the weight of its last id,
+    and ids with a weight larger than `batch_size` get a group of their own. Groups
+    with no ids are not returned.
+
     The input list is assumed to be sorted according to the relevant collation.
 
     Args:
         ids (list): list of integer or string ids
-        ids_per_group (int): positive integer
+        batch_size (int): positive integer
+        weights (List[float], optional): non negative weights of the ids, for
+          instance the number of rows to process for each id. If given, must have the
+          same length as `ids`. Defaults to None.
 
     Returns:
         List[IdRange]
@@ -1031,9 +1517,123 @@ def get_id_ranges(ids: List[int | str], batch_size: int) -> List[IdRange]:
     else:
         assert isinstance(ids[0], int | str)
 
-    if len(ids) <= batch_size:
-        return [IdRange(id_min=ids[0], id_max=ids[-1])]
+    if weights is None:
+        first_indices = np.arange(0, len(ids), batch_size)
+    else:
+        weights = np.asarray(weights, dtype=float)
+        assert weights.shape == (len(ids),)
+        assert (weights >= 0).all()
+        cumulated_weights = np.cumsum(weights) - weights
+        batch_numbers = (cumulated_weights // batch_size).astype(np.int64)
+        first_indices = np.flatnonzero(np.diff(batch_numbers, prepend=-1))
+
+    last_indices = np.append(first_indices[1:] - 1, len(ids) - 1)
+
+    return [
+        IdRange(id_min=ids[first], id_max=ids[last])
+        for first, last in zip(first_indices.tolist(), last_indices.tolist())
+    ]
+
+
+def get_sub_ranges(
+    min_value: int | datetime.date | datetime.datetime,
+    max_value: int | datetime.date | datetime.datetime,
+    n_splits: int,
+) -> List[tuple]:
+    """
+    Splits the half-open interval [`min_value`, `max_value`) into `n_splits`
+    contiguous, non-overlapping half-open intervals of (approximately) equal size,
+    returned as a list of `(lower_bound, upper_bound)` tuples. Empty intervals, which
+    happen when the input interval is too small to be split `n_splits` times (less
+    than `n_splits` integers or days), are removed.
 
-    return [IdRange(id_min=ids[0], id_max=ids[batch_size - 1])] + get_id_ranges(
-        ids=ids[batch_size:], batch_size=batch_size
-    )
+    Args:
+        min_value (int | datetime.date | datetime.datetime): lower bound (included)
+        max_value (int | datetime.date | datetime.datetime): upper bound (excluded)
+        n_splits (int): positive integer
+
+    Returns:
+        List[tuple]: list of `(lower_bound, upper_bound)` sub-ranges
+
+    Examples:
+        >>> get_sub_ranges(0, 10, 3)
+        [(0, 3), (3, 6), (6, 10)]
+        >>> get_sub_ranges(datetime.date(2020, 1, 1), datetime.date(2020, 1, 3), 3)
+        [(datetime.date(2020, 1, 1), datetime.date(2020, 1, 2)),
+         (datetime.date(2020, 1, 2), datetime.date(2020, 1, 3))]
+    """
+    assert isinstance(n_splits, int)
+    assert n_splits > 0
+
+    if isinstance(min_value, int):
+        bounds = [
+            min_value + (max_value - min_value) * i // n_splits for i in range(n_splits)
+        ]
+    elif isinstance(min_value, (datetime.date, datetime.datetime)):
+        bounds = [
+            min_value + (max_value - min_value) * i / n_splits for i in range(n_splits)
+        ]
+    else:
+        raise ValueError(
+            f"Cannot split ranges of values of type {type(min_value)}, expected int, "
+            "date or datetime."
+        )
+
+    bounds.append(max_value)
+
+    return [
+        (lower, upper) for lower, upper in zip(bounds[:-1], bounds[1:]) if lower < upper
+    ]
+
+
+def clickhouse_type_to_arrow_type(clickhouse_type: str) -> Optional[pa.DataType]:
+    """
+    Returns the Arrow type that holds the values of a Clickhouse type most
+    compactly, or None if there is no better type than the one of query results
+    (strings, dates, arrays...) :
+
+      - `LowCardinality(String)` and `LowCardinality(Nullable(String))` map to
+        dictionary-encoded strings, which Clickhouse loads directly into
+        `LowCardinality` columns
+      - `Int32` and `Nullable(Int32)` map to `int32` (and likewise for all integer
+        types)
+      - `Float32` and `Nullable(Float32)` map to `float32`, `Float64` and
+        `Nullable(Float64)` map to `float64`
+      - `Bool` and `Nullable(Bool)` map to `bool`
+
+    Arrow arrays can hold nulls whatever their type, so null values of columns that
+    are not `Nullable` in Clickhouse are kept as nulls rather than raising an error
+    or being replaced with a default value.
+
+    Args:
+        clickhouse_type (str): Clickhouse type, as in `system.columns`
+
+    Returns:
+        Optional[pa.DataType]: Arrow type
+
+    Examples:
+        >>> clickhouse_type_to_arrow_type("LowCardinality(Nullable(String))")
+        DictionaryType(dictionary<values=string, indices=int32, ordered=0>)
+        >>> clickhouse_type_to_arrow_type("UInt16")
+        DataType(uint16)
+        >>> clickhouse_type_to_arrow_type("DateTime")
+    """
+    low_cardinality = re.fullmatch(r"LowCardinality\((.*)\)", clickhouse_type)
+    if low_cardinality:
+        if low_cardinality.group(1) in ("String", "Nullable(String)"):
+            return pa.dictionary(pa.int32(), pa.string())
+        clickhouse_type = low_cardinality.group(1)
+
+    nullable = re.fullmatch(r"Nullable\((.*)\)", clickhouse_type)
+    base_type = nullable.group(1) if nullable else clickhouse_type
+
+    integer = re.fullmatch(r"(U?)Int(8|16|32|64)", base_type)
+    if integer:
+        unsigned, bits = integer.groups()
+        return pa.type_for_alias(f"{unsigned.lower()}int{bits}")
+    elif base_type in ("Float32", "Float64"):
+        return pa.type_for_alias(base_type.lower())
+    elif base_type == "Bool":
+        return pa.bool_()
+    else:
+        return None
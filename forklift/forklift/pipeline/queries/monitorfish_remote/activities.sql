@@ -37,8 +37,8 @@ dels_targeting_lans AS (
    ON del.referenced_report_id = lan_reports.report_id
    WHERE
         del.operation_type = 'DEL'
-        AND del.operation_datetime_utc >= :min_date
-        AND del.operation_datetime_utc < :max_date + INTERVAL '3 months'
+        AND del.operation_datetime_utc >= :period_min_date
+        AND del.operation_datetime_utc < :period_max_date + INTERVAL '3 months'
 ),
 
 cors_targeting_lans AS (
@@ -48,8 +48,8 @@ cors_targeting_lans AS (
    ON cor.referenced_report_id = lan_reports.report_id
    WHERE
         cor.operation_type = 'COR'
-        AND cor.operation_datetime_utc >= :min_date
-        AND cor.operation_datetime_utc < :max_date + INTERVAL '3 months'
+        AND cor.operation_datetime_utc >= :period_min_date
+        AND cor.operation_datetime_utc < :period_max_date + INTERVAL '3 months'
 
 ),
 
@@ -57,8 +57,8 @@ acknowledged_report_ids AS (
    SELECT DISTINCT referenced_report_id
    FROM logbook_reports
    WHERE
-       operation_datetime_utc >= :min_date
-       AND operation_datetime_utc < :max_date + INTERVAL '3 months'
+       operation_datetime_utc >= :period_min_date
+       AND operation_datetime_utc < :period_max_date + INTERVAL '3 months'
        AND operation_type = 'RET'
        AND value->>'returnStatus' = '000'
        AND referenced_report_id IN (
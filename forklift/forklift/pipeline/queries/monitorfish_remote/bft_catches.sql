@@ -34,25 +34,29 @@ SELECT del.referenced_report_id, del.operation_number, far_reports.flag_state
    JOIN far_reports
    ON del.referenced_report_id = far_reports.report_id
    WHERE
-        del.operation_datetime_utc >= :min_date
-        AND del.operation_datetime_utc < :max_date + INTERVAL '1 week'
+        del.operation_datetime_utc >= :period_min_date
+        AND del.operation_datetime_utc < :period_max_date + INTERVAL '1 week'
         AND del.operation_type = 'DEL'
 ),
 
 cors_targeting_fars AS (
    SELECT cor.referenced_report_id, cor.report_id, cor.flag_state
-   FROM far_reports cor
+   FROM logbook_reports cor
    JOIN far_reports
    ON cor.referenced_report_id = far_reports.report_id
-   WHERE cor.operation_type = 'COR'
+   WHERE
+        cor.operation_datetime_utc >= :period_min_date
+        AND cor.operation_datetime_utc < :period_max_date
+        AND cor.operation_type = 'COR'
+        AND cor.log_type = 'FAR'
 ),
 
 acknowledged_report_ids AS (
    SELECT DISTINCT referenced_report_id
    FROM logbook_reports
    WHERE
-       operation_datetime_utc >= :min_date
-       AND operation_datetime_utc < :max_date + INTERVAL '1 week'
+       operation_datetime_utc >= :period_min_date
+       AND operation_datetime_utc < :period_max_date + INTERVAL '1 week'
        AND operation_type = 'RET'
        AND value->>'returnStatus' = '000'
        AND referenced_report_id IN (
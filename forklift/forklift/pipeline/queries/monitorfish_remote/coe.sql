@@ -36,7 +36,11 @@ WITH coes AS (
     WHERE
         operation_datetime_utc >= :min_date AND
         operation_datetime_utc < :max_date AND
-        log_type IN ('COE', 'NOT-COE')
+        log_type IN ('COE', 'NOT-COE') AND
+        (
+            CAST(:report_ids AS VARCHAR[]) IS NULL OR
+            report_id = ANY(CAST(:report_ids AS VARCHAR[]))
+        )
 ),
 
 coe_reports AS (SELECT DISTINCT report_id, referenced_report_id, operation_type, flag_state FROM coes),
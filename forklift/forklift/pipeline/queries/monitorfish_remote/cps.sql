@@ -28,7 +28,11 @@ WITH cpss AS (
     WHERE
         operation_datetime_utc >= :min_date AND
         operation_datetime_utc < :max_date AND
-        log_type = 'CPS'
+        log_type = 'CPS' AND
+        (
+            CAST(:report_ids AS VARCHAR[]) IS NULL OR
+            report_id = ANY(CAST(:report_ids AS VARCHAR[]))
+        )
 ),
 
 cps_reports AS (SELECT DISTINCT report_id, referenced_report_id, operation_type, flag_state FROM cpss),
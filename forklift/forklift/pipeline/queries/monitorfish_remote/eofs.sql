@@ -19,7 +19,11 @@ WITH eofs AS (
     WHERE
         operation_datetime_utc >= :min_date AND
         operation_datetime_utc < :max_date AND
-        log_type = 'EOF'
+        log_type = 'EOF' AND
+        (
+            CAST(:report_ids AS VARCHAR[]) IS NULL OR
+            report_id = ANY(CAST(:report_ids AS VARCHAR[]))
+        )
 ),
 
 eof_reports AS (SELECT DISTINCT report_id, referenced_report_id, operation_type, flag_state FROM eofs),
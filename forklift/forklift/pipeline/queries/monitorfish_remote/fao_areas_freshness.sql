@@ -0,0 +1,18 @@
+-- Cheap probe of changes in the tables queried by fao_areas.sql, used as freshness check
+-- of the cached query results : number of rows and checksum of the contents of
+-- each table, which does not depend on the order of the rows
+SELECT
+    'facade_areas_subdivided' AS table_name,
+    COUNT(*) AS n_rows,
+    md5(string_agg(md5(t::text), '' ORDER BY md5(t::text))) AS checksum
+FROM facade_areas_subdivided t
+
+UNION ALL
+
+SELECT
+    'fao_areas' AS table_name,
+    COUNT(*) AS n_rows,
+    md5(string_agg(md5(t::text), '' ORDER BY md5(t::text))) AS checksum
+FROM fao_areas t
+
+ORDER BY table_name
@@ -34,7 +34,11 @@ WITH lans AS (
     WHERE
         operation_datetime_utc >= :min_date AND
         operation_datetime_utc < :max_date AND
-        log_type = 'LAN'
+        log_type = 'LAN' AND
+        (
+            CAST(:report_ids AS VARCHAR[]) IS NULL OR
+            report_id = ANY(CAST(:report_ids AS VARCHAR[]))
+        )
 ),
 
 lan_reports AS (SELECT DISTINCT report_id, referenced_report_id, operation_type, flag_state FROM lans),
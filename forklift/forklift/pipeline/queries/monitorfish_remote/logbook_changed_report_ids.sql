@@ -0,0 +1,40 @@
+-- Reports of type :log_types sent between :min_date and :max_date which are either
+-- new since :since, or targeted by DEL, COR or RET messages received since :since
+WITH new_messages AS (
+    SELECT report_id, referenced_report_id, operation_type
+    FROM logbook_reports
+    WHERE
+        operation_datetime_utc >= :since
+        AND operation_datetime_utc < :max_date + INTERVAL '3 months'
+),
+
+acknowledged_messages AS (
+    -- Messages (DAT, COR or DEL) acknowledged by new RET messages
+    SELECT m.report_id, m.referenced_report_id
+    FROM logbook_reports m
+    JOIN new_messages ret
+    ON
+        ret.referenced_report_id = m.report_id
+        OR ret.referenced_report_id = m.operation_number
+    WHERE
+        ret.operation_type = 'RET'
+        AND m.operation_datetime_utc >= :min_date
+        AND m.operation_datetime_utc < :max_date + INTERVAL '3 months'
+)
+
+SELECT DISTINCT report_id
+FROM logbook_reports
+WHERE
+    operation_datetime_utc >= :min_date
+    AND operation_datetime_utc < :max_date
+    AND log_type = ANY(CAST(:log_types AS VARCHAR[]))
+    AND report_id IN (
+        SELECT report_id FROM new_messages
+        UNION ALL
+        SELECT referenced_report_id FROM new_messages
+        UNION ALL
+        SELECT report_id FROM acknowledged_messages
+        UNION ALL
+        SELECT referenced_report_id FROM acknowledged_messages
+    )
+ORDER BY report_id
@@ -0,0 +1,9 @@
+SELECT
+    operation_datetime_utc,
+    report_id
+FROM logbook_reports
+WHERE
+    operation_datetime_utc >= :min_date
+    AND operation_datetime_utc < :max_date + INTERVAL '3 months'
+ORDER BY operation_datetime_utc DESC, report_id DESC
+LIMIT 1
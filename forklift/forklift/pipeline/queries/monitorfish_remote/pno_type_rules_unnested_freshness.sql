@@ -0,0 +1,18 @@
+-- Cheap probe of changes in the tables queried by pno_type_rules_unnested.sql, used as freshness check
+-- of the cached query results : number of rows and checksum of the contents of
+-- each table, which does not depend on the order of the rows
+SELECT
+    'pno_type_rules' AS table_name,
+    COUNT(*) AS n_rows,
+    md5(string_agg(md5(t::text), '' ORDER BY md5(t::text))) AS checksum
+FROM pno_type_rules t
+
+UNION ALL
+
+SELECT
+    'pno_types' AS table_name,
+    COUNT(*) AS n_rows,
+    md5(string_agg(md5(t::text), '' ORDER BY md5(t::text))) AS checksum
+FROM pno_types t
+
+ORDER BY table_name
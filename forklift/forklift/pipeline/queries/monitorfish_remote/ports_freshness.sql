@@ -0,0 +1,18 @@
+-- Cheap probe of changes in the tables queried by ports.sql, used as freshness check
+-- of the cached query results : number of rows and checksum of the contents of
+-- each table, which does not depend on the order of the rows
+SELECT
+    'land_areas_subdivided' AS table_name,
+    COUNT(*) AS n_rows,
+    md5(string_agg(md5(t::text), '' ORDER BY md5(t::text))) AS checksum
+FROM land_areas_subdivided t
+
+UNION ALL
+
+SELECT
+    'ports' AS table_name,
+    COUNT(*) AS n_rows,
+    md5(string_agg(md5(t::text), '' ORDER BY md5(t::text))) AS checksum
+FROM ports t
+
+ORDER BY table_name
@@ -26,7 +26,11 @@ WITH rtps AS (
     WHERE
         operation_datetime_utc >= :min_date AND
         operation_datetime_utc < :max_date AND
-        log_type = 'RTP'
+        log_type = 'RTP' AND
+        (
+            CAST(:report_ids AS VARCHAR[]) IS NULL OR
+            report_id = ANY(CAST(:report_ids AS VARCHAR[]))
+        )
 ),
 
 rtp_reports AS (SELECT DISTINCT report_id, referenced_report_id, operation_type, flag_state FROM rtps),
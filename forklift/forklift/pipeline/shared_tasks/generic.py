@@ -92,6 +92,45 @@ def drop_table_if_exists(database: str, table: str):
     run_sql_script(sql=sql, parameters={"database": database, "table": table})
 
 
+@task(checkpoint=False)
+def replace_table_with_staging_table(database: str, table: str, staging_table: str):
+    """
+    Replaces designated table with a staging table in one atomic
+    `EXCHANGE TABLES`, so that the table is never missing or partially loaded, then
+    drops the staging table, which holds the previous data of the table after the
+    exchange. If the table does not exist yet, it is first created empty with the
+    structure of the staging table.
+
+    Args:
+        database (str): Database name in data_warehouse.
+        table (str): Name of the table to replace.
+        staging_table (str): Name of the table to replace it with, in the same
+          database.
+    """
+    parameters = {"database": database, "table": table, "staging_table": staging_table}
+    run_sql_script(
+        sql=(
+            "CREATE TABLE IF NOT EXISTS {database:Identifier}.{table:Identifier} "
+            "AS {database:Identifier}.{staging_table:Identifier}"
+        ),
+        parameters=parameters,
+    )
+    run_sql_script(
+        sql=(
+            "EXCHANGE TABLES {database:Identifier}.{staging_table:Identifier} "
+            "AND {database:Identifier}.{table:Identifier}"
+        ),
+        parameters=parameters,
+    )
+    run_sql_script(
+        sql=(
+            "DROP TABLE IF EXISTS {database:Identifier}.{staging_table:Identifier} "
+            "SETTINGS check_table_dependencies=0"
+        ),
+        parameters=parameters,
+    )
+
+
 @task(checkpoint=False)
 def drop_dictionary_if_exists(database: str, dictionary: str):
     """
@@ -129,6 +168,7 @@ def load_df_to_data_warehouse(
     destination_database: str,
     destination_table: str,
     datetime_cols_to_clip: List = None,
+    geometry_format: str = "wkt",
 ):
     load_to_data_warehouse(
         df,
@@ -136,4 +176,5 @@ def load_df_to_data_warehouse(
         database=destination_database,
         logger=prefect.context.get("logger"),
         datetime_cols_to_clip=datetime_cols_to_clip,
+        geometry_format=geometry_format,
     )
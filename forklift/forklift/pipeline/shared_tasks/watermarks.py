@@ -0,0 +1,122 @@
+from datetime import date, timedelta
+from typing import List, Optional
+
+import prefect
+from dateutil.relativedelta import relativedelta
+from prefect import task
+
+from forklift.pipeline.entities.generic import Watermark
+from forklift.pipeline.helpers.generic import extract, get_watermark, set_watermark
+
+
+def get_partition(month_start: date) -> str:
+    return f"{month_start.year}{month_start.month:0>2}"
+
+
+@task(checkpoint=False)
+def get_new_logbook_watermark(month_start: date) -> Optional[Watermark]:
+    """
+    Returns the most recent logbook message that can affect the data of the month
+    starting on `month_start`, including DEL, COR and RET messages received up to 3
+    months after the end of the month. This must be computed *before* extracting
+    the month's data, so that messages received during the extraction are taken
+    into account by the next incremental run.
+
+    Args:
+        month_start (date): start of the month
+
+    Returns:
+        Optional[Watermark]: new watermark of the month, or None if there are no
+          messages
+    """
+    messages = extract(
+        db_name="monitorfish_remote",
+        query_filepath="monitorfish_remote/logbook_watermark.sql",
+        params={
+            "min_date": month_start,
+            "max_date": month_start + relativedelta(months=1),
+        },
+    )
+
+    if len(messages) == 0:
+        return None
+
+    return Watermark(
+        operation_datetime_utc=messages.operation_datetime_utc.iloc[0].to_pydatetime(),
+        report_id=messages.report_id.iloc[0],
+    )
+
+
+@task(checkpoint=False)
+def get_logbook_report_ids_to_update(
+    month_start: date,
+    flow_name: str,
+    log_types: List[str],
+    incremental: bool,
+    lookback_hours: float,
+) -> Optional[List[str]]:
+    """
+    Returns the ids of the reports of type `log_types` of the month starting on
+    `month_start` which must be extracted again since the last run of the flow :
+    reports that are new, or targeted by new DEL, COR or RET messages.
+
+    Messages are considered new if they are more recent than the month's watermark
+    minus `lookback_hours`, to account for messages received with a delay.
+
+    Args:
+        month_start (date): start of the month
+        flow_name (str): name of the flow, used to read the watermark
+        log_types (List[str]): log types of the reports loaded by the flow
+        incremental (bool): if `False`, the whole month must be loaded again
+        lookback_hours (float): overlap with the previous run, in hours
+
+    Returns:
+        Optional[List[str]]: ids of the reports to update, or None if the whole
+          month must be loaded again (when `incremental` is `False` or when the month
+          has no watermark yet).
+    """
+    logger = prefect.context.get("logger")
+
+    if not incremental:
+        return None
+
+    watermark = get_watermark(
+        database="monitorfish", flow=flow_name, partition=get_partition(month_start)
+    )
+
+    if watermark is None:
+        logger.info(f"No watermark for month {month_start}, loading the whole month.")
+        return None
+
+    report_ids = extract(
+        db_name="monitorfish_remote",
+        query_filepath="monitorfish_remote/logbook_changed_report_ids.sql",
+        params={
+            "min_date": month_start,
+            "max_date": month_start + relativedelta(months=1),
+            "since": (
+                watermark.operation_datetime_utc - timedelta(hours=lookback_hours)
+            ),
+            "log_types": log_types,
+        },
+    ).report_id.tolist()
+
+    logger.info(f"{len(report_ids)} reports of month {month_start} to update.")
+    return report_ids
+
+
+@task(checkpoint=False)
+def update_logbook_watermark(
+    watermark: Optional[Watermark], month_start: date, flow_name: str
+):
+    """
+    Stores the watermark of the month starting on `month_start` once its data is
+    loaded. Does nothing if `watermark` is None.
+    """
+    if watermark is not None:
+        set_watermark(
+            watermark,
+            database="monitorfish",
+            flow=flow_name,
+            partition=get_partition(month_start),
+        )
@@ -1,4 +1,4 @@
-INSERT INTO monitorfish.vms_h3
+INSERT INTO monitorfish.{table:Identifier}
 SELECT
     id,
     COALESCE(internal_reference_number, 'NO_CFR') AS cfr,
@@ -14,4 +14,5 @@ CREATE TABLE IF NOT EXISTS monitorfish.activities (
 ENGINE MergeTree()
 PARTITION BY toYYYYMM(operation_datetime_utc)
 PRIMARY KEY cfr
-ORDER BY cfr
\ No newline at end of file
+ORDER BY cfr
+SETTINGS non_replicated_deduplication_window = 1000
\ No newline at end of file
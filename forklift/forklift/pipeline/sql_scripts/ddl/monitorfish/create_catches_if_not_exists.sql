@@ -19,4 +19,5 @@ CREATE TABLE IF NOT EXISTS monitorfish.catches (
 ENGINE MergeTree()
 PARTITION BY toYYYYMM(operation_datetime_utc)
 PRIMARY KEY (toYear(far_datetime_utc), cfr)
-ORDER BY (toYear(far_datetime_utc), cfr, far_datetime_utc)
\ No newline at end of file
+ORDER BY (toYear(far_datetime_utc), cfr, far_datetime_utc)
+SETTINGS non_replicated_deduplication_window = 1000
\ No newline at end of file
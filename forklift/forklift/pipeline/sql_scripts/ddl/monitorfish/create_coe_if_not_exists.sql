@@ -30,4 +30,5 @@ CREATE TABLE IF NOT EXISTS monitorfish.coe (
 ENGINE MergeTree()
 PARTITION BY toYYYYMM(operation_datetime_utc)
 PRIMARY KEY (toYear(entry_datetime_utc), cfr)
-ORDER BY (toYear(entry_datetime_utc), cfr, entry_datetime_utc)
\ No newline at end of file
+ORDER BY (toYear(entry_datetime_utc), cfr, entry_datetime_utc)
+SETTINGS non_replicated_deduplication_window = 1000
\ No newline at end of file
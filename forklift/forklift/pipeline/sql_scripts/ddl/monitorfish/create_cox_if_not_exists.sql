@@ -30,4 +30,5 @@ CREATE TABLE IF NOT EXISTS monitorfish.cox (
 ENGINE MergeTree()
 PARTITION BY toYYYYMM(operation_datetime_utc)
 PRIMARY KEY (toYear(exit_datetime_utc), cfr)
-ORDER BY (toYear(exit_datetime_utc), cfr, exit_datetime_utc)
\ No newline at end of file
+ORDER BY (toYear(exit_datetime_utc), cfr, exit_datetime_utc)
+SETTINGS non_replicated_deduplication_window = 1000
\ No newline at end of file
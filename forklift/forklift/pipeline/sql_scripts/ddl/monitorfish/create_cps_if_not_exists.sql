@@ -23,4 +23,5 @@ CREATE TABLE IF NOT EXISTS monitorfish.cps (
 ENGINE MergeTree()
 PARTITION BY toYYYYMM(operation_datetime_utc)
 PRIMARY KEY (toYear(cps_datetime_utc), cfr)
-ORDER BY (toYear(cps_datetime_utc), cfr, cps_datetime_utc)
\ No newline at end of file
+ORDER BY (toYear(cps_datetime_utc), cfr, cps_datetime_utc)
+SETTINGS non_replicated_deduplication_window = 1000
\ No newline at end of file
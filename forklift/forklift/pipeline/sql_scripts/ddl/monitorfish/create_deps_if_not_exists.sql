@@ -28,4 +28,5 @@ CREATE TABLE IF NOT EXISTS monitorfish.deps (
 ENGINE MergeTree()
 PARTITION BY toYYYYMM(operation_datetime_utc)
 PRIMARY KEY (toYear(departure_datetime_utc), cfr)
-ORDER BY (toYear(departure_datetime_utc), cfr, departure_datetime_utc)
\ No newline at end of file
+ORDER BY (toYear(departure_datetime_utc), cfr, departure_datetime_utc)
+SETTINGS non_replicated_deduplication_window = 1000
\ No newline at end of file
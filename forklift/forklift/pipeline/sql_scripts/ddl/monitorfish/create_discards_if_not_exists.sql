@@ -19,4 +19,5 @@ CREATE TABLE IF NOT EXISTS monitorfish.discards (
 ENGINE MergeTree()
 PARTITION BY toYYYYMM(operation_datetime_utc)
 PRIMARY KEY (toYear(dis_datetime_utc), cfr)
-ORDER BY (toYear(dis_datetime_utc), cfr, dis_datetime_utc)
\ No newline at end of file
+ORDER BY (toYear(dis_datetime_utc), cfr, dis_datetime_utc)
+SETTINGS non_replicated_deduplication_window = 1000
\ No newline at end of file
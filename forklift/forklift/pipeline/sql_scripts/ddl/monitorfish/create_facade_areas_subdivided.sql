@@ -1,7 +1,7 @@
 CREATE TABLE {database:Identifier}.{table:Identifier} (
     facade LowCardinality(String),
-    geometry String,
-    id Int32
+    id Int32,
+    geometry MultiPolygon
 )
 ENGINE MergeTree
 ORDER BY facade
\ No newline at end of file
@@ -1,5 +1,4 @@
 CREATE TABLE {database:Identifier}.{table:Identifier} (
-    wkb_geometry String,
     f_code String,
     f_level Nullable(String),
     f_status Nullable(Float64),
@@ -13,7 +12,8 @@ CREATE TABLE {database:Identifier}.{table:Identifier} (
     name_en Nullable(String),
     name_fr Nullable(String),
     name_es Nullable(String),
-    facade LowCardinality(String)
+    facade LowCardinality(String),
+    wkb_geometry MultiPolygon
 )
 ENGINE MergeTree
 ORDER BY f_code
\ No newline at end of file
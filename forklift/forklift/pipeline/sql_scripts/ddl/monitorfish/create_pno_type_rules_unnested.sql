@@ -1,4 +1,4 @@
-CREATE TABLE IF NOT EXISTS monitorfish.pno_type_rules_unnested (
+CREATE TABLE IF NOT EXISTS {database:Identifier}.{table:Identifier} (
     pno_type_id UInt8,
     pno_type_name LowCardinality(String),
     minimum_notification_period Float32,
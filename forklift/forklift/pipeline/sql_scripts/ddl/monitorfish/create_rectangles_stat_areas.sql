@@ -1,6 +1,5 @@
 CREATE TABLE {database:Identifier}.{table:Identifier} (
     ogc_fid Int32,
-    wkb_geometry String,
     id Float64,
     icesname Nullable(String),
     south Nullable(Float64),
@@ -8,7 +7,8 @@ CREATE TABLE {database:Identifier}.{table:Identifier} (
     north Nullable(Float64),
     east Nullable(Float64),
     area_km2 Nullable(Float64),
-    facade LowCardinality(String)
+    facade LowCardinality(String),
+    wkb_geometry MultiPolygon
 )
 ENGINE MergeTree
 ORDER BY id
\ No newline at end of file
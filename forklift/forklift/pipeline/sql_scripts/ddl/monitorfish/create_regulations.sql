@@ -4,7 +4,7 @@ CREATE TABLE {database:Identifier}.{table:Identifier} (
     topic String,
     zone String,
     region LowCardinality(Nullable(String)),
-    geometry_simplified String
+    geometry_simplified MultiPolygon
 )
 ENGINE MergeTree
 ORDER BY id
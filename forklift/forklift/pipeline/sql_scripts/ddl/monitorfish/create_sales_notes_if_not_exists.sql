@@ -66,4 +66,5 @@ CREATE TABLE IF NOT EXISTS monitorfish.sales_notes (
 ENGINE MergeTree()
 PARTITION BY toYYYYMM(operation_datetime_utc)
 PRIMARY KEY (toYear(sales_datetime_utc), cfr)
-ORDER BY (toYear(sales_datetime_utc), cfr, sales_datetime_utc)
\ No newline at end of file
+ORDER BY (toYear(sales_datetime_utc), cfr, sales_datetime_utc)
+SETTINGS non_replicated_deduplication_window = 1000
\ No newline at end of file
@@ -1,4 +1,4 @@
-CREATE TABLE IF NOT EXISTS monitorfish.vessel_profiles (
+CREATE TABLE IF NOT EXISTS {database:Identifier}.{table:Identifier} (
     cfr String,
     gears Map(String, Float),
     species Map(String, Float),
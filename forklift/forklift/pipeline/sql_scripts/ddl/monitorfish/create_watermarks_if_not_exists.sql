@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS monitorfish.watermarks (
+    flow LowCardinality(String),
+    partition String,
+    operation_datetime_utc DateTime64(6),
+    report_id String,
+    updated_at_utc DateTime64(6)
+)
+ENGINE ReplacingMergeTree(updated_at_utc)
+ORDER BY (flow, partition)
@@ -0,0 +1,2 @@
+ALTER TABLE {database:Identifier}.{table:Identifier}
+MODIFY SETTING non_replicated_deduplication_window = 1000
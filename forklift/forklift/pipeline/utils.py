@@ -3,17 +3,29 @@ import logging
 import os
 import pathlib
 import shutil
+import struct
 import sys
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import StringIO
-from typing import Sequence
+from typing import Hashable, Iterator, List, Optional, Sequence, Tuple
 
 import geoalchemy2
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import sqlalchemy
-from sqlalchemy import MetaData, Table, func, select
+from sqlalchemy import Column, MetaData, Table, exists, func, select, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.exc import InvalidRequestError
 
 # ***************************** Database operations utils *****************************
 
+# Runs the drops of tables replaced by shadow tables (see `drop_table_in_background`).
+# Pending drops are completed before the interpreter exits.
+BACKGROUND_DROPS_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+
 
 def get_table(
     table_name: str,
@@ -106,6 +118,586 @@ def delete_rows(
         logger.info(f"Rows after deletion: {n}.")
 
 
+def create_temporary_table_like(
+    table: sqlalchemy.Table,
+    connection: sqlalchemy.engine.base.Connection,
+) -> sqlalchemy.Table:
+    """Creates a temporary table with the same columns, types and defaults as
+    ``table``, which is dropped at the end of the current transaction. Returns the
+    corresponding Table object.
+
+    Args:
+        table (sqlalchemy.Table): table to copy the structure of
+        connection (sqlalchemy.engine.base.Connection): database connection, with a
+          transaction in progress
+
+    Returns:
+        sqlalchemy.Table: the temporary table
+    """
+    name = f"tmp_{table.name[:40]}_{uuid.uuid4().hex[:8]}"
+    connection.execute(
+        text(
+            f'CREATE TEMPORARY TABLE "{name}" '
+            f'(LIKE "{table.schema}"."{table.name}" INCLUDING DEFAULTS) '
+            "ON COMMIT DROP"
+        )
+    )
+    return Table(name, MetaData(), *[Column(c.name, c.type) for c in table.columns])
+
+
+def upsert_from_table(
+    table: sqlalchemy.Table,
+    source: sqlalchemy.Table,
+    table_id_column: str,
+    source_id_column: str,
+    columns: Sequence[str],
+    connection: sqlalchemy.engine.base.Connection,
+    logger: logging.Logger,
+):
+    """Replaces the rows of ``table`` whose id is in ``source`` with the rows of
+    ``source``, using one set-based ``DELETE ... USING`` followed by one
+    ``INSERT ... SELECT``, so that the cost of the operation does not depend on
+    the number of ids sent from the client.
+
+    Args:
+        table (sqlalchemy.Table): table to upsert rows into
+        source (sqlalchemy.Table): table containing the rows to upsert, typically
+          created with `create_temporary_table_like`
+        table_id_column (str): name of the id column in ``table``
+        source_id_column (str): name of the id column in ``source``
+        columns (Sequence[str]): columns to insert
+        connection (sqlalchemy.engine.base.Connection): database connection
+        logger (logging.Logger): logger
+    """
+    n_deleted = connection.execute(
+        table.delete().where(table.c[table_id_column] == source.c[source_id_column])
+    ).rowcount
+    n_inserted = connection.execute(
+        table.insert().from_select(
+            list(columns), select(*[source.c[col] for col in columns])
+        )
+    ).rowcount
+    if logger:
+        logger.info(
+            f"Upserted rows into table {table.name}: {n_deleted} rows deleted, "
+            f"{n_inserted} rows inserted."
+        )
+
+
+def select_ids_not_in_table(
+    ids: Sequence,
+    table: sqlalchemy.Table,
+    column_name: str,
+    connection: sqlalchemy.engine.base.Connection,
+) -> pd.Series:
+    """Returns the values of ``ids`` that are not present in the column
+    ``column_name`` of ``table``.
+
+    The ids are copied into a temporary table, which is dropped at the end of the
+    current transaction, and filtered on the server with an anti-join, so that only
+    the new ids are sent back to the client and the size of the query does not
+    depend on the number of ids.
+
+    Args:
+        ids (Sequence): non null ids to look for. Must not contain duplicates.
+        table (sqlalchemy.Table): table to look into
+        column_name (str): name of the id column in ``table``
+        connection (sqlalchemy.engine.base.Connection): database connection, with a
+          transaction in progress
+
+    Returns:
+        pd.Series: ids of ``ids`` that are not present in ``table``
+    """
+    column = table.c[column_name]
+    ids_table = Table(
+        f"tmp_ids_{table.name[:40]}_{uuid.uuid4().hex[:8]}",
+        MetaData(),
+        Column(column_name, column.type),
+        prefixes=["TEMPORARY"],
+        postgresql_on_commit="DROP",
+    )
+    ids_table.create(connection)
+    psql_insert_copy(ids_table, connection, [column_name], ((id_,) for id_ in ids))
+
+    statement = select(ids_table.c[column_name]).where(
+        ~exists().where(column == ids_table.c[column_name])
+    )
+    return pd.read_sql(statement, connection)[column_name]
+
+
+def get_dependent_objects(
+    table: sqlalchemy.Table,
+    connection: sqlalchemy.engine.base.Connection,
+) -> List[str]:
+    """Returns the descriptions of the objects that depend on ``table`` and would keep
+    pointing to the original table if it was renamed, or that `create_shadow_table`
+    and `swap_tables` cannot reproduce on a shadow table : views, materialized
+    views, foreign keys of other tables or referencing ``table`` itself, functions
+    with SQL-standard bodies or using the row type of ``table``, triggers and
+    policies of other tables, child tables, rules, extended statistics,
+    publications, and the partitioning or inheritance of ``table``. A table that has
+    any cannot be swapped with a shadow table.
+
+    Functions whose bodies refer to ``table`` by name (such as PL/pgSQL functions)
+    are not included : they resolve the name at execution time and see the shadow
+    table after the swap.
+
+    Args:
+        table (sqlalchemy.Table): table
+        connection (sqlalchemy.engine.base.Connection): database connection
+
+    Returns:
+        List[str]: descriptions of the dependent objects
+    """
+    return (
+        connection.execute(
+            text(
+                "WITH t AS ("
+                "    SELECT oid, reltype, relkind, relispartition FROM pg_class "
+                "    WHERE oid = CAST(:table AS regclass)"
+                ") "
+                "SELECT pg_describe_object(d.classid, d.objid, d.objsubid) "
+                "FROM pg_depend d, t "
+                "WHERE d.deptype = 'n' "
+                "AND ("
+                "    (d.refclassid = 'pg_class'::regclass AND d.refobjid = t.oid) "
+                "    OR (d.refclassid = 'pg_type'::regclass AND d.refobjid = t.reltype)"
+                ") "
+                "AND NOT (d.classid = 'pg_class'::regclass AND d.objid = t.oid) "
+                "AND d.objid NOT IN ("
+                "    SELECT oid FROM pg_attrdef WHERE adrelid = t.oid "
+                "    UNION ALL "
+                "    SELECT oid FROM pg_trigger WHERE tgrelid = t.oid "
+                "    UNION ALL "
+                "    SELECT oid FROM pg_policy WHERE polrelid = t.oid "
+                "    UNION ALL "
+                "    SELECT oid FROM pg_constraint "
+                "    WHERE conrelid = t.oid AND confrelid <> t.oid"
+                ") "
+                "UNION "
+                "SELECT pg_describe_object('pg_trigger'::regclass, tg.oid, 0) "
+                "FROM pg_trigger tg, t "
+                "WHERE tg.tgconstrrelid = t.oid AND tg.tgrelid <> t.oid "
+                "AND NOT tg.tgisinternal "
+                "UNION "
+                "SELECT pg_describe_object('pg_rewrite'::regclass, r.oid, 0) "
+                "FROM pg_rewrite r, t WHERE r.ev_class = t.oid "
+                "UNION "
+                "SELECT pg_describe_object('pg_statistic_ext'::regclass, s.oid, 0) "
+                "FROM pg_statistic_ext s, t WHERE s.stxrelid = t.oid "
+                "UNION "
+                "SELECT pg_describe_object('pg_publication_rel'::regclass, p.oid, 0) "
+                "FROM pg_publication_rel p, t WHERE p.prrelid = t.oid "
+                "UNION "
+                "SELECT 'inheritance from ' || i.inhparent::regclass::text "
+                "FROM pg_inherits i, t WHERE i.inhrelid = t.oid "
+                "UNION "
+                "SELECT 'partitioning' FROM t WHERE t.relkind = 'p' OR t.relispartition"
+            ),
+            {"table": f'"{table.schema}"."{table.name}"'},
+        )
+        .scalars()
+        .all()
+    )
+
+
+def create_shadow_table(
+    table: sqlalchemy.Table,
+    connection: sqlalchemy.engine.base.Connection,
+) -> sqlalchemy.Table:
+    """Creates an empty table with the same columns, defaults, identity and
+    generated columns, storage parameters, comments, owner, row level security
+    policies, replica identity and triggers as ``table`` in the same schema, to be
+    loaded and then swapped with ``table`` using `swap_tables`. Returns the
+    corresponding Table object.
+
+    Constraints and indexes are not created : `swap_tables` creates them after the
+    shadow table is loaded, which is much faster than maintaining them during the
+    load.
+
+    Args:
+        table (sqlalchemy.Table): table to copy the structure of
+        connection (sqlalchemy.engine.base.Connection): database connection
+
+    Returns:
+        sqlalchemy.Table: the shadow table
+    """
+    name = f"{table.name[:40]}_shadow_{uuid.uuid4().hex[:8]}"
+    table_name = f'"{table.schema}"."{table.name}"'
+    shadow_name = f'"{table.schema}"."{name}"'
+    connection.execute(
+        text(
+            f"CREATE TABLE {shadow_name} (LIKE {table_name} INCLUDING ALL "
+            "EXCLUDING CONSTRAINTS EXCLUDING INDEXES EXCLUDING STATISTICS)"
+        )
+    )
+
+    owner, reloptions, row_security, force_row_security, replica_identity, comment = (
+        connection.execute(
+            text(
+                "SELECT relowner::regrole::text, reloptions, relrowsecurity, "
+                "relforcerowsecurity, relreplident, obj_description(oid, 'pg_class') "
+                "FROM pg_class WHERE oid = CAST(:table AS regclass)"
+            ),
+            {"table": table_name},
+        ).one()
+    )
+    connection.execute(text(f"ALTER TABLE {shadow_name} OWNER TO {owner}"))
+    if reloptions:
+        connection.execute(
+            text(f"ALTER TABLE {shadow_name} SET ({', '.join(reloptions)})")
+        )
+    if row_security:
+        connection.execute(text(f"ALTER TABLE {shadow_name} ENABLE ROW LEVEL SECURITY"))
+    if force_row_security:
+        connection.execute(text(f"ALTER TABLE {shadow_name} FORCE ROW LEVEL SECURITY"))
+    if replica_identity in ("f", "n"):
+        replica_identity = {"f": "FULL", "n": "NOTHING"}[replica_identity]
+        connection.execute(
+            text(f"ALTER TABLE {shadow_name} REPLICA IDENTITY {replica_identity}")
+        )
+    if comment is not None:
+        connection.execute(
+            text(f"COMMENT ON TABLE {shadow_name} IS :comment"), {"comment": comment}
+        )
+
+    policies = connection.execute(
+        text(
+            "SELECT quote_ident(policyname), permissive, cmd, "
+            "ARRAY("
+            "    SELECT CASE WHEN r = 'public' THEN 'PUBLIC' ELSE quote_ident(r) END "
+            "    FROM unnest(roles) r"
+            "), "
+            "qual, with_check "
+            "FROM pg_policies WHERE schemaname = :schema AND tablename = :table"
+        ),
+        {"schema": table.schema, "table": table.name},
+    ).all()
+    for policy, permissive, cmd, roles, qual, with_check in policies:
+        connection.execute(
+            text(
+                f"CREATE POLICY {policy} ON {shadow_name} AS {permissive} FOR {cmd} "
+                f"TO {', '.join(roles)}"
+                + (f" USING ({qual})" if qual else "")
+                + (f" WITH CHECK ({with_check})" if with_check else "")
+            )
+        )
+
+    triggers = connection.execute(
+        text(
+            "SELECT "
+            "    quote_ident(t.tgname), "
+            "    pg_get_triggerdef(t.oid), "
+            "    quote_ident(n.nspname) || '.' || quote_ident(c.relname), "
+            "    t.tgenabled "
+            "FROM pg_trigger t "
+            "JOIN pg_class c ON c.oid = t.tgrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE t.tgrelid = CAST(:table AS regclass) AND NOT t.tgisinternal"
+        ),
+        {"table": table_name},
+    ).all()
+    for trigger, definition, qualified_table_name, enabled in triggers:
+        connection.execute(
+            text(
+                definition.replace(
+                    f" ON {qualified_table_name} ", f" ON {shadow_name} ", 1
+                )
+            )
+        )
+        if enabled in ("D", "R", "A"):
+            enabled = {"D": "DISABLE", "R": "ENABLE REPLICA", "A": "ENABLE ALWAYS"}[
+                enabled
+            ]
+            connection.execute(
+                text(f"ALTER TABLE {shadow_name} {enabled} TRIGGER {trigger}")
+            )
+
+    return Table(
+        name,
+        MetaData(schema=table.schema),
+        *[Column(c.name, c.type) for c in table.columns],
+    )
+
+
+def swap_tables(
+    table: sqlalchemy.Table,
+    shadow: sqlalchemy.Table,
+    connection: sqlalchemy.engine.base.Connection,
+    logger: logging.Logger,
+) -> str:
+    """Replaces ``table`` with ``shadow``, typically created with
+    `create_shadow_table`, by renaming ``table`` and giving its name to ``shadow``.
+
+    Before the renames :
+
+      - the constraints and indexes of ``table`` are created on ``shadow``, and
+        ``shadow`` is analyzed
+      - the identity sequences of ``shadow`` are set to the values of those of
+        ``table``
+      - the privileges granted on ``table`` and its columns are granted on
+        ``shadow``
+      - the sequences owned by columns of ``table`` are transferred to the
+        corresponding columns of ``shadow``, so that the original table can then
+        be dropped
+
+    The constraints, indexes and identity sequences of ``table`` are renamed along
+    with it, so that those of ``shadow`` take their names.
+
+    The renames take an exclusive lock on the tables, which is held until the end
+    of the transaction : the transaction should be committed right after the swap.
+
+    Args:
+        table (sqlalchemy.Table): table to replace
+        shadow (sqlalchemy.Table): table to put in place of ``table``
+        connection (sqlalchemy.engine.base.Connection): database connection
+        logger (logging.Logger): logger
+
+    Returns:
+        str: new name of the original table, in the same schema
+    """
+    schema = table.schema
+    table_name = f'"{schema}"."{table.name}"'
+    shadow_name = f'"{schema}"."{shadow.name}"'
+    replaced_name = f"{table.name[:40]}_replaced_{uuid.uuid4().hex[:8]}"
+
+    # (kind, name in table, temporary name in shadow) of the objects to rename
+    renames = []
+
+    constraints = connection.execute(
+        text(
+            "SELECT conname, contype, pg_get_constraintdef(oid) "
+            "FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) "
+            "AND contype IN ('c', 'f', 'p', 'u', 'x') "
+            "ORDER BY contype IN ('c', 'f'), conname"
+        ),
+        {"table": table_name},
+    ).all()
+    for constraint, constraint_type, definition in constraints:
+        # Only the names of constraints with an index must be unique in the schema
+        if constraint_type in ("p", "u", "x"):
+            shadow_constraint = f"{shadow.name}_{len(renames)}"
+            renames.append(("CONSTRAINT", constraint, shadow_constraint))
+        else:
+            shadow_constraint = constraint
+        connection.execute(
+            text(
+                f"ALTER TABLE {shadow_name} "
+                f'ADD CONSTRAINT "{shadow_constraint}" {definition}'
+            )
+        )
+
+    indexes = connection.execute(
+        text(
+            "SELECT "
+            "    ic.relname, "
+            "    quote_ident(ic.relname), "
+            "    pg_get_indexdef(i.indexrelid), "
+            "    quote_ident(n.nspname) || '.' || quote_ident(c.relname), "
+            "    i.indisreplident "
+            "FROM pg_index i "
+            "JOIN pg_class ic ON ic.oid = i.indexrelid "
+            "JOIN pg_class c ON c.oid = i.indrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE i.indrelid = CAST(:table AS regclass) "
+            "ORDER BY ic.relname"
+        ),
+        {"table": table_name},
+    ).all()
+    constraint_indexes = {name for _, name, _ in renames}
+    replica_identity_index = None
+    for index, quoted_index, definition, qualified_table_name, is_replident in indexes:
+        if is_replident:
+            replica_identity_index = index
+        if index in constraint_indexes:
+            continue
+        shadow_index = f"{shadow.name}_{len(renames)}"
+        renames.append(("INDEX", index, shadow_index))
+        connection.execute(
+            text(
+                definition.replace(
+                    f"INDEX {quoted_index} ON {qualified_table_name} ",
+                    f'INDEX "{shadow_index}" ON {shadow_name} ',
+                    1,
+                )
+            )
+        )
+
+    connection.execute(text(f"ANALYZE {shadow_name}"))
+
+    identity_sequences = get_column_sequences(table_name, "i", connection)
+    shadow_identity_sequences = {
+        column: (sequence, sequence_name)
+        for sequence, sequence_name, column in get_column_sequences(
+            shadow_name, "i", connection
+        )
+    }
+    for sequence, sequence_name, column in identity_sequences:
+        shadow_sequence, shadow_sequence_name = shadow_identity_sequences[column]
+        connection.execute(
+            text(
+                "SELECT setval(CAST(:shadow_sequence AS regclass), last_value, "
+                f"is_called) FROM {sequence}"
+            ),
+            {"shadow_sequence": shadow_sequence},
+        )
+        renames.append(("SEQUENCE", sequence_name, shadow_sequence_name))
+
+    grants = connection.execute(
+        text(
+            "SELECT "
+            "    CASE WHEN grantee = 0 THEN 'PUBLIC' "
+            "    ELSE grantee::regrole::text END, "
+            "    privilege_type, "
+            "    NULL, "
+            "    is_grantable "
+            "FROM pg_class c, aclexplode(c.relacl) "
+            "WHERE c.oid = CAST(:table AS regclass) AND grantee <> c.relowner "
+            "UNION ALL "
+            "SELECT "
+            "    CASE WHEN grantee = 0 THEN 'PUBLIC' "
+            "    ELSE grantee::regrole::text END, "
+            "    privilege_type, "
+            "    quote_ident(a.attname), "
+            "    is_grantable "
+            "FROM pg_class c "
+            "JOIN pg_attribute a ON a.attrelid = c.oid, "
+            "aclexplode(a.attacl) "
+            "WHERE c.oid = CAST(:table AS regclass) AND grantee <> c.relowner"
+        ),
+        {"table": table_name},
+    ).all()
+    for grantee, privilege, column, is_grantable in grants:
+        connection.execute(
+            text(
+                f"GRANT {privilege}"
+                + (f" ({column})" if column else "")
+                + f" ON {shadow_name} TO {grantee}"
+                + (" WITH GRANT OPTION" if is_grantable else "")
+            )
+        )
+
+    for sequence, _, column in get_column_sequences(table_name, "a", connection):
+        connection.execute(
+            text(f'ALTER SEQUENCE {sequence} OWNED BY {shadow_name}."{column}"')
+        )
+
+    if logger:
+        logger.info(f"Swapping table {table.name} with {shadow.name}.")
+    for i, (kind, name, _) in enumerate(renames):
+        connection.execute(
+            text(
+                rename_statement(kind, schema, table.name, name, f"{replaced_name}_{i}")
+            )
+        )
+    for kind, name, shadow_object_name in renames:
+        connection.execute(
+            text(rename_statement(kind, schema, shadow.name, shadow_object_name, name))
+        )
+    connection.execute(text(f'ALTER TABLE {table_name} RENAME TO "{replaced_name}"'))
+    connection.execute(text(f'ALTER TABLE {shadow_name} RENAME TO "{table.name}"'))
+    if replica_identity_index:
+        connection.execute(
+            text(
+                f'ALTER TABLE "{schema}"."{table.name}" '
+                f'REPLICA IDENTITY USING INDEX "{replica_identity_index}"'
+            )
+        )
+    return replaced_name
+
+
+def get_column_sequences(
+    table_name: str,
+    dependency_type: str,
+    connection: sqlalchemy.engine.base.Connection,
+) -> List[Tuple[str, str, str]]:
+    """Returns the sequences of the columns of a table : its identity sequences if
+    ``dependency_type`` is 'i', or the sequences owned by its columns (typically
+    ``serial`` columns) if ``dependency_type`` is 'a'.
+
+    Args:
+        table_name (str): qualified and quoted table name
+        dependency_type (str): 'i' or 'a'
+        connection (sqlalchemy.engine.base.Connection): database connection
+
+    Returns:
+        List[Tuple[str, str, str]]: qualified name, name and column of each sequence
+    """
+    return connection.execute(
+        text(
+            "SELECT s.oid::regclass::text, s.relname, a.attname "
+            "FROM pg_depend d "
+            "JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S' "
+            "JOIN pg_attribute a "
+            "ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid "
+            "WHERE d.refobjid = CAST(:table AS regclass) "
+            "AND d.deptype = :dependency_type"
+        ),
+        {"table": table_name, "dependency_type": dependency_type},
+    ).all()
+
+
+def rename_statement(
+    kind: str, schema: str, table_name: str, name: str, new_name: str
+) -> str:
+    """Returns the statement renaming the constraint, index or sequence ``name`` of
+    the table ``schema.table_name`` to ``new_name``."""
+    if kind == "CONSTRAINT":
+        return (
+            f'ALTER TABLE "{schema}"."{table_name}" '
+            f'RENAME CONSTRAINT "{name}" TO "{new_name}"'
+        )
+    else:
+        return f'ALTER {kind} "{schema}"."{name}" RENAME TO "{new_name}"'
+
+
+def drop_table(
+    schema: str,
+    table_name: str,
+    connection: sqlalchemy.engine.base.Connection,
+    logger: logging.Logger,
+):
+    """Drops a table if it exists."""
+    if logger:
+        logger.info(f"Dropping table {schema}.{table_name}.")
+    connection.execute(text(f'DROP TABLE IF EXISTS "{schema}"."{table_name}"'))
+
+
+def drop_table_in_background(
+    schema: str,
+    table_name: str,
+    engine: sqlalchemy.engine.Engine,
+    logger: logging.Logger,
+) -> Future:
+    """Drops a table if it exists, in a separate transaction on a background thread.
+    Dropping a table waits for the queries that use it to complete, typically
+    queries which started reading a table before it was swapped with a shadow
+    table : this way, the caller does not wait for them.
+
+    Args:
+        schema (str): schema of the table
+        table_name (str): name of the table
+        engine (sqlalchemy.engine.Engine): engine of the database of the table
+        logger (logging.Logger): logger
+
+    Returns:
+        Future: future of the drop, whose result is None or whose exception is the
+        error that occurred during the drop
+    """
+
+    def drop():
+        try:
+            with engine.begin() as connection:
+                drop_table(schema, table_name, connection, logger)
+        except Exception:
+            if logger:
+                logger.exception(f"Could not drop table {schema}.{table_name}.")
+            raise
+
+    return BACKGROUND_DROPS_EXECUTOR.submit(drop)
+
+
 def psql_insert_copy(table, conn, keys, data_iter):
     """
     Execute SQL statement inserting data
@@ -136,6 +728,291 @@ def psql_insert_copy(table, conn, keys, data_iter):
         cur.copy_expert(sql=sql, file=s_buf)
 
 
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+PGCOPY_NULL_FIELD = struct.pack(">i", -1)
+PG_EPOCH = np.datetime64("2000-01-01T00:00:00", "us")
+PG_EPOCH_DATE = np.datetime64("2000-01-01", "D")
+
+
+def get_pgcopy_encoder(column_type: sqlalchemy.types.TypeEngine) -> Optional[str]:
+    """Returns the name of the binary COPY encoding to use for values loaded into a
+    column of type ``column_type``, or None if the binary encoding of this type is
+    not supported.
+
+    Args:
+        column_type (sqlalchemy.types.TypeEngine): type of the destination column
+
+    Returns:
+        Optional[str]: one of 'bool', 'int2', 'int4', 'int8', 'float4', 'float8',
+          'text', 'jsonb', 'timestamp', 'date' or None
+    """
+    types = sqlalchemy.types
+    if isinstance(column_type, types.Boolean):
+        return "bool"
+    elif isinstance(column_type, types.SmallInteger):
+        return "int2"
+    elif isinstance(column_type, types.BigInteger):
+        return "int8"
+    elif isinstance(column_type, types.Integer):
+        return "int4"
+    elif isinstance(column_type, types.REAL):
+        return "float4"
+    elif isinstance(column_type, types.Float):
+        return "float8"
+    elif isinstance(column_type, JSONB):
+        return "jsonb"
+    elif isinstance(column_type, (types.String, types.JSON)):
+        return "text"
+    elif isinstance(column_type, types.DateTime):
+        return "timestamp"
+    elif isinstance(column_type, types.Date):
+        return "date"
+    else:
+        return None
+
+
+def records_to_binary_array(records: np.ndarray) -> pa.BinaryArray:
+    """Wraps the records of a contiguous numpy array in an Arrow binary array, each
+    element being the bytes of one record.
+
+    Args:
+        records (np.ndarray): 1-dimensional array of fixed-size records
+
+    Returns:
+        pa.BinaryArray: binary array sharing the memory of ``records``
+    """
+    records = np.ascontiguousarray(records)
+    size = records.dtype.itemsize
+    offsets = np.arange(0, (len(records) + 1) * size, size, dtype=np.int32)
+    return pa.Array.from_buffers(
+        pa.binary(),
+        len(records),
+        [None, pa.py_buffer(offsets), pa.py_buffer(records.view(np.uint8))],
+    )
+
+
+def check_pgcopy_numbers(values: np.ndarray, dtype: np.dtype, name: Hashable):
+    """Checks that numbers can be converted to ``dtype`` without being changed, like
+    PostgreSQL checks values loaded with a CSV `COPY`: integer types only accept
+    integral values within their range, and `real` only accepts values within the
+    range of 32-bit floats.
+
+    Args:
+        values (np.ndarray): non null numbers to convert
+        dtype (np.dtype): numpy dtype of the destination type
+        name (Hashable): name of the column, used in error messages
+
+    Raises:
+        ValueError: if some values cannot be converted to ``dtype`` exactly
+    """
+    if len(values) == 0 or values.dtype.kind == "b":
+        return
+
+    if dtype.kind == "i":
+        if values.dtype.kind == "f":
+            try:
+                assert (np.trunc(values) == values).all()
+            except AssertionError:
+                raise ValueError(f"Column {name} has values that are not integers.")
+        bounds = np.iinfo(dtype)
+        # The upper bound is exclusive so that it can be compared exactly to floats
+        too_small = values.min() < bounds.min
+        too_large = values.max() >= bounds.max + 1
+    elif dtype.itemsize == 4 and values.dtype.kind == "f":
+        finite_values = np.abs(values[np.isfinite(values)])
+        too_small = False
+        too_large = len(finite_values) > 0 and (
+            finite_values.max() > np.finfo(np.float32).max
+        )
+    else:
+        return
+
+    try:
+        assert not (too_small or too_large)
+    except AssertionError:
+        raise ValueError(f"Column {name} has values out of range for {dtype.name}.")
+
+
+def encode_pgcopy_column(values: pd.Series, encoder: str) -> pa.BinaryArray:
+    """Encodes a column of values in PostgreSQL's binary COPY format, each field
+    being its 4-byte length (-1 for nulls) followed by its binary representation.
+    Null and NaN values are encoded as SQL `NULL`, like the CSV COPY does.
+
+    Args:
+        values (pd.Series): values to encode
+        encoder (str): encoding to use, as returned by `get_pgcopy_encoder`
+
+    Returns:
+        pa.BinaryArray: the encoded field of each value, length prefix included
+    """
+    isnull = values.isna().to_numpy()
+    notnull = ~isnull
+
+    if encoder == "text" or encoder == "jsonb":
+        strings = values.to_numpy(dtype=object)
+        try:
+            encoded = pa.array(strings, type=pa.string(), mask=isnull)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Values that are not strings (enums for instance) are written as `str(v)`
+            strings = strings.copy()
+            strings[notnull] = list(map(str, strings[notnull]))
+            encoded = pa.array(strings, type=pa.string(), mask=isnull)
+
+        value_bytes = encoded.cast(pa.binary())
+        if encoder == "jsonb":
+            # jsonb values are prefixed with the version of the format
+            value_bytes = pc.binary_join_element_wise(b"\x01", value_bytes, b"")
+        lengths = pc.fill_null(pc.binary_length(value_bytes), -1).to_numpy()
+        return pc.binary_join_element_wise(
+            records_to_binary_array(lengths.astype(">i4")),
+            value_bytes,
+            b"",
+            null_handling="replace",
+            null_replacement=b"",
+        )
+
+    non_null_values = values[notnull]
+    if encoder == "timestamp":
+        datetimes = pd.to_datetime(non_null_values)
+        if datetimes.dt.tz is not None:
+            datetimes = datetimes.dt.tz_convert("UTC").dt.tz_localize(None)
+        fixed = (datetimes.to_numpy().astype("datetime64[us]") - PG_EPOCH).astype(">i8")
+    elif encoder == "date":
+        dates = pd.to_datetime(non_null_values).to_numpy().astype("datetime64[D]")
+        fixed = (dates - PG_EPOCH_DATE).astype(">i4")
+    elif encoder == "bool":
+        fixed = non_null_values.to_numpy()
+        if fixed.dtype != np.bool_:
+            try:
+                assert np.isin(fixed, [0, 1]).all()
+            except AssertionError:
+                raise ValueError(
+                    f"Column {values.name} has values that are not booleans."
+                )
+            fixed = fixed.astype(np.bool_)
+    else:
+        dtype = {
+            "int2": ">i2",
+            "int4": ">i4",
+            "int8": ">i8",
+            "float4": ">f4",
+            "float8": ">f8",
+        }[encoder]
+        if non_null_values.dtype == object:
+            non_null_values = pd.to_numeric(non_null_values)
+        fixed = non_null_values.to_numpy()
+        check_pgcopy_numbers(fixed, np.dtype(dtype), name=values.name)
+        fixed = fixed.astype(dtype)
+
+    records = np.zeros(len(values), dtype=[("length", ">i4"), ("value", fixed.dtype)])
+    records["length"] = fixed.dtype.itemsize
+    records["value"][notnull] = fixed
+    # Null fields are only made of their length, -1
+    return pc.if_else(
+        pa.array(isnull), PGCOPY_NULL_FIELD, records_to_binary_array(records)
+    )
+
+
+def encode_pgcopy_rows(df: pd.DataFrame, encoders: List[str]) -> bytes:
+    """Encodes the rows of a DataFrame in PostgreSQL's binary COPY format (without
+    the file header and trailer). Columns are encoded one at a time and their fields
+    are then concatenated row by row.
+
+    Args:
+        df (pd.DataFrame): rows to encode
+        encoders (List[str]): encoding to use for each column of ``df``
+
+    Returns:
+        bytes: encoded rows
+    """
+    if len(df) == 0:
+        return b""
+
+    columns = [
+        encode_pgcopy_column(df.iloc[:, i], encoder)
+        for i, encoder in enumerate(encoders)
+    ]
+    rows = pc.binary_join_element_wise(struct.pack(">h", len(encoders)), *columns, b"")
+    _, offsets, data = rows.buffers()
+    start, end = np.frombuffer(offsets, dtype=np.int32)[[0, len(rows)]]
+    return data[start:end].to_pybytes()
+
+
+class BytesIteratorFile:
+    """Read-only file-like object streaming the chunks of bytes yielded by an
+    iterator, so that they can be passed to `cursor.copy_expert` without being
+    concatenated in memory."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._chunk = b""
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        res = []
+        while size != 0:
+            if self._position >= len(self._chunk):
+                try:
+                    self._chunk, self._position = next(self._chunks), 0
+                except StopIteration:
+                    break
+            end = len(self._chunk) if size < 0 else self._position + size
+            part = self._chunk[self._position : end]
+            self._position += len(part)
+            if size > 0:
+                size -= len(part)
+            res.append(part)
+        return b"".join(res)
+
+
+def psql_insert_copy_binary(
+    df: pd.DataFrame,
+    table: sqlalchemy.Table,
+    conn: sqlalchemy.engine.Connection,
+    block_size: int = 100000,
+):
+    """Inserts the rows of a DataFrame into a table using the binary format of
+    PostgreSQL's `COPY`. Rows are encoded column-wise from the DataFrame's arrays
+    and streamed to the server in blocks of ``block_size`` rows.
+
+    The columns of ``df`` must all be present in ``table`` and have a type supported
+    by `get_pgcopy_encoder`.
+
+    Args:
+        df (pd.DataFrame): rows to insert
+        table (sqlalchemy.Table): destination table
+        conn (sqlalchemy.engine.Connection): database connection
+        block_size (int, optional): number of rows to encode at a time. Defaults to
+          100000.
+    """
+    encoders = [get_pgcopy_encoder(table.c[col].type) for col in df.columns]
+    try:
+        assert None not in encoders
+    except AssertionError:
+        unsupported = [
+            col for col, encoder in zip(df.columns, encoders) if encoder is None
+        ]
+        raise ValueError(f"Binary COPY is not supported for columns {unsupported}.")
+
+    def chunks():
+        yield PGCOPY_HEADER
+        for start in range(0, len(df), block_size):
+            yield encode_pgcopy_rows(df.iloc[start : start + block_size], encoders)
+        yield PGCOPY_TRAILER
+
+    columns = ", ".join('"{}"'.format(k) for k in df.columns)
+    if table.schema:
+        table_name = f'"{table.schema}"."{table.name}"'
+    else:
+        table_name = f'"{table.name}"'
+
+    sql = f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT binary)"
+    dbapi_conn = conn.connection
+    with dbapi_conn.cursor() as cur:
+        cur.copy_expert(sql=sql, file=BytesIteratorFile(chunks()))
+
+
 def move(
     src_fp: pathlib.Path, dest_dirpath: pathlib.Path, if_exists: str = "raise"
 ) -> None:
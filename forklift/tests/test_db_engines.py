@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from forklift.db_engines import (
+    DataWarehouseClientPool,
+    create_datawarehouse_client,
+    create_engine,
+    dispose_engines,
+)
+
+
+def test_create_engine_reuses_engines():
+    dispose_engines()
+
+    engine = create_engine("monitorfish_remote")
+    assert create_engine("monitorfish_remote") is engine
+    assert create_engine("monitorenv_remote") is not engine
+    assert create_engine("monitorfish_remote", pool_size=1) is not engine
+
+    streaming_engine = create_engine(
+        "monitorfish_remote", execution_options=dict(stream_results=True)
+    )
+    assert streaming_engine.pool is engine.pool
+    assert streaming_engine.get_execution_options()["stream_results"]
+
+    assert engine.pool._recycle == 1800
+    assert engine.pool._pre_ping
+
+    dispose_engines()
+    assert create_engine("monitorfish_remote") is not engine
+
+
+def test_create_datawarehouse_client_creates_new_clients():
+    client = create_datawarehouse_client()
+    other_client = create_datawarehouse_client()
+    assert other_client is not client
+    assert other_client.command("SELECT 1") == 1
+    client.close()
+    other_client.close()
+
+
+def test_datawarehouse_client_pool():
+    pool = DataWarehouseClientPool(max_idle_clients=1)
+
+    with pool.client() as client:
+        assert client.command("SELECT 1") == 1
+        with pool.client() as concurrent_client:
+            assert concurrent_client is not client
+
+    with pool.client() as reused_client:
+        assert reused_client in (client, concurrent_client)
+
+    pool.clear()
+
+
+def test_datawarehouse_client_pool_takes_back_clients_from_other_threads():
+    pool = DataWarehouseClientPool(max_idle_clients=1)
+
+    def borrow_client():
+        with pool.client() as client:
+            assert client.command("SELECT 1") == 1
+            return client
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        other_thread_client = executor.submit(borrow_client).result()
+
+    with pool.client() as client:
+        assert client is other_thread_client
+
+    pool.clear()
+
+
+def test_datawarehouse_client_pool_discards_clients_after_errors():
+    pool = DataWarehouseClientPool(max_idle_clients=1)
+
+    with patch(
+        "forklift.db_engines.create_datawarehouse_client",
+        side_effect=lambda: MagicMock(),
+    ):
+        with pytest.raises(RuntimeError):
+            with pool.client() as failed_client:
+                raise RuntimeError("Query failed")
+
+        failed_client.close.assert_called_once()
+
+        with pool.client() as client:
+            assert client is not failed_client
+
+        with pool.client() as reused_client:
+            assert reused_client is client
+
+    client.close.assert_not_called()
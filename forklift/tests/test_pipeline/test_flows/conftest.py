@@ -1,6 +1,7 @@
 from pytest import fixture
+from sqlalchemy import text
 
-from forklift.db_engines import create_datawarehouse_client
+from forklift.db_engines import create_datawarehouse_client, create_engine
 from forklift.pipeline.flows.sync_table_from_db_connection import (
     flow as sync_table_from_db_connection_flow,
 )
@@ -43,12 +44,10 @@ def init_fleet_segments(add_monitorfish_proxy_database):
     # tests in the parquet file
     client = create_datawarehouse_client()
     client.command("TRUNCATE TABLE monitorfish.fleet_segments")
-    client.command(
-        """
+    client.command("""
         INSERT INTO TABLE monitorfish.fleet_segments
         SELECT * FROM file('monitorfish/fleet_segments.parquet')
-    """
-    )
+    """)
 
     yield
     print("Dropping monitorfish.fleet_segments table")
@@ -89,3 +88,47 @@ def init_mission_action(add_rapportnav_proxy_database):
     yield
     print("Dropping rapportnav.mission_action table")
     client.command("DROP TABLE IF EXISTS rapportnav.mission_action")
+
+
+@fixture
+def late_correction_of_report_4():
+    # Acknowledged correction of the FAR report 4 of 2025-01-01, sent more than 3
+    # months after the first quarter of January (the first sub-range when January is
+    # split in 4) but less than 3 months after the end of January.
+    engine = create_engine("monitorfish_remote")
+    with engine.begin() as con:
+        con.execute(
+            text(
+                "INSERT INTO logbook_raw_messages (operation_number, xml_message) "
+                "VALUES "
+                "('late_cor', '<ERS>Message ERS xml</ERS>'), "
+                "('late_cor_ret', '<ERS>Message RET xml</ERS>')"
+            )
+        )
+        con.execute(
+            text(
+                "INSERT INTO logbook_reports ("
+                "    id, operation_number, operation_datetime_utc, operation_type, "
+                "    report_id, referenced_report_id, cfr, flag_state, log_type, "
+                "    value, trip_number, trip_number_was_computed, "
+                "    transmission_format, enriched, is_test_message"
+                ") VALUES "
+                "(1001, 'late_cor', '2025-04-20 12:00:00', 'COR', 'late_cor', '4', "
+                "'ABC000542519', 'FRA', 'FAR', '{\"hauls\": []}', '20210001', false, "
+                "'ERS', false, false), "
+                "(1002, 'late_cor_ret', '2025-04-20 12:05:00', 'RET', NULL, "
+                "'late_cor', NULL, NULL, NULL, '{\"returnStatus\": \"000\"}', NULL, "
+                "false, 'ERS', false, false)"
+            )
+        )
+
+    yield
+
+    with engine.begin() as con:
+        con.execute(text("DELETE FROM logbook_reports WHERE id IN (1001, 1002)"))
+        con.execute(
+            text(
+                "DELETE FROM logbook_raw_messages "
+                "WHERE operation_number IN ('late_cor', 'late_cor_ret')"
+            )
+        )
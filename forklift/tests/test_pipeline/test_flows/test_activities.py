@@ -229,3 +229,26 @@ def test_activities(
 
     pd.testing.assert_frame_equal(activities_after_one_run, expected_activities)
     pd.testing.assert_frame_equal(activities_after_one_run, activities_after_two_runs)
+
+
+def test_activities_with_range_split(
+    drop_activities,
+    mess_up_activity_datetime_utc,
+    late_correction_of_report_4,
+    expected_activities,
+):
+    client = create_datawarehouse_client()
+
+    flow.replace(
+        flow.get_tasks("get_utcnow")[0], get_utcnow_mock_factory(datetime(2025, 2, 7))
+    )
+
+    query = "SELECT * FROM monitorfish.activities ORDER BY cfr, activity_datetime_utc"
+
+    expected_activities.loc[expected_activities.report_id == "4", "status"] = "REJECTED"
+
+    state = flow.run(start_months_ago=12, end_months_ago=0, n_splits=4)
+    assert state.is_successful()
+    activities = client.query_df(query)
+
+    pd.testing.assert_frame_equal(activities, expected_activities)
@@ -88,6 +88,39 @@ def test_extract_catches(expected_catches):
     pd.testing.assert_frame_equal(catches, expected_catches.head(0), check_dtype=False)
 
 
+def test_extract_catches_with_range_split(expected_catches):
+    catches = extract_catches.run(month_start=datetime(2025, 1, 1), n_splits=4)
+    pd.testing.assert_frame_equal(
+        catches.sort_values(["report_id", "species"]).reset_index(drop=True),
+        expected_catches,
+    )
+
+
+def test_extract_catches_with_range_split_and_late_correction(
+    late_correction_of_report_4, expected_catches
+):
+    expected_catches = expected_catches[expected_catches.report_id != "4"].reset_index(
+        drop=True
+    )
+
+    for n_splits in (1, 4):
+        catches = extract_catches.run(
+            month_start=datetime(2025, 1, 1), n_splits=n_splits
+        )
+        pd.testing.assert_frame_equal(
+            catches.sort_values(["report_id", "species"]).reset_index(drop=True),
+            expected_catches,
+        )
+
+
+def test_extract_bft_catches_with_range_split(expected_bft_catches):
+    catches = extract_bft_catches.run(month_start=datetime(2025, 1, 1), n_splits=4)
+    pd.testing.assert_frame_equal(
+        catches.sort_values(["report_id", "species"]).reset_index(drop=True),
+        expected_bft_catches,
+    )
+
+
 def test_extract_bft_catches(expected_bft_catches):
     catches = extract_bft_catches.run(month_start=datetime(2025, 1, 1))
     pd.testing.assert_frame_equal(
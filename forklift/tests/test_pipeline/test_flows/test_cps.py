@@ -1,4 +1,5 @@
 from datetime import datetime
+from unittest.mock import patch
 
 import pandas as pd
 import pytest
@@ -19,6 +20,7 @@ def drop_cps():
     yield
     print("Drop cps cleaning")
     client.command("DROP TABLE IF EXISTS monitorfish.cps")
+    client.command("DROP TABLE IF EXISTS monitorfish.watermarks")
 
 
 @fixture
@@ -59,6 +61,12 @@ def test_extract_cps(expected_cps):
     cps = extract_cps.run(month_start=datetime(2015, 2, 1))
     pd.testing.assert_frame_equal(cps, expected_cps.head(0), check_dtype=False)
 
+    cps = extract_cps.run(month_start=datetime(2025, 1, 1), report_ids=["31"])
+    pd.testing.assert_frame_equal(cps, expected_cps)
+
+    cps = extract_cps.run(month_start=datetime(2025, 1, 1), report_ids=[])
+    pd.testing.assert_frame_equal(cps, expected_cps.head(0), check_dtype=False)
+
 
 def test_cps(drop_cps):
     client = create_datawarehouse_client()
@@ -94,3 +102,53 @@ def test_cps(drop_cps):
     expected_report_ids = ["31"]
     assert discards_after_one_run.report_id.tolist() == expected_report_ids
     assert discards_after_two_runs.report_id.tolist() == expected_report_ids
+
+
+def test_cps_incremental(drop_cps):
+    client = create_datawarehouse_client()
+
+    flow.replace(
+        flow.get_tasks("get_utcnow")[0], get_utcnow_mock_factory(datetime(2025, 2, 1))
+    )
+
+    query = "SELECT * FROM monitorfish.cps ORDER BY report_id, species"
+
+    # Without watermarks, the first incremental run loads all months entirely
+    state = flow.run(start_months_ago=12, end_months_ago=0, incremental=True)
+    assert state.is_successful()
+    cps_after_one_run = client.query_df(query)
+
+    watermarks = client.query_df("SELECT * FROM monitorfish.watermarks FINAL")
+    assert set(watermarks.flow) == {"cps"}
+    assert "202501" in set(watermarks.partition)
+
+    # Subsequent runs only update modified reports
+    state = flow.run(start_months_ago=12, end_months_ago=0, incremental=True)
+    assert state.is_successful()
+    cps_after_two_runs = client.query_df(query)
+
+    pd.testing.assert_frame_equal(cps_after_one_run, cps_after_two_runs)
+    assert cps_after_two_runs.report_id.tolist() == ["31"]
+
+
+def test_cps_incremental_keeps_reports_if_loading_fails(drop_cps):
+    client = create_datawarehouse_client()
+
+    flow.replace(
+        flow.get_tasks("get_utcnow")[0], get_utcnow_mock_factory(datetime(2025, 2, 1))
+    )
+
+    query = "SELECT * FROM monitorfish.cps ORDER BY report_id, species"
+
+    state = flow.run(start_months_ago=12, end_months_ago=0, incremental=True)
+    assert state.is_successful()
+    cps_after_one_run = client.query_df(query)
+
+    with patch(
+        "forklift.pipeline.flows.cps.insert_df_in_blocks",
+        side_effect=Exception("Loading failed"),
+    ):
+        state = flow.run(start_months_ago=12, end_months_ago=0, incremental=True)
+    assert not state.is_successful()
+
+    pd.testing.assert_frame_equal(client.query_df(query), cps_after_one_run)
@@ -86,10 +86,9 @@ def init_rectangles_stat_areas(init_monitorfish):
         backend="geopandas",
         geom_col="wkb_geometry",
         destination_database="monitorfish",
-        destination_table="rectangles_stat_areas_tmp",
-        ddl_script_path="monitorfish/create_rectangles_stat_areas_tmp.sql",
-        post_processing_script_path="monitorfish/post_process_rectangles_stat_areas.sql",
-        final_table="rectangles_stat_areas",
+        destination_table="rectangles_stat_areas",
+        ddl_script_path="monitorfish/create_rectangles_stat_areas.sql",
+        geometry_format="native",
     )
     yield
     print("Dropping rectangles_stat_areas table")
@@ -126,10 +125,9 @@ def init_facade_areas_subdivided(init_monitorfish):
         backend="geopandas",
         geom_col="geometry",
         destination_database="monitorfish",
-        destination_table="facade_areas_subdivided_tmp",
-        ddl_script_path="monitorfish/create_facade_areas_subdivided_tmp.sql",
-        post_processing_script_path="monitorfish/post_process_facade_areas_subdivided.sql",
-        final_table="facade_areas_subdivided",
+        destination_table="facade_areas_subdivided",
+        ddl_script_path="monitorfish/create_facade_areas_subdivided.sql",
+        geometry_format="native",
     )
 
     print("Resetting facade areas dictionary")
@@ -1,12 +1,17 @@
 from datetime import datetime
 
 import pandas as pd
+import pyarrow as pa
 import pytest
 from clickhouse_connect.driver.exceptions import DatabaseError
 from pytest import fixture
 
 from forklift.db_engines import create_datawarehouse_client
 from forklift.pipeline.flows.landings import extract_landings, flow
+from forklift.pipeline.shared_tasks.generic import (
+    create_database_if_not_exists,
+    run_ddl_scripts,
+)
 from tests.mocks import get_utcnow_mock_factory, replace_check_flow_not_running
 
 replace_check_flow_not_running(flow)
@@ -19,6 +24,7 @@ def drop_landings():
     yield
     print("Drop landings cleaning")
     client.command("DROP TABLE IF EXISTS monitorfish.landings")
+    client.command("DROP TABLE IF EXISTS monitorfish.watermarks")
 
 
 @fixture
@@ -67,6 +73,43 @@ def test_extract_landings(expected_landings):
     )
 
 
+def test_extract_landings_arrow(expected_landings):
+    landings = extract_landings.run(month_start=datetime(2020, 5, 1), backend="arrow")
+    assert isinstance(landings, pa.Table)
+    pd.testing.assert_frame_equal(
+        landings.to_pandas()
+        .sort_values(["report_id", "species"])
+        .reset_index(drop=True),
+        expected_landings,
+        check_dtype=False,
+    )
+
+
+def test_extract_landings_with_table_dtypes(drop_landings):
+    create_database_if_not_exists.run("monitorfish")
+    run_ddl_scripts.run("monitorfish/create_landings_if_not_exists.sql")
+
+    landings = extract_landings.run(month_start=datetime(2020, 5, 1))
+
+    assert isinstance(landings.species.dtype, pd.CategoricalDtype)
+    assert isinstance(landings.port_name.dtype, pd.CategoricalDtype)
+    assert landings.conversion_factor.dtype == "float64"
+    assert landings.nb_fish.dtype == "float64"
+    assert landings.report_id.dtype == "object"
+    assert landings.species.tolist() == ["HAD"]
+    assert landings.conversion_factor.tolist() == [1.2]
+    assert landings.port_name.isna().all()
+
+    landings = extract_landings.run(month_start=datetime(2020, 5, 1), backend="arrow")
+    assert isinstance(landings, pa.Table)
+    assert landings.schema.field("species").type == pa.dictionary(
+        pa.int32(), pa.string()
+    )
+    assert landings.schema.field("conversion_factor").type == pa.float64()
+    assert landings.schema.field("report_id").type == pa.string()
+    assert landings.column("conversion_factor").to_pylist() == [1.2]
+
+
 def test_landings(drop_landings):
     client = create_datawarehouse_client()
 
@@ -97,3 +140,30 @@ def test_landings(drop_landings):
     catches_after_two_runs = client.query_df(query)
 
     assert len(catches_after_two_runs) == len(catches_after_one_run) == 2
+
+
+def test_landings_incremental(drop_landings):
+    client = create_datawarehouse_client()
+
+    flow.replace(
+        flow.get_tasks("get_utcnow")[0], get_utcnow_mock_factory(datetime(2024, 6, 7))
+    )
+
+    query = "SELECT * FROM monitorfish.landings ORDER BY report_id, species"
+
+    # Without watermarks, the first incremental run loads all months entirely
+    state = flow.run(start_months_ago=60, end_months_ago=0, incremental=True)
+    assert state.is_successful()
+    landings_after_one_run = client.query_df(query)
+
+    watermarks = client.query_df("SELECT * FROM monitorfish.watermarks FINAL")
+    assert set(watermarks.flow) == {"landings"}
+    assert "202005" in set(watermarks.partition)
+
+    # Subsequent runs only update modified reports
+    state = flow.run(start_months_ago=60, end_months_ago=0, incremental=True)
+    assert state.is_successful()
+    landings_after_two_runs = client.query_df(query)
+
+    pd.testing.assert_frame_equal(landings_after_one_run, landings_after_two_runs)
+    assert len(landings_after_two_runs) == 2
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 import pandas as pd
 import pytest
 
@@ -19,7 +21,8 @@ try:
     assert parameters == (
         "source_database,query_filepath,schema,table_name,backend,geom_col,"
         "destination_database,destination_table,ddl_script_path,"
-        "post_processing_script_path,final_table"
+        "post_processing_script_path,final_table,cache_ttl_hours,"
+        "freshness_query_filepath,geometry_format"
     )
 except AssertionError:
     raise ValueError("Test fixtures non coherent with CSV columns")
@@ -53,22 +56,30 @@ def test_sync_table_with_pandas(
     ddl_script_path,
     post_processing_script_path,
     final_table,
+    cache_ttl_hours,
+    freshness_query_filepath,
+    geometry_format,
+    tmp_path,
 ):
     client = create_datawarehouse_client()
 
-    state = flow.run(
-        source_database=source_database,
-        query_filepath=query_filepath,
-        schema=schema,
-        table_name=table_name,
-        backend=backend,
-        geom_col=geom_col,
-        destination_database=destination_database,
-        destination_table=destination_table,
-        ddl_script_path=ddl_script_path,
-        post_processing_script_path=post_processing_script_path,
-        final_table=final_table,
-    )
+    with patch("forklift.pipeline.helpers.generic.QUERY_CACHE_LOCATION", tmp_path):
+        state = flow.run(
+            source_database=source_database,
+            query_filepath=query_filepath,
+            schema=schema,
+            table_name=table_name,
+            backend=backend,
+            geom_col=geom_col,
+            destination_database=destination_database,
+            destination_table=destination_table,
+            ddl_script_path=ddl_script_path,
+            post_processing_script_path=post_processing_script_path,
+            final_table=final_table,
+            cache_ttl_hours=cache_ttl_hours,
+            freshness_query_filepath=freshness_query_filepath,
+            geometry_format=geometry_format,
+        )
 
     assert state.is_successful()
 
@@ -127,7 +138,7 @@ def test_sync_table_with_pandas(
             area_from_dict_2, expected_fao_areas, check_dtype=False
         )
 
-    if final_table == "eez_areas":
+    if expected_table == "eez_areas":
         state = reset_dict_flow.run(
             database="monitorfish",
             dictionary="eez_areas_dict",
@@ -159,7 +170,7 @@ def test_sync_table_with_pandas(
             area_from_dict_2, expected_eez_areas, check_dtype=False
         )
 
-    if final_table == "rectangles_stat_areas":
+    if expected_table == "rectangles_stat_areas":
         state = reset_dict_flow.run(
             database="monitorfish",
             dictionary="rectangles_stat_areas_dict",
@@ -191,7 +202,7 @@ def test_sync_table_with_pandas(
             area_from_dict_2, expected_stat_rectangle, check_dtype=False
         )
 
-    if final_table == "facade_areas_subdivided":
+    if expected_table == "facade_areas_subdivided":
         state = reset_dict_flow.run(
             database="monitorfish",
             dictionary="facade_areas_dict",
@@ -222,3 +233,75 @@ def test_sync_table_with_pandas(
         pd.testing.assert_frame_equal(
             area_from_dict_2, expected_facade, check_dtype=False
         )
+
+
+@pytest.mark.parametrize("destination_database", ["monitorfish"])
+def test_sync_table_with_pandas_skips_up_to_date_tables(
+    drop_db, destination_database, tmp_path
+):
+    client = create_datawarehouse_client()
+    extract_df_task = flow.get_tasks(name="extract_df")[0]
+
+    with patch("forklift.pipeline.helpers.generic.QUERY_CACHE_LOCATION", tmp_path):
+        states = [
+            flow.run(
+                source_database="monitorfish_remote",
+                query_filepath="monitorfish_remote/ports.sql",
+                backend="pandas",
+                destination_database=destination_database,
+                destination_table="ports",
+                ddl_script_path="monitorfish/create_ports.sql",
+                cache_ttl_hours=1,
+                freshness_query_filepath="monitorfish_remote/ports_freshness.sql",
+                geometry_format=geometry_format,
+            )
+            for geometry_format in ["wkt", "wkt", "native", "native"]
+        ]
+
+    assert all(state.is_successful() for state in states)
+    assert states[0].result[extract_df_task].is_successful()
+    assert not states[0].result[extract_df_task].is_skipped()
+    assert states[1].result[extract_df_task].is_skipped()
+
+    # Results loaded with another geometry format are loaded again
+    assert not states[2].result[extract_df_task].is_skipped()
+    assert states[3].result[extract_df_task].is_skipped()
+
+    ports = client.query_df("SELECT * FROM monitorfish.ports")
+    assert len(ports) > 0
+
+
+@pytest.mark.parametrize("destination_database", ["monitorfish"])
+def test_sync_table_with_pandas_keeps_destination_table_if_extraction_fails(
+    drop_db, destination_database
+):
+    client = create_datawarehouse_client()
+    flow_parameters = dict(
+        source_database="monitorfish_remote",
+        query_filepath="monitorfish_remote/regulations.sql",
+        backend="geopandas",
+        geom_col="geometry_simplified",
+        destination_database=destination_database,
+        destination_table="regulations",
+        ddl_script_path="monitorfish/create_regulations.sql",
+        geometry_format="native",
+    )
+
+    state = flow.run(**flow_parameters)
+    assert state.is_successful()
+    regulations = client.query_df("SELECT * FROM monitorfish.regulations ORDER BY id")
+    assert len(regulations) > 0
+
+    with patch(
+        "forklift.pipeline.flows.sync_table_with_pandas.extract",
+        side_effect=Exception("Extraction failed"),
+    ):
+        state = flow.run(**flow_parameters)
+
+    assert not state.is_successful()
+    pd.testing.assert_frame_equal(
+        client.query_df("SELECT * FROM monitorfish.regulations ORDER BY id"),
+        regulations,
+    )
+    tables_in_db = client.query_df("SHOW TABLES FROM monitorfish")
+    assert tables_in_db["name"].tolist() == ["regulations"]
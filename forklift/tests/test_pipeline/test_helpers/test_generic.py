@@ -1,11 +1,39 @@
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 from logging import Logger
+from unittest.mock import MagicMock, patch
 
+import geopandas as gpd
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pytest
+from clickhouse_connect.driver.exceptions import OperationalError
 from pytest import fixture
+from shapely.geometry import MultiPolygon, Point, Polygon
 
 from forklift.db_engines import create_datawarehouse_client
-from forklift.pipeline.helpers.generic import load_to_data_warehouse
+from forklift.pipeline.entities.generic import QueryCachePolicy
+from forklift.pipeline.helpers.generic import (
+    arrow_table_to_pandas,
+    cast_arrow_columns,
+    geodataframe_to_arrow,
+    geometries_to_arrow,
+    get_insert_deduplication_window,
+    insert_df_in_blocks,
+    load_to_data_warehouse,
+    mark_query_cache_entry_loaded,
+    prepare_df_for_data_warehouse,
+    query_cache_entry_is_fresh,
+    query_cache_entry_is_loaded,
+    read_postgresql_csv_chunks,
+    read_query,
+    read_query_cache_entry,
+    read_saved_query,
+    staging_partition,
+    write_query_cache_entry,
+)
 
 
 @fixture
@@ -13,8 +41,7 @@ def init_test_db():
     print("Test init")
     client = create_datawarehouse_client()
     client.command("CREATE DATABASE test_db")
-    client.command(
-        """
+    client.command("""
         CREATE TABLE test_db.test_table (
             int_id Integer,
             string_field String,
@@ -29,8 +56,7 @@ def init_test_db():
         )
         ENGINE MergeTree()
         ORDER BY int_id;
-    """
-    )
+    """)
     yield
     print("Test clean-up")
     client.command("DROP DATABASE IF EXISTS test_db")
@@ -83,3 +109,501 @@ def test_load_to_data_warehouse(init_test_db, df_to_load, expected_loaded_df):
     )
     loaded_df = client.query_df("SELECT * FROM test_db.test_table")
     pd.testing.assert_frame_equal(loaded_df, expected_loaded_df, check_dtype=False)
+
+
+def test_load_to_data_warehouse_in_chunks(init_test_db, df_to_load, expected_loaded_df):
+    client = create_datawarehouse_client()
+    logger = Logger("logger")
+
+    chunks = (df_to_load.iloc[i : i + 2] for i in range(0, len(df_to_load), 2))
+
+    load_to_data_warehouse(
+        df=chunks,
+        table_name="test_table",
+        database="test_db",
+        logger=logger,
+        datetime_cols_to_clip=["datetime_field", "nullable_datetime_field"],
+    )
+    loaded_df = client.query_df("SELECT * FROM test_db.test_table ORDER BY int_id")
+    pd.testing.assert_frame_equal(loaded_df, expected_loaded_df, check_dtype=False)
+
+
+def test_staging_partition(init_test_db):
+    client = create_datawarehouse_client()
+    client.command("""
+        CREATE TABLE test_db.partitioned_table (
+            int_id Integer,
+            month UInt32
+        )
+        ENGINE MergeTree()
+        PARTITION BY month
+        ORDER BY int_id;
+    """)
+    client.command("INSERT INTO test_db.partitioned_table VALUES (1, 1), (2, 2)")
+
+    def loaded_rows():
+        return client.query(
+            "SELECT int_id, month FROM test_db.partitioned_table ORDER BY int_id"
+        ).result_rows
+
+    with pytest.raises(RuntimeError):
+        with staging_partition(
+            database="test_db", table="partitioned_table", partition="2"
+        ) as staging_table:
+            client.command(f"INSERT INTO test_db.{staging_table} VALUES (3, 2)")
+            raise RuntimeError("Loading failed")
+
+    assert loaded_rows() == [(1, 1), (2, 2)]
+
+    with staging_partition(
+        database="test_db", table="partitioned_table", partition="2"
+    ) as staging_table:
+        assert staging_table == "partitioned_table_staging_2"
+        client.command(f"INSERT INTO test_db.{staging_table} VALUES (3, 2), (4, 2)")
+        assert loaded_rows() == [(1, 1), (2, 2)]
+
+    assert loaded_rows() == [(1, 1), (3, 2), (4, 2)]
+    assert not client.command("EXISTS TABLE test_db.partitioned_table_staging_2")
+
+    with staging_partition(
+        database="test_db",
+        table="partitioned_table",
+        partition="2",
+        copy_partition=True,
+    ) as staging_table:
+        client.command(f"DELETE FROM test_db.{staging_table} WHERE int_id = 3")
+        client.command(f"INSERT INTO test_db.{staging_table} VALUES (5, 2)")
+        assert loaded_rows() == [(1, 1), (3, 2), (4, 2)]
+
+    assert loaded_rows() == [(1, 1), (4, 2), (5, 2)]
+
+
+def test_query_cache_entry(tmp_path):
+    df = pd.DataFrame(
+        {
+            "locode": ["FRBRE", "FRLRH"],
+            "fao_areas": [["27.8", "27.8.a"], None],
+            "latitude": [48.38, None],
+        }
+    )
+    cache_policy = QueryCachePolicy(ttl=timedelta(hours=1))
+
+    with patch("forklift.pipeline.helpers.generic.QUERY_CACHE_LOCATION", tmp_path):
+        assert not query_cache_entry_is_fresh(
+            "some_key", cache_policy=cache_policy, freshness=[["1"]]
+        )
+
+        write_query_cache_entry("some_key", df, freshness=[["1"]])
+
+        assert query_cache_entry_is_fresh(
+            "some_key", cache_policy=cache_policy, freshness=[["1"]]
+        )
+        assert not query_cache_entry_is_fresh(
+            "some_key", cache_policy=cache_policy, freshness=[["2"]]
+        )
+        assert not query_cache_entry_is_fresh(
+            "some_key",
+            cache_policy=QueryCachePolicy(ttl=timedelta(0)),
+            freshness=[["1"]],
+        )
+        pd.testing.assert_frame_equal(read_query_cache_entry("some_key"), df)
+
+        assert not query_cache_entry_is_loaded("some_key", "monitorfish.ports")
+        mark_query_cache_entry_loaded("some_key", "monitorfish.ports")
+        assert query_cache_entry_is_loaded("some_key", "monitorfish.ports")
+
+        # Refreshing the entry resets its loading records
+        write_query_cache_entry("some_key", df, freshness=[["2"]])
+        assert not query_cache_entry_is_loaded("some_key", "monitorfish.ports")
+
+
+def test_read_saved_query_with_cache(tmp_path):
+    cache_policy = QueryCachePolicy(
+        ttl=timedelta(hours=1),
+        freshness_query_filepath="monitorfish_remote/ports_freshness.sql",
+    )
+
+    with patch("forklift.pipeline.helpers.generic.QUERY_CACHE_LOCATION", tmp_path):
+        ports = read_saved_query(
+            "monitorfish_remote/ports.sql",
+            db="monitorfish_remote",
+            cache_policy=cache_policy,
+        )
+        assert len(list(tmp_path.glob("*.parquet"))) == 1
+
+        cached_ports = read_saved_query(
+            "monitorfish_remote/ports.sql",
+            db="monitorfish_remote",
+            cache_policy=cache_policy,
+        )
+
+    pd.testing.assert_frame_equal(ports, cached_ports)
+
+
+def test_read_query_arrow_chunks():
+    query = (
+        "SELECT * FROM (VALUES "
+        "    (1, NULL::VARCHAR, NULL::TIMESTAMP, NULL::JSONB), "
+        "    (2, NULL, NULL, NULL), "
+        "    (3, 'a', '2025-01-01 12:00:00', '{\"a\": 1}'), "
+        "    (4, NULL, NULL, NULL)"
+        ") AS t (id, name, datetime_utc, value)"
+    )
+    chunks = list(
+        read_query(query, db="monitorfish_remote", backend="arrow", chunksize=1)
+    )
+
+    # Columns of known types have the same type in all chunks, even when all null
+    assert [chunk.num_rows for chunk in chunks] == [1, 1, 1, 1]
+    for chunk in chunks:
+        assert chunk.schema.field("id").type == pa.int32()
+        assert chunk.schema.field("name").type == pa.string()
+        assert chunk.schema.field("datetime_utc").type == pa.timestamp("us")
+
+    # Columns of other types are inferred, and keep their type in later chunks
+    assert [chunk.schema.field("value").type for chunk in chunks] == [
+        pa.null(),
+        pa.null(),
+        pa.struct([("a", pa.int64())]),
+        pa.struct([("a", pa.int64())]),
+    ]
+
+    table = read_query(query, db="monitorfish_remote", backend="arrow")
+    assert table.schema.field("name").type == pa.string()
+    assert table.column("name").to_pylist() == [None, None, "a", None]
+    assert table.column("datetime_utc").to_pylist() == [
+        None,
+        None,
+        datetime(2025, 1, 1, 12),
+        None,
+    ]
+
+    empty_table = read_query(
+        f"{query} WHERE id > 4", db="monitorfish_remote", backend="arrow"
+    )
+    assert empty_table.num_rows == 0
+    assert empty_table.schema.field("name").type == pa.string()
+
+
+def test_read_query_arrow_copy():
+    query = (
+        "SELECT "
+        "    id, name, flag, real_value, "
+        "    CAST(decimal_value AS NUMERIC(4, 2)) AS decimal_value, "
+        "    numeric_value, datetime_utc, time_of_day "
+        "FROM (VALUES "
+        "    (1, 'a,\"b', TRUE, 1.5::REAL, 1.25, 1.5::NUMERIC, "
+        "     '2025-01-01 12:00:00+02'::TIMESTAMPTZ, '12:30:00.5'::TIME), "
+        "    (2, '', FALSE, 'NaN', NULL, 'NaN', NULL, NULL), "
+        "    (3, NULL, NULL, NULL, NULL, NULL, NULL, NULL)"
+        ") AS t (id, name, flag, real_value, decimal_value, numeric_value, "
+        "        datetime_utc, time_of_day)"
+    )
+
+    # All columns have types which can be parsed from the output of `COPY`
+    with patch(
+        "forklift.pipeline.helpers.generic.read_postgresql_csv_chunks",
+        wraps=read_postgresql_csv_chunks,
+    ) as read_csv_mock:
+        table = read_query(query, db="monitorfish_remote", backend="arrow")
+        chunks = list(
+            read_query(query, db="monitorfish_remote", backend="arrow", chunksize=2)
+        )
+    assert read_csv_mock.call_count == 2
+
+    assert table.schema == pa.schema(
+        [
+            ("id", pa.int32()),
+            ("name", pa.string()),
+            ("flag", pa.bool_()),
+            ("real_value", pa.float32()),
+            ("decimal_value", pa.decimal128(4, 2)),
+            ("numeric_value", pa.float64()),
+            ("datetime_utc", pa.timestamp("us", tz="UTC")),
+            ("time_of_day", pa.time64("us")),
+        ]
+    )
+    assert [chunk.num_rows for chunk in chunks] == [2, 1]
+    pd.testing.assert_frame_equal(
+        pa.concat_tables(chunks).to_pandas(), table.to_pandas()
+    )
+
+    # Results are the same as when rows are fetched from the cursor
+    with patch(
+        "forklift.pipeline.helpers.generic.POSTGRESQL_CSV_TYPE_OIDS", set()
+    ), patch(
+        "forklift.pipeline.helpers.generic.read_postgresql_csv_chunks"
+    ) as read_csv_mock:
+        rows_table = read_query(query, db="monitorfish_remote", backend="arrow")
+    read_csv_mock.assert_not_called()
+    pd.testing.assert_frame_equal(table.to_pandas(), rows_table.to_pandas())
+
+    assert table.column("name").to_pylist() == ['a,"b', "", None]
+    assert table.column("decimal_value").to_pylist() == [Decimal("1.25"), None, None]
+    assert table.column("datetime_utc").to_pylist() == [
+        datetime(2025, 1, 1, 10, tzinfo=timezone.utc),
+        None,
+        None,
+    ]
+
+    empty_table = read_query(
+        f"{query} WHERE id > 4", db="monitorfish_remote", backend="arrow"
+    )
+    assert empty_table.num_rows == 0
+    assert empty_table.schema == table.schema
+
+
+def test_geodataframe_to_arrow():
+    square = Polygon([(0, 0), (1, 0), (1, 1), (0, 0)])
+    gdf = gpd.GeoDataFrame(
+        {
+            "id": [1, 2, 3],
+            "geometry": [square, MultiPolygon([square, square]), None],
+            "name": ["a", None, "c"],
+        },
+        crs=4326,
+    )
+
+    table = geodataframe_to_arrow(gdf)
+
+    ring = [
+        {"x": 0.0, "y": 0.0},
+        {"x": 1.0, "y": 0.0},
+        {"x": 1.0, "y": 1.0},
+        {"x": 0.0, "y": 0.0},
+    ]
+    assert table.column_names == ["id", "geometry", "name"]
+    assert table.column("id").to_pylist() == [1, 2, 3]
+    assert table.column("name").to_pylist() == ["a", None, "c"]
+    assert table.column("geometry").to_pylist() == [[[ring]], [[ring], [ring]], []]
+
+    points = geometries_to_arrow(gpd.GeoSeries([Point(1, 2), Point(3, 4)]))
+    assert points.to_pylist() == [{"x": 1.0, "y": 2.0}, {"x": 3.0, "y": 4.0}]
+
+    empty = geometries_to_arrow(gpd.GeoSeries([], dtype="geometry"))
+    assert len(empty) == 0
+    assert pa.types.is_list(empty.type)
+
+
+def test_prepare_df_for_data_warehouse():
+    gdf = gpd.GeoDataFrame(
+        {
+            "id": [1, 2, 3],
+            "out_of_range": pd.to_datetime(["1960-01-01", "2000-01-01", None]),
+            "in_range": pd.to_datetime(["1990-01-01", "2000-01-01", None]),
+            "geometry": [Point(1, 2), None, Point(3, 4)],
+        },
+        crs=4326,
+    )
+    original = gdf.copy(deep=True)
+
+    res, n_allocated_bytes = prepare_df_for_data_warehouse(
+        gdf, datetime_cols_to_clip=["out_of_range", "in_range"]
+    )
+
+    expected = pd.DataFrame(
+        {
+            "id": [1, 2, 3],
+            "out_of_range": pd.to_datetime(["1970-01-01", "2000-01-01", None]),
+            "in_range": pd.to_datetime(["1990-01-01", "2000-01-01", None]),
+            "geometry": ["POINT (1 2)", None, "POINT (3 4)"],
+        }
+    )
+    pd.testing.assert_frame_equal(res, expected)
+    pd.testing.assert_frame_equal(gdf, original)
+
+    # Untouched columns are shared with the input, not copied
+    assert np.shares_memory(res["id"].values, gdf["id"].values)
+    assert np.shares_memory(res["in_range"].values, gdf["in_range"].values)
+    assert not np.shares_memory(res["out_of_range"].values, gdf["out_of_range"].values)
+    assert n_allocated_bytes >= 3 * 8 + res["geometry"].memory_usage(
+        index=False, deep=True
+    )
+
+
+def test_insert_df_in_blocks():
+    client = MagicMock()
+    client.insert_df.side_effect = [OperationalError("Timeout"), None, None, None]
+
+    class MockPool:
+        @contextmanager
+        def client(self):
+            yield client
+
+    df = pd.DataFrame({"id": range(5)})
+    with (
+        patch(
+            "forklift.pipeline.helpers.generic.datawarehouse_client_pool", MockPool()
+        ),
+        patch(
+            "forklift.pipeline.helpers.generic.get_insert_deduplication_window",
+            return_value=1000,
+        ),
+    ):
+        insert_df_in_blocks(
+            df,
+            table_name="t",
+            database="db",
+            block_size=2,
+            max_workers=1,
+            max_retries=2,
+        )
+
+    calls = client.insert_df.call_args_list
+    assert len(calls) == 4
+    assert [c.kwargs["df"]["id"].tolist() for c in calls] == [
+        [0, 1],
+        [0, 1],
+        [2, 3],
+        [4],
+    ]
+    tokens = [c.kwargs["settings"]["insert_deduplication_token"] for c in calls]
+    assert tokens[0] == tokens[1]
+    assert len(set(tokens)) == 3
+
+    # Blocks are not retried by default
+    client.reset_mock()
+    client.insert_df.side_effect = [OperationalError("Timeout")]
+    with patch(
+        "forklift.pipeline.helpers.generic.datawarehouse_client_pool", MockPool()
+    ):
+        with pytest.raises(OperationalError):
+            insert_df_in_blocks(
+                df, table_name="t", database="db", block_size=5, max_workers=1
+            )
+    assert client.insert_df.call_count == 1
+
+    # Blocks are not retried if the table has no deduplication window
+    client.reset_mock()
+    client.insert_df.side_effect = [OperationalError("Timeout"), None]
+    with (
+        patch(
+            "forklift.pipeline.helpers.generic.datawarehouse_client_pool", MockPool()
+        ),
+        patch(
+            "forklift.pipeline.helpers.generic.get_insert_deduplication_window",
+            return_value=0,
+        ),
+    ):
+        with pytest.raises(OperationalError):
+            insert_df_in_blocks(
+                df,
+                table_name="t",
+                database="db",
+                block_size=5,
+                max_workers=1,
+                max_retries=2,
+            )
+    assert client.insert_df.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "tables,default,expected",
+    [
+        ([], [["0"]], 0),
+        ([("Memory", "Memory")], [["0"]], 0),
+        (
+            [("MergeTree", "MergeTree ORDER BY id SETTINGS index_granularity = 8192")],
+            [["0"]],
+            0,
+        ),
+        (
+            [("MergeTree", "MergeTree ORDER BY id SETTINGS index_granularity = 8192")],
+            [["100"]],
+            100,
+        ),
+        (
+            [
+                (
+                    "MergeTree",
+                    "MergeTree ORDER BY id SETTINGS "
+                    "non_replicated_deduplication_window = 1000, "
+                    "index_granularity = 8192",
+                )
+            ],
+            [["0"]],
+            1000,
+        ),
+        (
+            [
+                (
+                    "ReplicatedMergeTree",
+                    "ReplicatedMergeTree('/t', 'r') ORDER BY id SETTINGS "
+                    "non_replicated_deduplication_window = 1000",
+                )
+            ],
+            [["10000"]],
+            10000,
+        ),
+    ],
+)
+def test_get_insert_deduplication_window(tables, default, expected):
+    client = MagicMock()
+    client.query.side_effect = [
+        MagicMock(result_rows=tables),
+        MagicMock(result_rows=default),
+    ]
+
+    class MockPool:
+        @contextmanager
+        def client(self):
+            yield client
+
+    with patch(
+        "forklift.pipeline.helpers.generic.datawarehouse_client_pool", MockPool()
+    ):
+        assert get_insert_deduplication_window(database="db", table="t") == expected
+
+
+def test_cast_arrow_columns_and_convert_to_pandas():
+    table = pa.table(
+        {
+            "species": pa.array(["COD", None, "COD"]),
+            "n_fish": pa.array([1, None, 3], type=pa.int64()),
+            "weight": pa.array(["1.5", None, "2"]),
+            "landed": pa.array([True, None, False]),
+            "report_id": pa.array(["a", "b", "c"]),
+            "landing_datetime_utc": pa.array(
+                [datetime(2024, 1, 1), None, datetime(2024, 1, 2)],
+                type=pa.timestamp("us"),
+            ),
+        }
+    )
+
+    table = cast_arrow_columns(
+        table,
+        {
+            "species": pa.dictionary(pa.int32(), pa.string()),
+            "n_fish": pa.uint16(),
+            "weight": pa.float32(),
+            "landed": pa.bool_(),
+            "not_in_table": pa.int8(),
+        },
+    )
+    assert table.schema == pa.schema(
+        {
+            "species": pa.dictionary(pa.int32(), pa.string()),
+            "n_fish": pa.uint16(),
+            "weight": pa.float32(),
+            "landed": pa.bool_(),
+            "report_id": pa.string(),
+            "landing_datetime_utc": pa.timestamp("us"),
+        }
+    )
+
+    df = arrow_table_to_pandas(table)
+    pd.testing.assert_frame_equal(
+        df,
+        pd.DataFrame(
+            {
+                "species": pd.Categorical(["COD", None, "COD"]),
+                "n_fish": pd.array([1, None, 3], dtype="UInt16"),
+                "weight": np.array([1.5, np.nan, 2.0], dtype="float32"),
+                "landed": pd.array([True, None, False], dtype="boolean"),
+                "report_id": ["a", "b", "c"],
+                "landing_datetime_utc": pd.to_datetime(
+                    ["2024-01-01", None, "2024-01-02"]
+                ),
+            }
+        ),
+    )
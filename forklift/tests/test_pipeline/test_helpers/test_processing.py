@@ -6,15 +6,19 @@ from unittest.mock import Mock, patch
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
 import pytest
 import pytz
+import simplejson
 from sqlalchemy import Column, Integer, MetaData, Table
 
 from forklift.pipeline.entities.generic import IdRange
 from forklift.pipeline.helpers.processing import (
     array_equals_row_on_window,
     back_propagate_ones,
+    clickhouse_type_to_arrow_type,
     coalesce,
+    codes_isin_by_decreasing_priority,
     concatenate_columns,
     concatenate_values,
     df_to_dict_series,
@@ -24,6 +28,8 @@ from forklift.pipeline.helpers.processing import (
     drop_rows_already_in_table,
     get_id_ranges,
     get_matched_groups,
+    get_run_lengths,
+    get_sub_ranges,
     get_unused_col_name,
     is_a_value,
     join_on_multiple_keys,
@@ -31,6 +37,9 @@ from forklift.pipeline.helpers.processing import (
     prepare_df_for_loading,
     remove_nones_from_list,
     rows_belong_to_sequence,
+    serialize_enum_series,
+    serialize_nullable_integer_df,
+    serialize_timedelta_df,
     to_json,
     to_pgarr,
     zeros_ones_to_bools,
@@ -112,6 +121,14 @@ def test_combine_overlapping_columns():
     assert res.values[5] is None
     assert res.values[6] is None
 
+    # Columns with the same dtype give an object Series with None for null rows
+    df = pd.DataFrame(
+        {"a": [1.5, np.nan, np.nan], "b": [2.5, 3.5, np.nan]}, index=[3, 2, 1]
+    )
+    pd.testing.assert_series_equal(
+        coalesce(df), pd.Series([1.5, 3.5, None], index=[3, 2, 1], dtype=object)
+    )
+
 
 def test_df_to_dict_series():
     df = pd.DataFrame(
@@ -150,6 +167,26 @@ def test_df_to_dict_series():
     assert (res.index == [0, 1, 4, 123, 3]).all()
     assert res.values.tolist() == expected_values
 
+    res = df_to_dict_series(df, remove_nulls=True)
+    assert res.name == "json_col"
+    assert res.values.tolist() == [
+        {k: v for k, v in d.items() if v is not None} for d in expected_values
+    ]
+
+    # numpy and datetime values are kept
+    df = pd.DataFrame(
+        {
+            "float": [1.5, np.nan],
+            "datetime": pd.to_datetime(["2020-01-01 12:00:00", None]),
+            "array": [np.array([1, 2]), None],
+        }
+    )
+    res = df_to_dict_series(df).values.tolist()
+    assert res[0]["float"] == 1.5
+    assert res[0]["datetime"] == pd.Timestamp("2020-01-01 12:00:00")
+    np.testing.assert_array_equal(res[0]["array"], np.array([1, 2]))
+    assert res[1] == {"float": None, "datetime": None, "array": None}
+
 
 def test_zeros_ones_to_bools():
     # Test with DataFrame
@@ -350,6 +387,70 @@ def test_df_values_to_json():
     assert res.values.tolist() == expected_values
 
 
+def test_to_json_orjson():
+    est_tz = pytz.timezone("est")
+    x = {
+        "a": {
+            "int": 1,
+            "None": None,
+            "np.nan": np.nan,
+            "pandas NaT": pd.NaT,
+            "numpy array": np.array([[1, 2, 3], [4, 5, 6]]),
+            "numpy int": np.int64(3),
+            "date": datetime.date(2020, 12, 5),
+            "datetime": datetime.datetime(2020, 3, 11, 20, 5, 12),
+            "datetime_tz_est": est_tz.localize(
+                datetime.datetime(2020, 3, 11, 20, 5, 12)
+            ),
+            2: "b",
+        }
+    }
+
+    assert to_json(x, backend="orjson") == (
+        '{"a":{"int":1,"None":null,"np.nan":null,"pandas NaT":null,'
+        '"numpy array":[[1,2,3],[4,5,6]],"numpy int":3,"date":"2020-12-05",'
+        '"datetime":"2020-03-11T20:05:12Z",'
+        '"datetime_tz_est":"2020-03-12T01:05:12Z","2":"b"}}'
+    )
+    assert to_json(np.nan, backend="orjson") == "null"
+
+    # Values orjson cannot serialize fall back to simplejson
+    assert to_json([2**70], backend="orjson") == "[1180591620717411303424]"
+
+    with pytest.raises(ValueError):
+        to_json(x, backend="json")
+
+
+def test_to_json_simplejson_serializes_numpy_scalars_as_values():
+    assert to_json({"a": np.int64(3)}) == '{"a": 3}'
+    assert (
+        to_json({"a": np.uint8(255), "b": np.bool_(False)}) == '{"a": 255, "b": false}'
+    )
+    assert to_json([np.float32(0.25), np.float16("inf")]) == "[0.25, null]"
+    assert to_json({"a": np.int64(3)}) == simplejson.dumps({"a": 3})
+
+
+def test_to_json_backends_serialize_numpy_scalars_alike():
+    x = [np.int64(3), np.int32(-2), np.float32(1.5), np.float32("nan"), np.bool_(True)]
+    assert to_json(x) == "[3, -2, 1.5, null, true]"
+    assert to_json(x, backend="orjson") == "[3,-2,1.5,null,true]"
+
+
+def test_df_values_to_json_orjson():
+    df = pd.DataFrame(
+        {
+            "a": [[1, 2, 3], {"a": 1, "b": None}, None],
+            "b": [1.0, np.nan, 3.5],
+        }
+    )
+    res = df_values_to_json(df, backend="orjson")
+    assert res.values.tolist() == [
+        ["[1,2,3]", "1.0"],
+        ['{"a":1,"b":null}', "null"],
+        ["null", "3.5"],
+    ]
+
+
 def test_df_values_to_psql_arrays():
     df = pd.DataFrame(
         {
@@ -376,6 +477,83 @@ def test_df_values_to_psql_arrays():
 
     assert res.values.tolist() == expected_values
 
+    # Lists that Arrow cannot convert are serialized element by element
+    df = pd.DataFrame(
+        {
+            "numpy_arrays": [np.array(["a"]), np.array([1]), np.array([1.5, 2])],
+            "big_integers": [[2**70], [1, -(2**70)], [2**63]],
+            "bytes": [[b"a"], [], None],
+        }
+    )
+    res = df_values_to_psql_arrays(df)
+    assert res.values.tolist() == [
+        ["{a}", "{1180591620717411303424}", "{b'a'}"],
+        ["{1}", "{1,-1180591620717411303424}", "{}"],
+        ["{1.5,2.0}", "{9223372036854775808}", "{}"],
+    ]
+
+
+def test_serialize_nullable_integer_df():
+    df = pd.DataFrame(
+        {
+            "float": [2.0, np.nan, -3.0],
+            "object": [1, None, 2**70],
+            "int": [1, 2, 3],
+            "nullable_int": pd.array([1, None, 3], dtype="Int64"),
+        }
+    )
+    res = serialize_nullable_integer_df(df)
+    assert res.values.tolist() == [
+        ["2", "1", "1", "1"],
+        [None, None, "2", None],
+        ["-3", "1180591620717411303424", "3", "3"],
+    ]
+
+
+def test_serialize_timedelta_df():
+    timedeltas = pd.to_timedelta(
+        [
+            "1 days 00:00:21",
+            "-1s",
+            "-2 days 3h",
+            "500ms",
+            "1001us",
+            "-1ns",
+            "0s",
+            None,
+            "100000 days 1s",
+        ]
+    )
+    whole_days = pd.to_timedelta(["1 days", "-2 days", None])
+    df = pd.DataFrame({"timedelta": timedeltas, "whole_days": whole_days.repeat(3)})
+
+    res = serialize_timedelta_df(df)
+
+    assert res["timedelta"].tolist() == [
+        "1 days 00:00:21",
+        "-1 days +23:59:59",
+        "-3 days +21:00:00",
+        "0 days 00:00:00.500000",
+        "0 days 00:00:00.001001",
+        "-1 days +23:59:59.999999999",
+        "0 days 00:00:00",
+        None,
+        "100000 days 00:00:01",
+    ]
+    assert res["whole_days"].tolist() == ["1 days"] * 3 + ["-2 days"] * 3 + [None] * 3
+
+
+def test_serialize_enum_series():
+    class MyEnum(Enum):
+        A = "AAA"
+        B = "BBB"
+
+    s = pd.Series([MyEnum.A, None, MyEnum.B, MyEnum.A, np.nan], index=[5, 4, 3, 2, 1])
+    res = serialize_enum_series(s)
+    pd.testing.assert_series_equal(
+        res, pd.Series(["AAA", None, "BBB", "AAA", None], index=[5, 4, 3, 2, 1])
+    )
+
 
 @patch("forklift.pipeline.helpers.processing.pd")
 def test_drop_rows_already_in_table(mock_pandas):
@@ -415,6 +593,49 @@ def test_drop_rows_already_in_table(mock_pandas):
     assert res.values.tolist() == expected_values
 
 
+@patch("forklift.pipeline.helpers.processing.select_ids_not_in_table")
+def test_drop_rows_already_in_table_with_temp_table(mock_select_ids_not_in_table):
+    df = pd.DataFrame(
+        data=[
+            [1, "a"],
+            [2, "first_value"],
+            [2, "second_value_gets_dropped"],
+            [None, "null_id"],
+            [3, "b"],
+        ],
+        columns=pd.Index(["df_id_column", "a"]),
+    )
+
+    table = Table("my_test_table", MetaData(), Column("table_id_column", Integer))
+    mock_connection = Mock()
+    mock_select_ids_not_in_table.return_value = pd.Series([2.0, 3.0])
+
+    res = drop_rows_already_in_table(
+        df=df,
+        df_column_name="df_id_column",
+        table=table,
+        table_column_name="table_id_column",
+        connection=mock_connection,
+        logger=logging.Logger("test_logger"),
+        strategy="temp_table",
+    )
+
+    ids, *_ = mock_select_ids_not_in_table.call_args.args
+    assert ids.tolist() == [1.0, 2.0, 3.0]
+    assert res["a"].tolist() == ["first_value", "null_id", "b"]
+
+    with pytest.raises(ValueError):
+        drop_rows_already_in_table(
+            df=df,
+            df_column_name="df_id_column",
+            table=table,
+            table_column_name="table_id_column",
+            connection=mock_connection,
+            logger=logging.Logger("test_logger"),
+            strategy="anti_join",
+        )
+
+
 def test_prepare_df_for_loading():
     class MyEnum(Enum):
         A = "AAA"
@@ -667,6 +888,79 @@ def test_join_on_multiple_keys():
     )
 
 
+def test_join_on_multiple_keys_with_null_keys_ties_and_empty_frames():
+    left = pd.DataFrame(
+        {
+            "cfr": ["A", "B", None, np.nan],
+            "ircs": ["a", "b", "c", None],
+            "value": [1, 2, 3, 4],
+        }
+    )
+    right = pd.DataFrame(
+        {
+            "cfr": ["A", None, "Z", np.nan, "A"],
+            "ircs": ["x", "a", "b", None, None],
+            "name": ["V1", "V2", "V3", "V4", "V5"],
+        }
+    )
+
+    # Row 'A' matches V1 and V5 on cfr, and V2 on ircs since V2 has no cfr. 'B'
+    # does not match V3 on ircs, their cfrs being different. Null keys never match,
+    # even with other null keys.
+    res = join_on_multiple_keys(left, right, or_join_keys=["cfr", "ircs"], how="outer")
+    expected = pd.DataFrame(
+        {
+            "cfr": ["A", "A", "A", "B", None, np.nan, "Z", np.nan],
+            "ircs": ["a", "a", "a", "b", "c", None, "b", None],
+            "value": [1.0, 1.0, 1.0, 2.0, 3.0, 4.0, np.nan, np.nan],
+            "name": ["V1", "V5", "V2", np.nan, np.nan, np.nan, "V3", "V4"],
+        }
+    )
+    pd.testing.assert_frame_equal(res, expected)
+
+    res = join_on_multiple_keys(left, right, or_join_keys=["cfr", "ircs"])
+    pd.testing.assert_frame_equal(
+        res, expected.iloc[:3].astype({"value": int}), check_index_type=False
+    )
+
+    # Null values of `and_join_keys` never match either
+    res = join_on_multiple_keys(
+        left.assign(year=[2020, np.nan, 2020, 2020]),
+        right.assign(year=[2020, 2021, 2020, 2020, np.nan]),
+        or_join_keys=["cfr", "ircs"],
+        and_join_keys=["year"],
+    )
+    assert res.values.tolist() == [["A", "a", 1, 2020.0, "V1"]]
+
+    # Empty DataFrames
+    empty_left = left.iloc[:0]
+    empty_right = right.iloc[:0]
+    for how in ("inner", "left", "right", "outer"):
+        res = join_on_multiple_keys(
+            empty_left, empty_right, or_join_keys=["cfr", "ircs"], how=how
+        )
+        assert list(res) == ["cfr", "ircs", "value", "name"]
+        assert len(res) == 0
+
+    res = join_on_multiple_keys(
+        empty_left, right, or_join_keys=["cfr", "ircs"], how="left"
+    )
+    assert len(res) == 0
+
+    res = join_on_multiple_keys(
+        empty_left, right, or_join_keys=["cfr", "ircs"], how="outer"
+    )
+    assert list(res) == ["cfr", "ircs", "value", "name"]
+    assert res["name"].tolist() == ["V1", "V2", "V3", "V4", "V5"]
+    assert res["value"].isna().all()
+
+    res = join_on_multiple_keys(
+        left, empty_right, or_join_keys=["cfr", "ircs"], how="left"
+    )
+    assert res["value"].tolist() == [1, 2, 3, 4]
+    assert res["name"].isna().all()
+
+
 def test_left_isin_right_by_decreasing_priority():
     left = pd.DataFrame(
         {
@@ -741,6 +1035,29 @@ def test_left_isin_right_by_decreasing_priority():
     pd.testing.assert_series_equal(res, expected)
 
 
+def test_codes_isin_by_decreasing_priority():
+    left_codes = np.array(
+        [
+            [0, 1, -1],
+            [-1, 1, -1],
+            [-1, 2, 3],
+            [-1, -1, 3],
+            [1, -1, 4],
+            [-1, -1, -1],
+        ]
+    )
+    right_codes = np.array(
+        [
+            [2, 1, -1],
+            [-1, 0, 3],
+            [-1, -1, 4],
+        ]
+    )
+
+    res = codes_isin_by_decreasing_priority(left_codes, right_codes)
+    np.testing.assert_array_equal(res, [False, True, False, True, True, False])
+
+
 def test_drop_duplicates_by_decreasing_priority():
     df = pd.DataFrame(
         {
@@ -766,6 +1083,46 @@ def test_drop_duplicates_by_decreasing_priority():
         drop_duplicates_by_decreasing_priority(df, empty_list)
 
 
+def test_drop_duplicates_by_decreasing_priority_with_ties_nan_and_empty_frames():
+    df = pd.DataFrame(
+        {
+            "cfr": ["A", None, None, "B", None, "A", None],
+            "ircs": ["x", "x", "y", "y", "y", None, "z"],
+            "external_immatriculation": [None, "1", "2", "3", "3", "4", "4"],
+            "value": range(7),
+        },
+        index=[5, 4, 3, 2, 1, 0, 9],
+    )
+    subset = ["cfr", "ircs", "external_immatriculation"]
+
+    # Rows without cfr are duplicates of the first row with the same ircs. The last
+    # row is kept: it only shares its external immatriculation with a row which is
+    # itself a duplicate, and its ircs differs from the row that row duplicates.
+    res = drop_duplicates_by_decreasing_priority(df, subset=subset)
+    pd.testing.assert_frame_equal(res, df.iloc[[0, 3, 6]])
+
+    # None and NaN keys are not considered, and rows with all null keys are dropped
+    df = pd.DataFrame(
+        {
+            "cfr": [np.nan, None, float("nan"), "A"],
+            "ircs": [np.nan, "x", None, "x"],
+            "value": range(4),
+        }
+    )
+    res = drop_duplicates_by_decreasing_priority(df, subset=["cfr", "ircs"])
+    pd.testing.assert_frame_equal(res, df.iloc[[3]])
+
+    res = drop_duplicates_by_decreasing_priority(df.iloc[:3], subset=["cfr", "ircs"])
+    pd.testing.assert_frame_equal(res, df.iloc[[1]])
+
+    res = drop_duplicates_by_decreasing_priority(df.iloc[[0, 2]], subset=["cfr"])
+    pd.testing.assert_frame_equal(res, df.iloc[:0])
+
+    # Empty DataFrame
+    res = drop_duplicates_by_decreasing_priority(df.iloc[:0], subset=["cfr", "ircs"])
+    pd.testing.assert_frame_equal(res, df.iloc[:0])
+
+
 def test_array_equals_row_on_window():
     arr = np.array(
         [
@@ -870,6 +1227,19 @@ def test_rows_belong_to_sequence():
     expected_res = np.array([np.nan, np.nan, np.nan, 0.0, 0.0, 0.0])
     np.testing.assert_array_equal(res, expected_res)
 
+    res = rows_belong_to_sequence(arr, row, 1)
+    expected_res = np.array([1.0, 1.0, 1.0, 0.0, 0.0, 0.0])
+    np.testing.assert_array_equal(res, expected_res)
+
+    res = rows_belong_to_sequence(arr[:0], row, 2)
+    assert res.shape == (0,)
+
+
+def test_get_run_lengths():
+    arr = np.array([True, True, False, True, True, True, False, False])
+    np.testing.assert_array_equal(get_run_lengths(arr), [2, 2, 1, 3, 3, 3, 2, 2])
+    np.testing.assert_array_equal(get_run_lengths(np.array([])), [])
+
 
 def test_get_matched_groups():
     regex = re.compile(
@@ -943,6 +1313,36 @@ def test_get_id_ranges_returns_id_ranges():
     ]
 
 
+def test_get_id_ranges_with_weights():
+    ids = list(range(1, 11))
+    weights = [1, 1, 1, 5, 1, 1, 0, 0, 2, 1]
+
+    assert get_id_ranges(ids=ids, batch_size=3, weights=weights) == [
+        IdRange(id_min=1, id_max=3),
+        IdRange(id_min=4, id_max=4),
+        IdRange(id_min=5, id_max=5),
+        IdRange(id_min=6, id_max=9),
+        IdRange(id_min=10, id_max=10),
+    ]
+
+    assert get_id_ranges(ids=ids, batch_size=4, weights=[1] * 10) == get_id_ranges(
+        ids=ids, batch_size=4
+    )
+
+    assert get_id_ranges(ids=ids, batch_size=100, weights=weights) == [
+        IdRange(id_min=1, id_max=10)
+    ]
+
+    # Does not hit the recursion limit
+    assert len(get_id_ranges(ids=list(range(100000)), batch_size=2)) == 50000
+
+    with pytest.raises(AssertionError):
+        get_id_ranges(ids=ids, batch_size=3, weights=[1, 2, 3])
+
+    with pytest.raises(AssertionError):
+        get_id_ranges(ids=ids, batch_size=3, weights=[-1] * 10)
+
+
 def test_get_id_ranges_raises_if_invalid_input():
     with pytest.raises(AssertionError):
         get_id_ranges([1, 2, 3], batch_size=0)
@@ -952,3 +1352,50 @@ def test_get_id_ranges_raises_if_invalid_input():
 
     with pytest.raises(AssertionError):
         get_id_ranges("This is not a list", batch_size=5)
+
+
+def test_get_sub_ranges():
+    assert get_sub_ranges(0, 10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert get_sub_ranges(0, 10, 1) == [(0, 10)]
+    assert get_sub_ranges(0, 2, 3) == [(0, 1), (1, 2)]
+    assert get_sub_ranges(0, 0, 3) == []
+
+    assert get_sub_ranges(datetime.date(2025, 1, 1), datetime.date(2025, 2, 1), 2) == [
+        (datetime.date(2025, 1, 1), datetime.date(2025, 1, 16)),
+        (datetime.date(2025, 1, 16), datetime.date(2025, 2, 1)),
+    ]
+
+    assert get_sub_ranges(
+        datetime.datetime(2025, 1, 1), datetime.datetime(2025, 1, 2), 4
+    ) == [
+        (datetime.datetime(2025, 1, 1, 0), datetime.datetime(2025, 1, 1, 6)),
+        (datetime.datetime(2025, 1, 1, 6), datetime.datetime(2025, 1, 1, 12)),
+        (datetime.datetime(2025, 1, 1, 12), datetime.datetime(2025, 1, 1, 18)),
+        (datetime.datetime(2025, 1, 1, 18), datetime.datetime(2025, 1, 2, 0)),
+    ]
+
+    with pytest.raises(ValueError):
+        get_sub_ranges("a", "z", 2)
+
+
+def test_clickhouse_type_to_arrow_type():
+    string_dictionary = pa.dictionary(pa.int32(), pa.string())
+    assert clickhouse_type_to_arrow_type("LowCardinality(String)") == string_dictionary
+    assert (
+        clickhouse_type_to_arrow_type("LowCardinality(Nullable(String))")
+        == string_dictionary
+    )
+    assert clickhouse_type_to_arrow_type("Int32") == pa.int32()
+    assert clickhouse_type_to_arrow_type("UInt8") == pa.uint8()
+    assert clickhouse_type_to_arrow_type("Nullable(Int64)") == pa.int64()
+    assert clickhouse_type_to_arrow_type("Nullable(UInt16)") == pa.uint16()
+    assert clickhouse_type_to_arrow_type("Float32") == pa.float32()
+    assert clickhouse_type_to_arrow_type("Nullable(Float32)") == pa.float32()
+    assert clickhouse_type_to_arrow_type("Float64") == pa.float64()
+    assert clickhouse_type_to_arrow_type("Bool") == pa.bool_()
+    assert clickhouse_type_to_arrow_type("Nullable(Bool)") == pa.bool_()
+    assert clickhouse_type_to_arrow_type("String") is None
+    assert clickhouse_type_to_arrow_type("Nullable(String)") is None
+    assert clickhouse_type_to_arrow_type("DateTime") is None
+    assert clickhouse_type_to_arrow_type("Array(String)") is None
+    assert clickhouse_type_to_arrow_type("MultiPolygon") is None
@@ -0,0 +1,561 @@
+import struct
+from datetime import date, datetime
+from logging import Logger
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from pytest import fixture
+from sqlalchemy import (
+    REAL,
+    VARCHAR,
+    BigInteger,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Integer,
+    MetaData,
+    Numeric,
+    SmallInteger,
+    Table,
+    Text,
+    select,
+    text,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION, JSONB
+from sqlalchemy.exc import IntegrityError
+
+from forklift.db_engines import create_engine
+from forklift.pipeline.helpers.generic import load
+from forklift.pipeline.utils import (
+    PGCOPY_HEADER,
+    PGCOPY_TRAILER,
+    BytesIteratorFile,
+    create_temporary_table_like,
+    encode_pgcopy_column,
+    encode_pgcopy_rows,
+    get_dependent_objects,
+    get_pgcopy_encoder,
+    get_table,
+    psql_insert_copy_binary,
+    select_ids_not_in_table,
+    upsert_from_table,
+)
+
+
+def test_get_pgcopy_encoder():
+    table = Table(
+        "t",
+        MetaData(),
+        Column("a", Boolean),
+        Column("b", SmallInteger),
+        Column("c", Integer),
+        Column("d", BigInteger),
+        Column("e", REAL),
+        Column("f", DOUBLE_PRECISION),
+        Column("g", VARCHAR),
+        Column("h", Text),
+        Column("i", JSONB),
+        Column("j", DateTime(timezone=True)),
+        Column("k", Date),
+        Column("l", Numeric),
+    )
+    assert [get_pgcopy_encoder(c.type) for c in table.columns] == [
+        "bool",
+        "int2",
+        "int4",
+        "int8",
+        "float4",
+        "float8",
+        "text",
+        "text",
+        "jsonb",
+        "timestamp",
+        "date",
+        None,
+    ]
+
+
+def test_encode_pgcopy_rows():
+    df = pd.DataFrame(
+        {
+            "id": [1, 2, None],
+            "value": [1.5, np.nan, -2.0],
+            "name": ["abc", None, "é"],
+            "data": ['{"a": 1}', None, None],
+            "is_ok": [True, False, None],
+            "ts": [
+                datetime(2000, 1, 1, 0, 0, 1),
+                pd.NaT,
+                datetime(1999, 12, 31, 23, 0),
+            ],
+            "d": [date(2000, 1, 3), None, date(1999, 12, 31)],
+        }
+    )
+
+    res = encode_pgcopy_rows(
+        df, ["int8", "float8", "text", "jsonb", "bool", "timestamp", "date"]
+    )
+
+    def field(fmt, value):
+        packed = struct.pack(fmt, value)
+        return struct.pack(">i", len(packed)) + packed
+
+    def text(value):
+        return struct.pack(">i", len(value)) + value
+
+    null = struct.pack(">i", -1)
+
+    expected = (
+        struct.pack(">h", 7)
+        + field(">q", 1)
+        + field(">d", 1.5)
+        + text(b"abc")
+        + text(b'\x01{"a": 1}')
+        + field(">?", True)
+        + field(">q", 1000000)
+        + field(">i", 2)
+        + struct.pack(">h", 7)
+        + field(">q", 2)
+        + null
+        + null
+        + null
+        + field(">?", False)
+        + null
+        + null
+        + struct.pack(">h", 7)
+        + null
+        + field(">d", -2.0)
+        + text("é".encode("utf-8"))
+        + null
+        + null
+        + field(">q", -3600000000)
+        + field(">i", -1)
+    )
+    assert res == expected
+
+
+@pytest.mark.parametrize(
+    "values,encoder",
+    [
+        ([3_000_000_000], "int4"),
+        ([70000], "int2"),
+        ([-32769], "int2"),
+        ([2**63], "int8"),
+        ([2**70], "int8"),
+        ([1.7, None], "int4"),
+        ([np.inf], "int4"),
+        ([float(2**63)], "int8"),
+        ([1e39], "float4"),
+        ([2], "bool"),
+        (["false"], "bool"),
+    ],
+)
+def test_encode_pgcopy_column_rejects_values_that_would_change(values, encoder):
+    with pytest.raises(ValueError):
+        encode_pgcopy_column(pd.Series(values, name="col"), encoder)
+
+
+def test_encode_pgcopy_column_accepts_values_within_range():
+    def field(fmt, value):
+        packed = struct.pack(fmt, value)
+        return struct.pack(">i", len(packed)) + packed
+
+    null = struct.pack(">i", -1)
+
+    res = encode_pgcopy_column(pd.Series([-32768.0, 32767.0, None]), "int2")
+    assert res.to_pylist() == [field(">h", -32768), field(">h", 32767), null]
+
+    res = encode_pgcopy_column(pd.Series([2**63 - 1, -(2**63)]), "int8")
+    assert res.to_pylist() == [field(">q", 2**63 - 1), field(">q", -(2**63))]
+
+    res = encode_pgcopy_column(pd.Series([np.inf, 3.0e38]), "float4")
+    assert res.to_pylist() == [field(">f", np.inf), field(">f", 3.0e38)]
+
+    res = encode_pgcopy_column(pd.Series([1, 0, None], dtype=object), "bool")
+    assert res.to_pylist() == [field(">?", True), field(">?", False), null]
+
+
+def test_bytes_iterator_file():
+    chunks = [PGCOPY_HEADER, b"abcdef", b"", b"ghi", PGCOPY_TRAILER]
+    f = BytesIteratorFile(iter(chunks))
+    read = []
+    while part := f.read(4):
+        read.append(part)
+    assert all(len(part) == 4 for part in read[:-1])
+    assert b"".join(read) == b"".join(chunks)
+    assert BytesIteratorFile(iter(chunks)).read() == b"".join(chunks)
+
+
+def test_psql_insert_copy_binary():
+    table = Table(
+        "copy_test",
+        MetaData(),
+        Column("n", SmallInteger),
+        Column("id", BigInteger),
+        Column("value", DOUBLE_PRECISION),
+        Column("ratio", REAL),
+        Column("name", VARCHAR),
+        Column("data", JSONB),
+        Column("is_ok", Boolean),
+        Column("ts", DateTime),
+        Column("d", Date),
+        prefixes=["TEMPORARY"],
+    )
+    df = pd.DataFrame(
+        {
+            "n": [1, 2, 3, 4, 5],
+            "id": [1, None, 3, 2**40, -5],
+            "value": [1.5, np.nan, -2.0, 0.0, 1e-300],
+            "ratio": [0.25, None, np.nan, 2.0, -1.5],
+            "name": ["Bâteau Été", None, "", "漢字 🐟", "abc"],
+            "data": ['{"espèce": "Thon rouge 🐟"}', None, "[]", "null", '{"a": 1}'],
+            "is_ok": [True, None, False, True, None],
+            "ts": [
+                datetime(2000, 1, 1, 0, 0, 1, 500),
+                pd.NaT,
+                datetime(1999, 12, 31, 23, 0),
+                datetime(2024, 2, 29, 12, 30),
+                pd.NaT,
+            ],
+            "d": [date(2000, 1, 3), None, date(1999, 12, 31), None, date(2024, 2, 29)],
+        }
+    )
+
+    engine = create_engine("monitorfish_remote")
+    with engine.begin() as con:
+        table.create(con)
+        psql_insert_copy_binary(df, table, con, block_size=2)
+        rows = con.execute(select(table).order_by(table.c.n)).all()
+
+    assert [tuple(row) for row in rows] == [
+        (
+            1,
+            1,
+            1.5,
+            0.25,
+            "Bâteau Été",
+            {"espèce": "Thon rouge 🐟"},
+            True,
+            datetime(2000, 1, 1, 0, 0, 1, 500),
+            date(2000, 1, 3),
+        ),
+        (2, None, None, None, None, None, None, None, None),
+        (
+            3,
+            3,
+            -2.0,
+            None,
+            "",
+            [],
+            False,
+            datetime(1999, 12, 31, 23, 0),
+            date(1999, 12, 31),
+        ),
+        (
+            4,
+            2**40,
+            0.0,
+            2.0,
+            "漢字 🐟",
+            None,
+            True,
+            datetime(2024, 2, 29, 12, 30),
+            None,
+        ),
+        (5, -5, 1e-300, -1.5, "abc", {"a": 1}, None, None, date(2024, 2, 29)),
+    ]
+
+
+def test_upsert_from_table():
+    table = Table(
+        "vessels",
+        MetaData(schema="public"),
+        Column("id", Integer),
+        Column("name", VARCHAR),
+        Column("length", REAL),
+    )
+    connection = MagicMock()
+
+    temp_table = create_temporary_table_like(table, connection)
+    assert temp_table.name.startswith("tmp_vessels_")
+    assert [c.name for c in temp_table.columns] == ["id", "name", "length"]
+    create_statement = str(connection.execute.call_args.args[0])
+    assert create_statement == (
+        f'CREATE TEMPORARY TABLE "{temp_table.name}" '
+        '(LIKE "public"."vessels" INCLUDING DEFAULTS) ON COMMIT DROP'
+    )
+
+    connection.reset_mock()
+    upsert_from_table(
+        table=table,
+        source=temp_table,
+        table_id_column="id",
+        source_id_column="id",
+        columns=["id", "name"],
+        connection=connection,
+        logger=Logger("logger"),
+    )
+    delete, insert = [
+        str(c.args[0].compile(dialect=postgresql.dialect())).replace("\n", "")
+        for c in connection.execute.call_args_list
+    ]
+    assert delete == (
+        f"DELETE FROM public.vessels USING {temp_table.name} "
+        f"WHERE public.vessels.id = {temp_table.name}.id"
+    )
+    assert insert == (
+        f"INSERT INTO public.vessels (id, name) "
+        f"SELECT {temp_table.name}.id, {temp_table.name}.name "
+        f"FROM {temp_table.name}"
+    )
+
+
+@patch("forklift.pipeline.utils.pd.read_sql")
+def test_select_ids_not_in_table(mock_read_sql):
+    table = Table("vessels", MetaData(schema="public"), Column("id", Integer))
+    connection = MagicMock()
+    cursor = connection.connection.cursor.return_value.__enter__.return_value
+    mock_read_sql.return_value = pd.DataFrame({"id": [3]})
+
+    res = select_ids_not_in_table([1, 2, 3], table, "id", connection)
+
+    assert res.tolist() == [3]
+
+    copy_sql = cursor.copy_expert.call_args.kwargs["sql"]
+    ids_table_name = copy_sql.split('"')[1]
+    assert ids_table_name.startswith("tmp_ids_vessels_")
+    assert copy_sql == f'COPY "{ids_table_name}" ("id") FROM STDIN WITH CSV'
+    assert cursor.copy_expert.call_args.kwargs["file"].getvalue() == "1\r\n2\r\n3\r\n"
+
+    statement = mock_read_sql.call_args.args[0]
+    assert str(statement.compile(dialect=postgresql.dialect())).replace("\n", "") == (
+        f"SELECT {ids_table_name}.id FROM {ids_table_name} "
+        f"WHERE NOT (EXISTS (SELECT * FROM public.vessels "
+        f"WHERE public.vessels.id = {ids_table_name}.id))"
+    )
+
+
+@fixture
+def swap_test_schema():
+    engine = create_engine("monitorfish_remote")
+    with engine.begin() as con:
+        con.execute(text("""
+                CREATE ROLE swap_test_reader;
+                CREATE SCHEMA swap_test;
+
+                CREATE TABLE swap_test.ports (locode VARCHAR PRIMARY KEY);
+                INSERT INTO swap_test.ports VALUES ('FRBES'), ('FRLEH');
+
+                CREATE TABLE swap_test.vessels (
+                    id INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+                    serial_id SERIAL,
+                    cfr VARCHAR UNIQUE,
+                    port VARCHAR REFERENCES swap_test.ports (locode),
+                    length REAL CONSTRAINT positive_length CHECK (length > 0)
+                ) WITH (fillfactor = 90);
+                CREATE INDEX vessels_length_idx ON swap_test.vessels (length);
+                COMMENT ON TABLE swap_test.vessels IS 'Vessels';
+                INSERT INTO swap_test.vessels (cfr, port, length) VALUES
+                    ('abc000000001', 'FRBES', 12.5),
+                    ('abc000000002', 'FRLEH', 20.0);
+
+                CREATE FUNCTION swap_test.upper_cfr() RETURNS TRIGGER AS $$
+                BEGIN
+                    NEW.cfr = upper(NEW.cfr);
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql;
+                CREATE TRIGGER upper_cfr BEFORE INSERT ON swap_test.vessels
+                FOR EACH ROW EXECUTE FUNCTION swap_test.upper_cfr();
+
+                ALTER TABLE swap_test.vessels ENABLE ROW LEVEL SECURITY;
+                CREATE POLICY long_vessels ON swap_test.vessels
+                FOR SELECT TO swap_test_reader USING (length > 15);
+
+                GRANT USAGE ON SCHEMA swap_test TO swap_test_reader;
+                GRANT SELECT ON swap_test.vessels TO swap_test_reader;
+                GRANT UPDATE (cfr) ON swap_test.vessels TO swap_test_reader
+                WITH GRANT OPTION;
+                """))
+
+    yield engine
+
+    with engine.begin() as con:
+        con.execute(text("DROP SCHEMA swap_test CASCADE; DROP ROLE swap_test_reader;"))
+
+
+def get_table_definition(schema: str, table_name: str, con) -> dict:
+    """Returns the catalog entries of a table that a swap must preserve, without
+    oids."""
+    params = {"table": f"{schema}.{table_name}"}
+    queries = {
+        "table": (
+            "SELECT relowner::regrole::text, reloptions, relacl::text, "
+            "relrowsecurity, obj_description(oid, 'pg_class') "
+            "FROM pg_class WHERE oid = CAST(:table AS regclass)"
+        ),
+        "columns": (
+            "SELECT attname, format_type(atttypid, atttypmod), attnotnull, "
+            "attidentity, attacl::text, pg_get_expr(d.adbin, d.adrelid) "
+            "FROM pg_attribute a "
+            "LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum "
+            "WHERE attrelid = CAST(:table AS regclass) AND attnum > 0 "
+            "ORDER BY attnum"
+        ),
+        "constraints": (
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) ORDER BY conname"
+        ),
+        "indexes": (
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname || '.' || tablename = :table ORDER BY indexname"
+        ),
+        "triggers": (
+            "SELECT tgname, tgenabled FROM pg_trigger "
+            "WHERE tgrelid = CAST(:table AS regclass) AND NOT tgisinternal"
+        ),
+        "policies": (
+            "SELECT policyname, roles::text, cmd, qual FROM pg_policies "
+            "WHERE schemaname || '.' || tablename = :table"
+        ),
+        "identity_sequence": (
+            "SELECT pg_get_serial_sequence(:table, 'id'), "
+            "pg_get_serial_sequence(:table, 'serial_id')"
+        ),
+    }
+    return {
+        name: con.execute(text(query), params).all() for name, query in queries.items()
+    }
+
+
+def test_load_with_swap(swap_test_schema):
+    engine = swap_test_schema
+    with engine.begin() as con:
+        initial_definition = get_table_definition("swap_test", "vessels", con)
+
+    future = load(
+        pd.DataFrame(
+            {
+                "id": [5, 6, 7],
+                "serial_id": [5, 6, 7],
+                "cfr": ["abc000000005", "abc000000006", "abc000000007"],
+                "port": ["FRLEH", "FRLEH", None],
+                "length": [12.0, 18.0, 25.0],
+            }
+        ),
+        table_name="vessels",
+        schema="swap_test",
+        db_name="monitorfish_remote",
+        logger=Logger("logger"),
+        how="replace",
+        replace_strategy="swap",
+    )
+    future.result()
+
+    with engine.begin() as con:
+        assert get_table_definition("swap_test", "vessels", con) == (initial_definition)
+        assert con.execute(
+            text(
+                "SELECT tablename FROM pg_tables WHERE schemaname = 'swap_test' "
+                "ORDER BY tablename"
+            )
+        ).scalars().all() == ["ports", "vessels"]
+
+        # Rows were replaced, triggers fired and sequences kept their values
+        con.execute(
+            text("INSERT INTO swap_test.vessels (cfr, length) VALUES ('abc8', 1)")
+        )
+        vessels = pd.read_sql(
+            "SELECT * FROM swap_test.vessels ORDER BY cfr", con
+        ).to_dict(orient="list")
+        assert vessels == {
+            "id": [5, 6, 7, 3],
+            "serial_id": [5, 6, 7, 3],
+            "cfr": ["ABC000000005", "ABC000000006", "ABC000000007", "ABC8"],
+            "port": ["FRLEH", "FRLEH", None, None],
+            "length": [12.0, 18.0, 25.0, 1.0],
+        }
+
+        # Constraints are enforced
+        with pytest.raises(IntegrityError):
+            with con.begin_nested():
+                con.execute(
+                    text("INSERT INTO swap_test.vessels (cfr, port) VALUES ('x', 'y')")
+                )
+
+        # Privileges and policies apply
+        con.execute(text("SET ROLE swap_test_reader"))
+        assert con.execute(
+            text("SELECT cfr FROM swap_test.vessels ORDER BY cfr")
+        ).scalars().all() == ["ABC000000006", "ABC000000007"]
+        con.execute(text("RESET ROLE"))
+
+
+def test_load_with_swap_falls_back_to_delete(swap_test_schema):
+    engine = swap_test_schema
+    with engine.begin() as con:
+        con.execute(
+            text(
+                "CREATE VIEW swap_test.vessels_view AS "
+                "SELECT cfr FROM swap_test.vessels"
+            )
+        )
+        table_oid = con.execute(
+            text("SELECT CAST('swap_test.vessels' AS regclass)::oid")
+        ).scalar_one()
+
+    future = load(
+        pd.DataFrame({"id": [5], "cfr": ["abc000000005"]}),
+        table_name="vessels",
+        schema="swap_test",
+        db_name="monitorfish_remote",
+        logger=Logger("logger"),
+        how="replace",
+        replace_strategy="swap",
+    )
+
+    assert future is None
+    with engine.begin() as con:
+        assert con.execute(
+            text("SELECT CAST('swap_test.vessels' AS regclass)::oid")
+        ).scalar_one() == (table_oid)
+        assert con.execute(
+            text("SELECT cfr FROM swap_test.vessels_view")
+        ).scalars().all() == ["ABC000000005"]
+
+
+def test_get_dependent_objects(swap_test_schema):
+    engine = swap_test_schema
+    with engine.begin() as con:
+        table = get_table("vessels", "swap_test", con, Logger("logger"))
+        ports = get_table("ports", "swap_test", con, Logger("logger"))
+        assert get_dependent_objects(table, con) == []
+        assert get_dependent_objects(ports, con) == [
+            "constraint vessels_port_fkey on table swap_test.vessels"
+        ]
+
+        con.execute(text("""
+                CREATE VIEW swap_test.vessels_view AS SELECT * FROM swap_test.vessels;
+                CREATE MATERIALIZED VIEW swap_test.vessels_matview AS
+                SELECT * FROM swap_test.vessels;
+                CREATE FUNCTION swap_test.vessel_cfr(v swap_test.vessels)
+                RETURNS VARCHAR AS 'SELECT v.cfr' LANGUAGE sql;
+                CREATE FUNCTION swap_test.n_vessels() RETURNS BIGINT
+                BEGIN ATOMIC SELECT COUNT(*) FROM swap_test.vessels; END;
+                CREATE FUNCTION swap_test.noop() RETURNS TRIGGER AS $$
+                BEGIN RETURN NEW; END;
+                $$ LANGUAGE plpgsql;
+                CREATE CONSTRAINT TRIGGER ports_noop AFTER INSERT ON swap_test.ports
+                FROM swap_test.vessels FOR EACH ROW EXECUTE FUNCTION swap_test.noop();
+                """))
+        assert sorted(get_dependent_objects(table, con)) == [
+            "function swap_test.n_vessels()",
+            "function swap_test.vessel_cfr(swap_test.vessels)",
+            "rule _RETURN on materialized view swap_test.vessels_matview",
+            "rule _RETURN on view swap_test.vessels_view",
+            "trigger ports_noop on table swap_test.ports",
+        ]